@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Audit (and optionally repair) city_state_cache.json offline
+
+Usage:
+    python scripts/auditGeocodeCache.py [--cache PATH] [--repair] [--purge-expired]
+
+Every cache entry is re-checked against the static mappings, the PIN tables
+and the junk filter (no network). Reported conflicts:
+- junk:         a placeholder key ("xxx", "none"); these are never looked up
+                now, and some were cached with bogus states
+- mismatch:     the key is a known place/PIN whose state differs from the cache
+- fillable:     a negative entry the offline stages can now resolve
+- noncanonical: a cached state that is not a known Indian state/UT name
+- expired:      negative entries past NEGATIVE_CACHE_TTL (retried anyway)
+
+With --repair, junk and noncanonical entries are dropped (so they are looked
+up again if still needed) and mismatch/fillable entries are rewritten with the
+offline answer (source "audit"). --purge-expired also drops expired
+negatives. The file is rewritten atomically, in the current entry format.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import populateHometownState as resolver
+from placeMappings import load_mappings
+
+EXAMPLES_SHOWN = 20
+
+
+def offline_state(key: str, mappings: dict) -> str:
+    """
+    State from the unambiguous offline stages only: exact mapping, PIN code,
+    an exact comma part or a state name (an ambiguous place name only with
+    context). The loose substring scan is left out
+    on purpose; it is what produces the wrong answers the audit looks for.
+    """
+    all_mappings = mappings['all_mappings']
+    normalized = resolver.normalize_hometown(key)
+
+    # A place name shared by several states only counts when the key's own
+    # context settles it; the single mapped state would flag good answers
+    result = resolver.disambiguate_place(normalized, mappings)
+    if result is not None:
+        return result[0] if result[1] == 'disambiguated' else ''
+
+    if normalized in all_mappings:
+        return all_mappings[normalized]
+    state, _ = resolver.state_from_pin(normalized, mappings)
+    if state:
+        return state
+
+    parts = [resolver.normalize_hometown(part) for part in key.split(',')]
+    for part in parts:
+        if part in all_mappings:
+            return all_mappings[part]
+    for part in parts:
+        if part in mappings['state_names']:
+            return mappings['state_names'][part]
+    return ''
+
+
+def audit_cache(cache: dict, mappings: dict, now: float = None) -> dict:
+    """Classify entries; returns {conflict kind: [(key, cached state, offline state)]}"""
+    now = time.time() if now is None else now
+    known_states = mappings['canonical_states'] | set(mappings['mapped_states'])
+    report = {'junk': [], 'mismatch': [], 'fillable': [], 'noncanonical': [], 'expired': []}
+
+    for key, entry in cache.items():
+        cached = entry['state']
+        if resolver.is_junk_hometown(key, resolver.normalize_hometown(key), mappings):
+            report['junk'].append((key, cached, ''))
+            continue
+
+        expected = offline_state(key, mappings)
+        if cached and expected and cached != expected:
+            report['mismatch'].append((key, cached, expected))
+        elif not cached and expected:
+            report['fillable'].append((key, cached, expected))
+        elif cached and cached not in known_states:
+            report['noncanonical'].append((key, cached, ''))
+        elif resolver.cache_entry_expired(entry, now):
+            report['expired'].append((key, cached, ''))
+
+    return report
+
+
+def repair_cache(cache: dict, report: dict, purge_expired: bool = False) -> int:
+    """Apply the audit's fixes to cache in place; returns the number of changes"""
+    changes = 0
+    drop_kinds = ['junk', 'noncanonical'] + (['expired'] if purge_expired else [])
+    for kind in drop_kinds:
+        for key, _, _ in report[kind]:
+            del cache[key]
+            changes += 1
+    for kind in ('mismatch', 'fillable'):
+        for key, _, expected in report[kind]:
+            cache[key] = resolver.make_cache_entry(expected, 'audit')
+            changes += 1
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Audit the geocode cache against the offline mappings')
+    parser.add_argument('--cache', type=Path, default=resolver.CACHE_FILE, help='cache file to audit')
+    parser.add_argument('--repair', action='store_true', help='apply fixes and rewrite the cache')
+    parser.add_argument('--purge-expired', action='store_true', help='with --repair, also drop expired negatives')
+    args = parser.parse_args()
+
+    cache = resolver.read_geocode_cache(args.cache)
+    mappings = load_mappings()
+    report = audit_cache(cache, mappings)
+
+    print(f'Audited {len(cache)} cache entries')
+    for kind, rows in report.items():
+        print(f'\n{kind}: {len(rows)}')
+        for key, cached, expected in rows[:EXAMPLES_SHOWN]:
+            line = f'  - {key!r}: {cached or "(empty)"}'
+            if expected:
+                line += f' -> {expected}'
+            print(line)
+        if len(rows) > EXAMPLES_SHOWN:
+            print(f'  ... and {len(rows) - EXAMPLES_SHOWN} more')
+
+    if args.repair:
+        changes = repair_cache(cache, report, args.purge_expired)
+        resolver.write_geocode_cache(cache, args.cache)
+        print(f'\nRepaired {changes} entries in {args.cache}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the pipeline's in-memory student records
+
+Usage:
+    python scripts/benchmarkRecords.py [--students N] [--seed S]
+
+Loads a synthetic roster from JSON (so every record has its own strings, as
+after json.load) and enriches it with fetched hometowns and resolved states
+in two ways:
+- dicts: {**student, 'hometown': ..., **resolution_fields(...)} per record,
+  as the script did before StudentRecord
+- records: StudentRecord.from_dict with interned categorical strings,
+  enriched in place
+
+and reports, with tracemalloc, the memory still held per enriched record,
+the peak during loading/enrichment, and the wall time of each (timed
+separately, without tracemalloc). Resolution itself is done once up front;
+it is identical for both. Both must serialize to the same JSON.
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+import populateHometownState as resolver
+from benchmarkResolver import build_corpus
+from studentRecord import StudentRecord, intern_value
+
+DEPARTMENTS = ['CSE', 'EE', 'ME', 'CE', 'CHE', 'PHY', 'MTH', 'AE', 'BSBE', 'ECO', 'MSE', 'CHM']
+PROGRAMS = ['BTech', 'BS', 'MTech', 'MSc', 'PhD', 'MBA', 'Dual']
+HALLS = [f'HALL{n}' for n in range(1, 14)] + ['GH1']
+BLOOD_GROUPS = ['A+', 'A-', 'B+', 'B-', 'O+', 'O-', 'AB+', 'AB-', '']
+
+
+def build_roster(students: int = 20000, seed: int = 42) -> tuple:
+    """(students.json text, fetched hometowns as JSON text)"""
+    rng = random.Random(seed)
+    roster = []
+    for i in range(students):
+        year = rng.randint(15, 24)
+        roster.append({
+            'roll': f'{year}{rng.randint(0, 999999):06d}',
+            'name': f'Student {i}',
+            'dept': rng.choice(DEPARTMENTS),
+            'program': rng.choice(PROGRAMS),
+            'hall': rng.choice(HALLS),
+            'room': f'{rng.choice("ABCDEFGH")}{rng.randint(100, 420)}',
+            'gender': rng.choice(['M', 'F']),
+            'blood_group': rng.choice(BLOOD_GROUPS),
+            'username': f'user{i}',
+        })
+    hometowns = build_corpus(students, distinct=max(1, students // 50), seed=seed)
+    return json.dumps(roster), json.dumps(hometowns)
+
+
+def enrich_dicts(roster_json: str, hometowns_json: str, results: list) -> list:
+    students = json.loads(roster_json)
+    hometowns = json.loads(hometowns_json)
+    return [{**student, 'hometown': hometown, **resolver.resolution_fields(state, method)}
+            for student, hometown, (state, method) in zip(students, hometowns, results)]
+
+
+def enrich_records(roster_json: str, hometowns_json: str, results: list) -> list:
+    records = [StudentRecord.from_dict(student) for student in json.loads(roster_json)]
+    for record, hometown, (state, method) in zip(records, json.loads(hometowns_json), results):
+        record.hometown = intern_value(hometown)
+        resolver.set_resolution(record, state, method)
+    return records
+
+
+def _measure(fn, *args) -> dict:
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = fn(*args)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'result': result, 'retained': current - baseline, 'peak': peak - baseline, 'elapsed': elapsed}
+
+
+def run_benchmarks(students: int = 20000, seed: int = 42) -> dict:
+    roster_json, hometowns_json = build_roster(students, seed)
+    results = resolver.resolve_many_detailed(json.loads(hometowns_json))
+
+    dicts = _measure(enrich_dicts, roster_json, hometowns_json, results)
+    records = _measure(enrich_records, roster_json, hometowns_json, results)
+    identical = json.dumps(dicts.pop('result')) == json.dumps([r.to_dict() for r in records.pop('result')])
+    return {'students': students, 'dicts': dicts, 'records': records, 'identical': identical}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark memory of the enrichment records')
+    parser.add_argument('--students', type=int, default=20000, help='roster size')
+    parser.add_argument('--seed', type=int, default=42, help='roster random seed')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.students, args.seed)
+    n = results['students']
+    print(f'{n} students')
+    for name in ('dicts', 'records'):
+        row = results[name]
+        print(f'  {name:<8} {row["retained"] / n:7.0f} B/record retained  '
+              f'{row["peak"] / 2 ** 20:7.1f} MiB peak  {row["elapsed"] * 1000:7.1f} ms')
+    print(f'  retained memory: {results["records"]["retained"] / results["dicts"]["retained"]:.0%} of dicts')
+    print(f'  identical output: {results["identical"]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the hometown resolver
+
+Usage:
+    python scripts/benchmarkResolver.py [--students N] [--distinct K] [--seed S]
+
+Builds a synthetic roster of N students sharing K distinct hometown strings
+(drawn from the geocode cache keys and the static mappings, with a skewed
+distribution like a real directory) and times resolving it:
+- per student with get_state_from_hometown, as the script used to
+- in one batch with resolve_many
+
+Per-stage hit rates and costs of the resolver (over all runs) are printed
+after the timings.
+
+No network is used: the API fallback is off and the geocode cache is empty,
+so every lookup exercises the offline stages.
+"""
+
+import argparse
+import json
+import random
+import time
+
+import populateHometownState as resolver
+from placeMappings import load_mappings
+from resolverStages import format_stage_stats
+
+
+def build_corpus(students: int = 20000, distinct: int = 400, seed: int = 42) -> list:
+    """Roster of hometown strings with a Zipf-like repetition pattern"""
+    rng = random.Random(seed)
+
+    pool = []
+    if resolver.CACHE_FILE.exists():
+        with open(resolver.CACHE_FILE, 'r', encoding='utf-8') as f:
+            pool.extend(json.load(f))
+    for city, state in load_mappings()['all_mappings'].items():
+        pool.append(city.title())
+        pool.append(f'{city.title()}, {state}')
+    pool = sorted(set(pool))
+    rng.shuffle(pool)
+    hometowns = pool[:distinct]
+
+    weights = [1 / (rank + 1) for rank in range(len(hometowns))]
+    return rng.choices(hometowns, weights=weights, k=students)
+
+
+def _time(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmarks(corpus: list, repeat: int = 3) -> dict:
+    """Best-of-`repeat` timings in seconds, and whether both paths agree"""
+    saved_cache = resolver.geocode_cache
+    resolver.geocode_cache = {}
+    try:
+        load_mappings()
+        per_student = lambda: [resolver.get_state_from_hometown(h, use_api_fallback=False) for h in corpus]
+        batch = lambda: resolver.resolve_many(corpus)
+        return {
+            'students': len(corpus),
+            'distinct': len(set(corpus)),
+            'per_student': _time(per_student, repeat),
+            'resolve_many': _time(batch, repeat),
+            'identical': per_student() == batch(),
+        }
+    finally:
+        resolver.geocode_cache = saved_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark hometown resolution throughput')
+    parser.add_argument('--students', type=int, default=20000, help='roster size')
+    parser.add_argument('--distinct', type=int, default=400, help='distinct hometown strings')
+    parser.add_argument('--seed', type=int, default=42, help='corpus random seed')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement (best is kept)')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.students, args.distinct, args.seed)
+    results = run_benchmarks(corpus, args.repeat)
+
+    print(f'{results["students"]} students, {results["distinct"]} distinct hometowns')
+    for name in ('per_student', 'resolve_many'):
+        elapsed = results[name]
+        print(f'  {name:<12} {elapsed * 1000:8.1f} ms  {results["students"] / elapsed:10.0f} students/s')
+    print(f'  speedup      {results["per_student"] / results["resolve_many"]:8.1f}x')
+    print(f'  identical results: {results["identical"]}')
+    print()
+    print(format_stage_stats(resolver.stage_chains()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Minimal Bloom filter for compact set membership with no false negatives.
+
+Sized from the expected number of items and the target false positive rate;
+the k bit positions of an item are independent 64-bit words of one
+SHAKE-256 digest, taken modulo a prime table size. (Double hashing gave far
+more false positives than configured on small tables: a step sharing a
+factor with the size cycles through only a few bits, and even with distinct
+positions the hashes are correlated.) Still probabilistic: callers that
+can't afford a false positive confirm hits against the exact set.
+Instances pickle cleanly, so they can live in compiled snapshots.
+"""
+
+import hashlib
+import math
+
+
+def _next_prime(n: int) -> int:
+    def is_prime(m):
+        if m < 2:
+            return False
+        if m % 2 == 0:
+            return m == 2
+        return all(m % d for d in range(3, math.isqrt(m) + 1, 2))
+    while not is_prime(n):
+        n += 1
+    return n
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 1e-6):
+        capacity = max(1, capacity)
+        self.size = _next_prime(max(11, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.shake_256(item.encode('utf-8')).digest(8 * self.hashes)
+        for i in range(0, len(digest), 8):
+            yield int.from_bytes(digest[i:i + 8], 'little') % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    @classmethod
+    def from_items(cls, items, error_rate: float = 1e-6) -> 'BloomFilter':
+        items = list(items)
+        bloom = cls(len(items), error_rate)
+        for item in items:
+            bloom.add(item)
+        return bloom
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Build and query the precomputed aggregation cube of student counts
+
+Usage:
+    python scripts/buildAggregateCube.py [--students PATH] [--out PATH]
+    python scripts/buildAggregateCube.py --by state --by batchYear --where department=CSE
+
+Writes public/aggregates.json: the number of students for every combination
+of state, batch year, department, program, hall and gender that occurs (the
+same facet values as facets.json, via student_facets). The population script
+builds it in the pass that turns records into students.json rows; this
+command rebuilds it from an existing students.json.
+
+Format (compact JSON):
+    {"version": 1, "count": N,
+     "dimensions": ["state", "batchYear", ...],
+     "values": {"state": ["Bihar", ...], ...},
+     "cells": [i0, i1, i2, i3, i4, i5, count, ...]}
+
+cells is flat, one group of len(dimensions) + 1 numbers per non-empty cell:
+the index of the cell's value in each dimension (-1 for a missing value),
+then the count. Cube.load() reads it back; rollup() and total() answer
+"how many by X (where Y)" from the cells alone, without the students.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from buildFacetIndex import FACETS
+from studentUtils import parse_facet_filters, student_facets
+
+SCRIPT_DIR = Path(__file__).parent
+STUDENTS_FILE = SCRIPT_DIR.parent / "public" / "students.json"
+CUBE_FILE = SCRIPT_DIR.parent / "public" / "aggregates.json"
+
+CUBE_VERSION = 1
+CUBE_DIMENSIONS = ('state', 'batchYear', 'department', 'program', 'hall', 'gender')
+
+
+class CubeBuilder:
+    """Counts students per cell; add() each students.json row, then build()"""
+
+    def __init__(self, dimensions: tuple = CUBE_DIMENSIONS):
+        self.dimensions = dimensions
+        self.counts = {}
+        self.count = 0
+
+    def add(self, student: dict):
+        facets = student_facets(student)
+        key = tuple(facets[dimension] for dimension in self.dimensions)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.count += 1
+
+    def build(self) -> dict:
+        values = {}
+        for i, dimension in enumerate(self.dimensions):
+            present = {key[i] for key in self.counts if key[i] is not None}
+            values[dimension] = sorted(present, reverse=(FACETS[dimension] == 'desc'))
+        positions = [{value: j for j, value in enumerate(values[dimension])}
+                     for dimension in self.dimensions]
+
+        encoded = []
+        for key, count in self.counts.items():
+            coords = [positions[i][value] if value is not None else -1 for i, value in enumerate(key)]
+            encoded.append((coords, count))
+        encoded.sort()
+        cells = []
+        for coords, count in encoded:
+            cells.extend(coords)
+            cells.append(count)
+
+        return {
+            'version': CUBE_VERSION,
+            'count': self.count,
+            'dimensions': list(self.dimensions),
+            'values': values,
+            'cells': cells,
+        }
+
+
+def build_cube(students: list) -> dict:
+    builder = CubeBuilder()
+    for student in students:
+        builder.add(student)
+    return builder.build()
+
+
+def write_cube(cube: dict, path: Path = CUBE_FILE):
+    """Write a built cube as compact JSON"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cube, f, separators=(',', ':'), ensure_ascii=False)
+
+
+class Cube:
+    """
+    Query helper over a built cube. Filters are keyword arguments,
+    dimension=value or dimension=[values] (OR within a dimension, AND across
+    dimensions); None stands for a missing value.
+
+        cube = Cube.load()
+        cube.total(department='CSE')                 # -> int
+        cube.rollup('state')                         # -> {'Bihar': 812, ...}
+        cube.rollup('batchYear', 'gender', state='Kerala')
+                                                     # -> {(2023, 'F'): 14, ...}
+        cube.slice(program=['BTech', 'BS']).rollup('hall')
+    """
+
+    def __init__(self, dimensions: tuple, cells: list):
+        self.dimensions = tuple(dimensions)
+        self.cells = cells  # [(values tuple, count)]
+
+    @classmethod
+    def from_artifact(cls, artifact: dict) -> 'Cube':
+        dimensions = artifact['dimensions']
+        values = [artifact['values'][dimension] for dimension in dimensions]
+        stride = len(dimensions) + 1
+        flat = artifact['cells']
+        cells = []
+        for start in range(0, len(flat), stride):
+            coords = flat[start:start + stride - 1]
+            key = tuple(values[i][c] if c >= 0 else None for i, c in enumerate(coords))
+            cells.append((key, flat[start + stride - 1]))
+        return cls(dimensions, cells)
+
+    @classmethod
+    def load(cls, path: Path = CUBE_FILE) -> 'Cube':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_artifact(json.load(f))
+
+    def _index(self, dimension: str) -> int:
+        try:
+            return self.dimensions.index(dimension)
+        except ValueError:
+            raise ValueError(f'Unknown dimension {dimension!r} (dimensions: {", ".join(self.dimensions)})')
+
+    def _matching(self, where: dict):
+        tests = []
+        for dimension, wanted in where.items():
+            accepted = set(wanted) if isinstance(wanted, (list, tuple, set, frozenset)) else {wanted}
+            tests.append((self._index(dimension), accepted))
+        for key, count in self.cells:
+            if all(key[i] in accepted for i, accepted in tests):
+                yield key, count
+
+    def total(self, **where) -> int:
+        return sum(count for _, count in self._matching(where))
+
+    def rollup(self, *dimensions, **where) -> dict:
+        """Counts grouped by the given dimensions (a value, or a tuple for several), largest first"""
+        indexes = [self._index(dimension) for dimension in dimensions]
+        groups = {}
+        for key, count in self._matching(where):
+            group = tuple(key[i] for i in indexes)
+            if len(group) == 1:
+                group = group[0]
+            groups[group] = groups.get(group, 0) + count
+        return dict(sorted(groups.items(), key=lambda item: -item[1]))
+
+    def slice(self, **where) -> 'Cube':
+        """Sub-cube of the cells matching the filters"""
+        return Cube(self.dimensions, list(self._matching(where)))
+
+    def values(self, dimension: str) -> list:
+        """Values of a dimension that have at least one student"""
+        i = self._index(dimension)
+        return sorted({key[i] for key, _ in self.cells if key[i] is not None},
+                      reverse=(FACETS.get(dimension) == 'desc'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the aggregation cube')
+    parser.add_argument('--students', type=Path, default=STUDENTS_FILE, help='students.json to aggregate')
+    parser.add_argument('--out', type=Path, default=CUBE_FILE, help='cube file to write or query')
+    parser.add_argument('--by', action='append', default=[], choices=CUBE_DIMENSIONS,
+                        help='query: group by this dimension (repeatable)')
+    parser.add_argument('--where', action='append', default=[], metavar='DIMENSION=VALUE',
+                        help='query: only students with this value (repeatable)')
+    args = parser.parse_args()
+
+    if args.by or args.where:
+        try:
+            filters = parse_facet_filters(args.where, CUBE_DIMENSIONS)
+        except ValueError as e:
+            print(f'Error: {e}')
+            sys.exit(2)
+        cube = Cube.load(args.out)
+        print(f'{cube.total(**filters)} matching students')
+        if args.by:
+            for group, count in cube.rollup(*args.by, **filters).items():
+                label = ' / '.join(map(str, group)) if isinstance(group, tuple) else str(group)
+                print(f'  {label:<40} {count:6d}')
+        return
+
+    with open(args.students, 'r', encoding='utf-8') as f:
+        students = json.load(f)
+    cube = build_cube(students)
+    write_cube(cube, args.out)
+    print(f'Wrote aggregation cube for {cube["count"]} students to {args.out} '
+          f'({len(cube["cells"]) // (len(CUBE_DIMENSIONS) + 1)} cells)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Build precomputed facet indexes for the student directory
+
+Usage:
+    python scripts/buildFacetIndex.py [--students PATH] [--out PATH]
+    python scripts/buildFacetIndex.py --where department=CSE --where batchYear=2023
+
+Writes public/facets.json with, for every facet (batch year, department,
+program, hall, gender, blood group, state):
+- the sorted list of values (same order the filter bar shows them in)
+- the number of students per value
+- a posting list per value: ascending record ids, where a record id is the
+  student's position in students.json (and in the top-level "rolls" array)
+
+Filtering on several facets is then a union of postings within a facet and an
+intersection across facets, instead of a scan over every student.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from studentUtils import parse_facet_filters, student_facets
+
+SCRIPT_DIR = Path(__file__).parent
+STUDENTS_FILE = SCRIPT_DIR.parent / "public" / "students.json"
+FACETS_FILE = SCRIPT_DIR.parent / "public" / "facets.json"
+
+FACET_INDEX_VERSION = 1
+
+# Facet name -> sort order of its values (matches the getUnique* helpers)
+FACETS = {
+    'batchYear': 'desc',
+    'department': 'asc',
+    'program': 'asc',
+    'hall': 'asc',
+    'gender': 'asc',
+    'bloodGroup': 'asc',
+    'state': 'asc',
+}
+
+
+def build_facet_index(students: list) -> dict:
+    """Build facet values, counts and posting lists in a single pass"""
+    postings = {facet: {} for facet in FACETS}
+    rolls = []
+
+    for record_id, student in enumerate(students):
+        rolls.append(student.get('roll') or student.get('rollNo') or '')
+        for facet, value in student_facets(student).items():
+            if value is not None:
+                postings[facet].setdefault(value, []).append(record_id)
+
+    facets = {}
+    for facet, order in FACETS.items():
+        values = sorted(postings[facet], reverse=(order == 'desc'))
+        facets[facet] = {
+            'values': values,
+            'counts': [len(postings[facet][v]) for v in values],
+            'postings': [postings[facet][v] for v in values],
+        }
+
+    return {
+        'version': FACET_INDEX_VERSION,
+        'count': len(students),
+        'rolls': rolls,
+        'facets': facets,
+    }
+
+
+def write_facet_index(students: list, path: Path = FACETS_FILE) -> dict:
+    """Build the facet index and write it as compact JSON"""
+    index = build_facet_index(students)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'), ensure_ascii=False)
+    return index
+
+
+def _intersect(a: list, b: list) -> list:
+    """Intersect two ascending id lists"""
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            result.append(a[i])
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def select(index: dict, filters: dict) -> list:
+    """
+    Return ascending record ids matching the filters.
+
+    `filters` maps facet name -> list of accepted values. Values within a facet
+    are OR-ed, facets are AND-ed (same semantics as filterStudents). Facets
+    with an empty value list are ignored.
+    """
+    candidates = []
+    for facet, wanted in filters.items():
+        if not wanted:
+            continue
+        entry = index['facets'][facet]
+        positions = {v: i for i, v in enumerate(entry['values'])}
+        ids = set()
+        for value in wanted:
+            if value in positions:
+                ids.update(entry['postings'][positions[value]])
+        candidates.append(sorted(ids))
+
+    if not candidates:
+        return list(range(index['count']))
+
+    # Intersect smallest first so the working set only shrinks
+    candidates.sort(key=len)
+    result = candidates[0]
+    for ids in candidates[1:]:
+        if not result:
+            break
+        result = _intersect(result, ids)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the precomputed facet index')
+    parser.add_argument('--students', type=Path, default=STUDENTS_FILE, help='students.json to index')
+    parser.add_argument('--out', type=Path, default=FACETS_FILE, help='facet index to write')
+    parser.add_argument('--where', action='append', default=[], metavar='FACET=VALUE',
+                        help='query an existing index instead of building (repeatable)')
+    args = parser.parse_args()
+
+    if args.where:
+        try:
+            filters = parse_facet_filters(args.where, FACETS)
+        except ValueError as e:
+            print(f'Error: {e}')
+            sys.exit(2)
+        with open(args.out, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        ids = select(index, filters)
+        print(f'{len(ids)} matching students')
+        for record_id in ids[:20]:
+            print(f'  - {index["rolls"][record_id]}')
+        if len(ids) > 20:
+            print(f'  ... and {len(ids) - 20} more')
+        return
+
+    with open(args.students, 'r', encoding='utf-8') as f:
+        students = json.load(f)
+    index = write_facet_index(students, args.out)
+    print(f'Wrote facet index for {index["count"]} students to {args.out}')
+    for facet, entry in index['facets'].items():
+        print(f'  {facet}: {len(entry["values"])} values')
+
+
+if __name__ == '__main__':
+    main()
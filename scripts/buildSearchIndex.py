@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Build a static search index over student names, roll numbers and emails
+
+Usage:
+    python scripts/buildSearchIndex.py [--students PATH] [--out PATH]
+    python scripts/buildSearchIndex.py --query "sharma"
+    python scripts/buildSearchIndex.py --prefix "adi"
+    python scripts/buildSearchIndex.py --benchmark
+
+Writes public/search-index.json containing:
+- "fields": per record id, the lowercased [name, roll, email] strings the
+  search box matches against (record id = position in students.json)
+- "trigrams": trigram -> record ids whose fields contain it, for substring
+  search. A query of 3+ characters only needs to verify the intersection of
+  its trigrams' postings instead of scanning every student
+- "terms"/"termIds": a sorted term list (name words, full names, rolls and
+  usernames) with the record ids per term. Being sorted, every prefix maps to
+  a contiguous range found by binary search, which is what a prefix trie
+  gives for autocomplete without the per-node overhead in JSON
+
+Posting lists are stored delta-encoded (first id, then gaps) to keep the
+artifact small; load_search_index() decodes them.
+"""
+
+import argparse
+import bisect
+import json
+import time
+from pathlib import Path
+
+from studentUtils import clean_name
+
+SCRIPT_DIR = Path(__file__).parent
+STUDENTS_FILE = SCRIPT_DIR.parent / "public" / "students.json"
+SEARCH_INDEX_FILE = SCRIPT_DIR.parent / "public" / "search-index.json"
+
+SEARCH_INDEX_VERSION = 1
+EMAIL_DOMAIN = '@iitk.ac.in'
+
+
+def search_fields(student: dict) -> list:
+    """Lowercased name, roll and email as matched by filterStudents"""
+    roll = student.get('roll') or student.get('rollNo') or ''
+    username = student.get('username') or ''
+    return [
+        clean_name(student.get('name')).lower(),
+        str(roll).lower(),
+        f'{username}{EMAIL_DOMAIN}'.lower() if username else '',
+    ]
+
+
+def trigrams(text: str) -> set:
+    """All 3-character substrings of text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _encode(ids: list) -> list:
+    return [ids[0]] + [b - a for a, b in zip(ids, ids[1:])] if ids else []
+
+
+def _decode(gaps: list) -> list:
+    ids = []
+    total = 0
+    for gap in gaps:
+        total += gap
+        ids.append(total)
+    return ids
+
+
+def build_search_index(students: list) -> dict:
+    """Build the trigram and prefix indexes in a single pass"""
+    fields = []
+    grams = {}
+    terms = {}
+
+    for record_id, student in enumerate(students):
+        record_fields = search_fields(student)
+        fields.append(record_fields)
+
+        record_grams = set()
+        for text in record_fields:
+            record_grams |= trigrams(text)
+        for gram in record_grams:
+            grams.setdefault(gram, []).append(record_id)
+
+        name, roll, email = record_fields
+        record_terms = set(name.split())
+        record_terms.update(t for t in (name, roll, email.split('@')[0]) if t)
+        for term in record_terms:
+            terms.setdefault(term, []).append(record_id)
+
+    sorted_terms = sorted(terms)
+    return {
+        'version': SEARCH_INDEX_VERSION,
+        'count': len(students),
+        'fields': fields,
+        'trigrams': {gram: _encode(ids) for gram, ids in sorted(grams.items())},
+        'terms': sorted_terms,
+        'termIds': [_encode(terms[t]) for t in sorted_terms],
+    }
+
+
+def write_search_index(students: list, path: Path = SEARCH_INDEX_FILE) -> dict:
+    """Build the search index and write it as compact JSON"""
+    index = build_search_index(students)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'), ensure_ascii=False)
+    return index
+
+
+def load_search_index(path: Path = SEARCH_INDEX_FILE) -> dict:
+    """Load a search index and decode its posting lists"""
+    with open(path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    index['trigrams'] = {gram: _decode(gaps) for gram, gaps in index['trigrams'].items()}
+    index['termIds'] = [_decode(gaps) for gaps in index['termIds']]
+    return index
+
+
+def search(index: dict, query: str) -> list:
+    """
+    Record ids whose name, roll or email contains query (case-insensitive).
+    Same results as the substring check in filterStudents.
+    """
+    query = query.lower().strip()
+    fields = index['fields']
+    if not query:
+        return list(range(index['count']))
+
+    if len(query) < 3:
+        candidates = range(index['count'])
+    else:
+        postings = []
+        for gram in trigrams(query):
+            ids = index['trigrams'].get(gram)
+            if not ids:
+                return []
+            postings.append(ids)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates.intersection_update(ids)
+            if not candidates:
+                return []
+        candidates = sorted(candidates)
+
+    return [i for i in candidates if any(query in text for text in fields[i])]
+
+
+def complete(index: dict, prefix: str, limit: int = 10) -> list:
+    """Up to `limit` (term, record ids) pairs for terms starting with prefix"""
+    prefix = prefix.lower().strip()
+    terms = index['terms']
+    start = bisect.bisect_left(terms, prefix)
+    results = []
+    for pos in range(start, len(terms)):
+        if not terms[pos].startswith(prefix) or len(results) >= limit:
+            break
+        results.append((terms[pos], index['termIds'][pos]))
+    return results
+
+
+def _scan(index: dict, query: str) -> list:
+    """Reference full scan, as filterStudents does it"""
+    query = query.lower().strip()
+    return [i for i, texts in enumerate(index['fields']) if any(query in t for t in texts)]
+
+
+def benchmark(index: dict, queries: list):
+    """Time index lookups against a full scan and check they agree"""
+    start = time.perf_counter()
+    scanned = [_scan(index, q) for q in queries]
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [search(index, q) for q in queries]
+    index_time = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(scanned, indexed) if a != b)
+    print(f'{len(queries)} queries over {index["count"]} students')
+    print(f'Full scan: {scan_time * 1000:.1f} ms ({scan_time / len(queries) * 1e6:.0f} us/query)')
+    print(f'Index:     {index_time * 1000:.1f} ms ({index_time / len(queries) * 1e6:.0f} us/query)')
+    print(f'Mismatches: {mismatches}')
+
+
+def _sample_queries(index: dict) -> list:
+    """Keystroke-by-keystroke queries typed from a sample of names and rolls"""
+    queries = []
+    for texts in index['fields'][::max(1, index['count'] // 200)]:
+        for text in texts[:2]:
+            queries.extend(text[:n] for n in range(1, min(len(text), 8) + 1))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the static search index')
+    parser.add_argument('--students', type=Path, default=STUDENTS_FILE, help='students.json to index')
+    parser.add_argument('--out', type=Path, default=SEARCH_INDEX_FILE, help='search index to write/read')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--query', help='substring search an existing index')
+    group.add_argument('--prefix', help='autocomplete a prefix against an existing index')
+    group.add_argument('--benchmark', action='store_true', help='compare index lookups with a full scan')
+    args = parser.parse_args()
+
+    if args.query is None and args.prefix is None and not args.benchmark:
+        with open(args.students, 'r', encoding='utf-8') as f:
+            students = json.load(f)
+        index = write_search_index(students, args.out)
+        print(f'Wrote search index for {index["count"]} students to {args.out} '
+              f'({len(index["trigrams"])} trigrams, {len(index["terms"])} terms)')
+        return
+
+    index = load_search_index(args.out)
+
+    if args.benchmark:
+        benchmark(index, _sample_queries(index))
+    elif args.query is not None:
+        ids = search(index, args.query)
+        print(f'{len(ids)} matching students')
+        for record_id in ids[:20]:
+            name, roll, email = index['fields'][record_id]
+            print(f'  - {roll}: {name} {email}')
+        if len(ids) > 20:
+            print(f'  ... and {len(ids) - 20} more')
+    else:
+        for term, ids in complete(index, args.prefix):
+            print(f'  {term} ({len(ids)})')
+
+
+if __name__ == '__main__':
+    main()
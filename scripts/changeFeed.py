@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Append-only JSONL feed of per-student changes made by the population script
+
+Usage:
+    python scripts/changeFeed.py [--roll ROLL] [--run RUN_ID] [--field FIELD] [--tail N]
+
+Every run of populateHometownState.py that writes students.json appends one
+line per student whose hometown or homestate changed:
+
+    {"run": "20261019T101500Z-3fa2c1", "ts": "2026-10-19T10:15:07Z",
+     "roll": "230001", "changes": {"homestate": {"old": "", "new": "Bihar"}},
+     "method": "nominatim", "confidence": 0.7}
+
+"method"/"confidence" are the resolution of the new homestate. Missing and
+empty values count as the same (no change). Lines are only ever appended, so
+the feed can be tailed or shipped incrementally; this command filters it.
+"""
+
+import argparse
+import json
+import os
+import secrets
+import time
+from collections import deque
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+CHANGE_FEED_FILE = SCRIPT_DIR / "homestate_changes.jsonl"
+
+FEED_FIELDS = ('hometown', 'homestate')
+
+
+def new_run_id() -> str:
+    return time.strftime('%Y%m%dT%H%M%SZ', time.gmtime()) + '-' + secrets.token_hex(3)
+
+
+def snapshot(records: list) -> list:
+    """Values of FEED_FIELDS per record, taken before the pipeline changes them"""
+    return [tuple(getattr(record, field) for field in FEED_FIELDS) for record in records]
+
+
+def record_changes(records: list, before: list, run_id: str):
+    """Feed entries for records whose FEED_FIELDS differ from the snapshot"""
+    ts = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    for record, old_values in zip(records, before):
+        changes = {}
+        for field, old in zip(FEED_FIELDS, old_values):
+            new = getattr(record, field)
+            if (old or '') != (new or ''):
+                changes[field] = {'old': old or '', 'new': new or ''}
+        if changes:
+            yield {
+                'run': run_id,
+                'ts': ts,
+                'roll': record.roll,
+                'changes': changes,
+                'method': record.homestate_method,
+                'confidence': record.homestate_confidence,
+            }
+
+
+def _trim_torn_tail(path: Path):
+    """Cut an unterminated last line (an interrupted append) back to the last newline"""
+    try:
+        f = open(path, 'r+b')
+    except FileNotFoundError:
+        return
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b'\n':
+            return
+        pos = end
+        while pos > 0:
+            start = max(0, pos - 4096)
+            f.seek(start)
+            newline = f.read(pos - start).rfind(b'\n')
+            if newline >= 0:
+                f.truncate(start + newline + 1)
+                return
+            pos = start
+        f.truncate(0)
+
+
+def append_changes(entries, path: Path = CHANGE_FEED_FILE) -> int:
+    """
+    Append entries as JSON lines and fsync; returns how many were written.
+    A torn last line left by an interrupted run is dropped first, so the new
+    entries start on a line of their own.
+    """
+    _trim_torn_tail(path)
+    count = 0
+    with open(path, 'a', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            count += 1
+        f.flush()
+        os.fsync(f.fileno())
+    return count
+
+
+def read_changes(path: Path = CHANGE_FEED_FILE):
+    """Stream feed entries (skipping a torn last line from an interrupted write)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show entries from the homestate change feed')
+    parser.add_argument('--feed', type=Path, default=CHANGE_FEED_FILE, help='feed file')
+    parser.add_argument('--roll', help='only this roll number')
+    parser.add_argument('--run', help='only this run id')
+    parser.add_argument('--field', choices=FEED_FIELDS, help='only changes to this field')
+    parser.add_argument('--tail', type=int, help='only the last N matching entries')
+    args = parser.parse_args()
+
+    if not args.feed.exists():
+        print(f'No change feed at {args.feed}')
+        return
+
+    matches = (
+        entry for entry in read_changes(args.feed)
+        if (not args.roll or entry.get('roll') == args.roll)
+        and (not args.run or entry.get('run') == args.run)
+        and (not args.field or args.field in entry.get('changes', {}))
+    )
+    if args.tail:
+        matches = deque(matches, maxlen=args.tail)
+    for entry in matches:
+        print(json.dumps(entry, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Performance regression gate for the offline pipeline benchmarks
+
+Usage:
+    python scripts/checkPerfRegression.py [--threshold 0.15] [--baseline PATH]
+    python scripts/checkPerfRegression.py --update-baseline
+
+Runs the offline benchmark corpus (benchmarkResolver.py: per-student and
+batch resolution; benchmarkRecords.py: record loading/enrichment) and
+compares throughput with a stored baseline. Exits with status 1 when any
+metric is more than --threshold (a fraction) slower than the baseline, and
+when the batch and per-student resolvers stop agreeing. Exits with status 2
+when there is no usable baseline.
+
+The corpus is drawn from the place mappings and the keys of
+city_state_cache.json, so a mapping edit, a geocoding run or a cache merge
+changes the workload even with the same size and seed. The baseline stores a
+hash of the generated corpus, and the gate refuses to compare (status 2) when
+the current corpus hashes differently; re-record the baseline then.
+
+Throughput depends on the machine, so the baseline is local and not
+committed (scripts/perf_baseline.json is in .gitignore). Record it on the
+machine that runs the gate, from a known-good checkout:
+
+    git stash  # or check out the commit to compare against
+    python scripts/checkPerfRegression.py --update-baseline
+    git stash pop
+    python scripts/checkPerfRegression.py
+
+A fresh checkout has no baseline, so the gate exits with status 2 instead of
+passing until one is recorded.
+Every measurement is the best of --repeat runs to keep noise down.
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+import benchmarkRecords
+import benchmarkResolver
+
+SCRIPT_DIR = Path(__file__).parent
+BASELINE_FILE = SCRIPT_DIR / "perf_baseline.json"
+
+# Corpus shape; a baseline only compares against runs of the same corpus
+CORPUS = {'students': 20000, 'distinct': 400, 'seed': 42}
+
+
+def _best_records_time(roster_json: str, hometowns_json: str, repeat: int) -> float:
+    results = benchmarkRecords.resolver.resolve_many_detailed(json.loads(hometowns_json))
+    best = float('inf')
+    for _ in range(repeat):
+        # Start each run from the same heap, or the cyclic GC (which this
+        # allocation-heavy step triggers) adds run-to-run noise
+        gc.collect()
+        start = time.perf_counter()
+        benchmarkRecords.enrich_records(roster_json, hometowns_json, results)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(repeat: int = 5) -> dict:
+    """Throughput metrics in students per second, plus the agreement check"""
+    corpus = benchmarkResolver.build_corpus(CORPUS['students'], CORPUS['distinct'], CORPUS['seed'])
+    roster_json, hometowns_json = benchmarkRecords.build_roster(CORPUS['students'], CORPUS['seed'])
+    resolver = benchmarkResolver.run_benchmarks(corpus, repeat)
+    n = CORPUS['students']
+    return {
+        'metrics': {
+            'resolve_per_student': n / resolver['per_student'],
+            'resolve_many': n / resolver['resolve_many'],
+            'enrich_records': n / _best_records_time(roster_json, hometowns_json, repeat),
+        },
+        'identical': resolver['identical'],
+        'corpus_sha256': corpus_digest(corpus, roster_json, hometowns_json),
+    }
+
+
+def corpus_digest(corpus: list, roster_json: str, hometowns_json: str) -> str:
+    """Hash of the generated workload, which depends on the cache and mappings"""
+    digest = hashlib.sha256()
+    for part in (json.dumps(corpus, ensure_ascii=False), roster_json, hometowns_json):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """(metric, baseline, current, change, regressed) rows"""
+    rows = []
+    for name, value in current['metrics'].items():
+        base = baseline['metrics'].get(name)
+        if not base:
+            rows.append((name, None, value, None, False))
+            continue
+        change = value / base - 1
+        rows.append((name, base, value, change, change < -threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fail when offline benchmark throughput regresses')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE, help='stored baseline')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='allowed slowdown as a fraction of the baseline (default %(default)s)')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement (best is kept)')
+    parser.add_argument('--update-baseline', action='store_true', help='record this run as the baseline')
+    args = parser.parse_args()
+
+    current = measure(args.repeat)
+    current.update({'corpus': CORPUS, 'python': platform.python_version(), 'machine': platform.machine()})
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+            f.write('\n')
+        for name, value in current['metrics'].items():
+            print(f'  {name:<22} {value:12.0f} students/s')
+        print(f'Wrote baseline to {args.baseline}')
+        return
+
+    if not args.baseline.exists():
+        print(f'No baseline at {args.baseline}; record one with --update-baseline')
+        sys.exit(2)
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('corpus') != CORPUS:
+        print(f'Baseline was recorded for corpus {baseline.get("corpus")}, not {CORPUS}; re-record it')
+        sys.exit(2)
+    if baseline.get('corpus_sha256') != current['corpus_sha256']:
+        print('The benchmark corpus changed since the baseline was recorded (city_state_cache.json '
+              'or the place mappings were updated), so throughput is not comparable; re-record it '
+              'with --update-baseline from a known-good checkout')
+        sys.exit(2)
+
+    rows = compare(baseline, current, args.threshold)
+    print(f'{"metric":<22} {"baseline":>12} {"current":>12} {"change":>8}  (students/s)')
+    for name, base, value, change, regressed in rows:
+        base_text = f'{base:12.0f}' if base else f'{"-":>12}'
+        change_text = f'{change:+7.1%}' if change is not None else f'{"new":>7}'
+        print(f'{name:<22} {base_text} {value:12.0f} {change_text}{"  REGRESSED" if regressed else ""}')
+
+    failures = [row[0] for row in rows if row[4]]
+    if not current['identical']:
+        failures.append('identical')
+        print('resolve_many and per-student resolution disagree')
+    if failures:
+        print(f'FAIL: {", ".join(failures)} (threshold {args.threshold:.0%})')
+        sys.exit(1)
+    print(f'OK (threshold {args.threshold:.0%})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Record-level diff between two versions of students.json
+
+Usage:
+    python scripts/diffStudents.py OLD NEW [--ignore FIELD ...] [--summary] [--json]
+
+    --ignore   leave this field out of the comparison (repeatable), e.g.
+               --ignore homestate_confidence
+    --summary  only print the counts
+    --json     print one JSON object per difference instead of text:
+               {"roll", "status": added|removed|changed, "record"} or, for
+               changed records, {"roll", "status", "fields": {f: {"old", "new"}}}
+               (a field absent on one side has no "old"/"new")
+
+Records are keyed by roll number; a roll listed more than once is keyed
+"roll#2", "roll#3", ... by its position among the records with that roll.
+Each record is reduced to a 64-bit hash of its canonical JSON, so formatting
+and key order don't matter and equal records are never compared field by
+field.
+
+Both files are streamed (jsonStream.py) in three
+passes: the old file into a roll -> hash index, the new file against it,
+and the old file again for the old side of removed and changed records. Only
+the index and the records that differ are kept in memory.
+
+Exits with status 1 when the files differ, like diff(1).
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+from jsonStream import iter_array
+
+
+def iter_students(path: Path):
+    """Yield the records of a students.json array, holding about one chunk in memory"""
+    for i, student in enumerate(iter_array(path)):
+        if not isinstance(student, dict):
+            raise ValueError(f'{path}: element {i} is not a student record ({type(student).__name__})')
+        yield student
+
+
+def keyed(students):
+    """(key, record) with the roll as key, "roll#n" for the nth listing of a roll"""
+    seen = {}
+    for student in students:
+        roll = str(student.get('roll') or '')
+        n = seen.get(roll, 0) + 1
+        seen[roll] = n
+        yield (f'{roll}#{n}' if n > 1 else roll), student
+
+
+def content_hash(student: dict, ignore=frozenset()) -> bytes:
+    if ignore:
+        student = {k: v for k, v in student.items() if k not in ignore}
+    text = json.dumps(student, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+
+
+def field_changes(old: dict, new: dict, ignore=frozenset()) -> dict:
+    """field -> {'old': ..., 'new': ...} for the fields that differ"""
+    changes = {}
+    for field in sorted(old.keys() | new.keys()):
+        if field in ignore or (old.get(field) == new.get(field) and (field in old) == (field in new)):
+            continue
+        change = {}
+        if field in old:
+            change['old'] = old[field]
+        if field in new:
+            change['new'] = new[field]
+        changes[field] = change
+    return changes
+
+
+def diff_students(old_path: Path, new_path: Path, ignore=frozenset()) -> dict:
+    """
+    Compare two students.json files; returns counts and the differing records:
+    {'old_count', 'new_count', 'unchanged', 'added': {key: record},
+     'removed': {key: record}, 'changed': {key: (old, new)}}
+    """
+    index = {key: content_hash(student, ignore) for key, student in keyed(iter_students(old_path))}
+    old_count = len(index)
+
+    added, changed_new = {}, {}
+    new_count = 0
+    for key, student in keyed(iter_students(new_path)):
+        new_count += 1
+        old_hash = index.pop(key, None)
+        if old_hash is None:
+            added[key] = student
+        elif old_hash != content_hash(student, ignore):
+            changed_new[key] = student
+    wanted = set(index) | set(changed_new)  # what's left in the index was removed
+    del index
+
+    removed, changed = {}, {}
+    if wanted:
+        for key, student in keyed(iter_students(old_path)):
+            if key in changed_new:
+                changed[key] = (student, changed_new[key])
+            elif key in wanted:
+                removed[key] = student
+
+    return {
+        'old_count': old_count,
+        'new_count': new_count,
+        'unchanged': new_count - len(added) - len(changed),
+        'added': added,
+        'removed': removed,
+        'changed': changed,
+    }
+
+
+def _value(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def print_diff(result: dict, ignore=frozenset()):
+    for key in sorted(result['removed']):
+        print(f"- {key:<12} {result['removed'][key].get('name', '')}")
+    for key in sorted(result['added']):
+        print(f"+ {key:<12} {result['added'][key].get('name', '')}")
+    for key in sorted(result['changed']):
+        old, new = result['changed'][key]
+        print(f"~ {key:<12} {new.get('name', '')}")
+        for field, change in field_changes(old, new, ignore).items():
+            print(f"    {field}: {_value(change['old']) if 'old' in change else '(absent)'}"
+                  f" -> {_value(change['new']) if 'new' in change else '(absent)'}")
+
+
+def print_json(result: dict, ignore=frozenset()):
+    for status in ('removed', 'added'):
+        for key in sorted(result[status]):
+            print(json.dumps({'roll': key, 'status': status, 'record': result[status][key]},
+                             ensure_ascii=False))
+    for key in sorted(result['changed']):
+        old, new = result['changed'][key]
+        print(json.dumps({'roll': key, 'status': 'changed', 'fields': field_changes(old, new, ignore)},
+                         ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Diff two versions of students.json record by record')
+    parser.add_argument('old', type=Path, help='old students.json')
+    parser.add_argument('new', type=Path, help='new students.json')
+    parser.add_argument('--ignore', action='append', default=[], metavar='FIELD',
+                        help='field to leave out of the comparison (repeatable)')
+    parser.add_argument('--summary', action='store_true', help='only print the counts')
+    parser.add_argument('--json', action='store_true', help='one JSON object per difference')
+    args = parser.parse_args()
+
+    missing = [path for path in (args.old, args.new) if not path.exists()]
+    if missing:
+        print(f'Error: {", ".join(map(str, missing))} not found')
+        sys.exit(2)
+
+    ignore = frozenset(args.ignore)
+    try:
+        result = diff_students(args.old, args.new, ignore)
+    except ValueError as e:
+        print(f'Error reading students.json: {e}')
+        sys.exit(2)
+
+    if args.json:
+        print_json(result, ignore)
+    else:
+        if not args.summary:
+            print_diff(result, ignore)
+        print(f"{result['old_count']} -> {result['new_count']} records: "
+              f"{len(result['added'])} added, {len(result['removed'])} removed, "
+              f"{len(result['changed'])} changed, {result['unchanged']} unchanged")
+    if result['added'] or result['removed'] or result['changed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
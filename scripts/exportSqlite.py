@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Export the enriched directory into an indexed SQLite database
+
+Usage:
+    python scripts/exportSqlite.py [--students PATH] [--out PATH]
+    python scripts/exportSqlite.py --sql "SELECT homestate, batch_year, COUNT(*) FROM students GROUP BY 1, 2"
+
+Writes scripts/directory.db with:
+- students: one row per record (plus derived batch_year), indexed on the
+  columns ad-hoc questions group or filter by, including the resolution
+  method/confidence of homestate
+- family_edges: (parent_roll, child_roll) pairs from familytree.json
+- geocode_cache: the city -> state answers the resolver has cached, with
+  their kind (positive/negative), source and timestamp
+- students_fts: FTS5 full-text table over name and hometown
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from studentUtils import clean_name, extract_batch_year
+
+SCRIPT_DIR = Path(__file__).parent
+STUDENTS_FILE = SCRIPT_DIR.parent / "public" / "students.json"
+FAMILY_TREE_FILE = SCRIPT_DIR.parent / "public" / "familytree.json"
+CACHE_FILE = SCRIPT_DIR / "city_state_cache.json"
+DATABASE_FILE = SCRIPT_DIR / "directory.db"
+
+STUDENT_COLUMNS = [
+    'roll', 'name', 'dept', 'program', 'hall', 'room', 'gender',
+    'blood_group', 'username', 'hometown', 'homestate', 'homestate_method',
+]
+
+SCHEMA = f"""
+CREATE TABLE students (
+    id INTEGER PRIMARY KEY,
+    {', '.join(f'{c} TEXT' for c in STUDENT_COLUMNS)},
+    homestate_confidence REAL,
+    batch_year INTEGER
+);
+CREATE INDEX idx_students_roll ON students(roll);
+CREATE INDEX idx_students_state_batch ON students(homestate, batch_year);
+CREATE INDEX idx_students_dept ON students(dept, homestate);
+CREATE INDEX idx_students_program ON students(program);
+CREATE INDEX idx_students_hall ON students(hall);
+CREATE INDEX idx_students_hometown ON students(hometown);
+CREATE INDEX idx_students_confidence ON students(homestate_confidence);
+
+CREATE TABLE family_edges (
+    parent_roll TEXT NOT NULL,
+    child_roll TEXT NOT NULL
+);
+CREATE INDEX idx_family_parent ON family_edges(parent_roll);
+CREATE INDEX idx_family_child ON family_edges(child_roll);
+
+CREATE TABLE geocode_cache (
+    key TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    kind TEXT,
+    source TEXT,
+    ts INTEGER
+);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE students_fts USING fts5(
+    name, hometown, content='students', content_rowid='id'
+);
+INSERT INTO students_fts(rowid, name, hometown) SELECT id, name, hometown FROM students;
+"""
+
+
+def parse_family_tree_node(name: str):
+    """Split "Name-ROLL" into (name, roll), same as parseFamilyTreeNode"""
+    if not name or name == 'all':
+        return None
+    head, sep, roll = name.rpartition('-')
+    if not sep:
+        return name, None
+    return head.strip(), roll.strip()
+
+
+def family_edges(tree: dict) -> list:
+    """(parent_roll, child_roll) pairs from the nested family tree"""
+    edges = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if not node or not node.get('name'):
+            continue
+        parsed = parse_family_tree_node(node['name'])
+        parent_roll = parsed[1] if parsed else None
+        for child in node.get('children') or []:
+            child_parsed = parse_family_tree_node(child.get('name'))
+            if parent_roll and child_parsed and child_parsed[1]:
+                edges.append((parent_roll, child_parsed[1]))
+            stack.append(child)
+    return edges
+
+
+def _student_row(record_id: int, student: dict) -> tuple:
+    values = [student.get(c) or None for c in STUDENT_COLUMNS]
+    values[STUDENT_COLUMNS.index('name')] = clean_name(student.get('name')) or None
+    return (record_id, *values, student.get('homestate_confidence'), extract_batch_year(student.get('roll')))
+
+
+def _cache_row(key: str, value) -> tuple:
+    # Legacy caches store bare state strings
+    if isinstance(value, str):
+        return (key, value, 'positive' if value else 'negative', 'legacy', 0)
+    return (key, value.get('state', ''), value.get('kind'), value.get('source'), value.get('ts'))
+
+
+def write_sqlite_export(students: list, path: Path = DATABASE_FILE,
+                        family_tree_file: Path = FAMILY_TREE_FILE,
+                        cache_file: Path = CACHE_FILE) -> dict:
+    """Write the SQLite export, replacing any previous database atomically"""
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    edges = []
+    if family_tree_file.exists():
+        with open(family_tree_file, 'r', encoding='utf-8') as f:
+            edges = family_edges(json.load(f))
+
+    cache = {}
+    if cache_file.exists():
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        placeholders = ', '.join('?' * (len(STUDENT_COLUMNS) + 3))
+        conn.executemany(f'INSERT INTO students VALUES ({placeholders})',
+                         (_student_row(i, s) for i, s in enumerate(students)))
+        conn.executemany('INSERT INTO family_edges VALUES (?, ?)', edges)
+        conn.executemany('INSERT INTO geocode_cache VALUES (?, ?, ?, ?, ?)',
+                         (_cache_row(k, v) for k, v in cache.items()))
+        try:
+            conn.executescript(FTS_SCHEMA)
+            fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: keep the rest of the export
+            fts = False
+        conn.commit()
+        conn.execute('ANALYZE')
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    return {'students': len(students), 'edges': len(edges), 'cache': len(cache), 'fts': fts}
+
+
+def run_query(path: Path, sql: str):
+    """Run an ad-hoc query against the export and print the rows"""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        start = time.perf_counter()
+        cursor = conn.execute(sql)
+        rows = cursor.fetchall()
+        elapsed = time.perf_counter() - start
+        if cursor.description:
+            print(' | '.join(col[0] for col in cursor.description))
+        for row in rows:
+            print(' | '.join('' if v is None else str(v) for v in row))
+        print(f'({len(rows)} rows in {elapsed * 1000:.1f} ms)')
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export students.json to SQLite or query the export')
+    parser.add_argument('--students', type=Path, default=STUDENTS_FILE, help='students.json to export')
+    parser.add_argument('--out', type=Path, default=DATABASE_FILE, help='database to write/query')
+    parser.add_argument('--sql', help='run a query against an existing export instead of building')
+    args = parser.parse_args()
+
+    if args.sql:
+        try:
+            run_query(args.out, args.sql)
+        except sqlite3.Error as e:
+            print(f'Error: {e}')
+            sys.exit(1)
+        return
+
+    with open(args.students, 'r', encoding='utf-8') as f:
+        students = json.load(f)
+    stats = write_sqlite_export(students, args.out)
+    print(f'Wrote {stats["students"]} students, {stats["edges"]} family edges and '
+          f'{stats["cache"]} cache entries to {args.out}')
+    if not stats['fts']:
+        print('Warning: SQLite has no FTS5 support, students_fts was not created')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Priority order and time budget for the OA hometown fetches (Phase 1)
+
+Students are fetched most valuable first:
+1. no hometown yet (never fetched, or the OA had none last time)
+2. newest batch (batch year from the roll, same rules as extractBatchYear;
+   rolls without a recognisable year come last)
+3. least recently fetched (never fetched counts as oldest)
+
+The population script and the watcher keep the time of each student's last
+fetch in scripts/oa_fetch_times.json (roll -> unix time), so repeated
+time-limited runs work through the directory instead of refetching the same
+students.
+
+The queue is a heap, so a run that stops early only pays for the entries it
+popped. With a time budget no fetch starts after the deadline; fetches in
+flight finish, and the students that weren't reached keep their stored
+hometown and homestate.
+"""
+
+import heapq
+import json
+import os
+import time
+from pathlib import Path
+
+from studentUtils import extract_batch_year
+
+SCRIPT_DIR = Path(__file__).parent
+FETCH_TIMES_FILE = SCRIPT_DIR / "oa_fetch_times.json"
+
+
+def load_fetch_times() -> dict:
+    try:
+        with open(FETCH_TIMES_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f'Warning: could not read {FETCH_TIMES_FILE.name} ({e}); treating every student as never fetched')
+        return {}
+
+
+def save_fetch_times(times: dict):
+    tmp_path = FETCH_TIMES_FILE.with_name(FETCH_TIMES_FILE.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(times, f, separators=(',', ':'))
+    os.replace(tmp_path, FETCH_TIMES_FILE)
+
+
+def fetch_priority(record, fetched_at: dict) -> tuple:
+    """Sort key of a record's fetch; the smallest is fetched first"""
+    year = extract_batch_year(record.roll)
+    return (1 if record.hometown else 0, -(year or 0), fetched_at.get(record.roll, 0.0))
+
+
+class FetchScheduler:
+    """
+    Indices of the records to fetch (those with a roll), in priority order,
+    until the queue is empty or the time budget (seconds) has run out.
+    """
+
+    def __init__(self, records: list, fetched_at: dict, time_budget: float = None):
+        self.heap = [(fetch_priority(record, fetched_at), i)
+                     for i, record in enumerate(records) if record.roll]
+        heapq.heapify(self.heap)
+        self.total = len(self.heap)
+        self.deadline = time.monotonic() + time_budget if time_budget is not None else None
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def next(self):
+        """Index of the next record to fetch, None when done or out of time"""
+        if not self.heap or self.expired():
+            return None
+        return heapq.heappop(self.heap)[1]
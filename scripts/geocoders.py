@@ -0,0 +1,185 @@
+"""
+Nominatim-compatible geocoder endpoints with per-endpoint request policies
+
+Endpoints are configured in scripts/geocoders.json (not committed; see
+geocoders.example.json). Without it the public OpenStreetMap instance is
+used under its usage policy: one request per second, one at a time.
+
+    {
+      "hedge_after": 2.0,
+      "endpoints": [
+        {"name": "local", "url": "http://127.0.0.1:8080/search",
+         "delay": 0, "concurrency": 8, "timeout": 5},
+        {"name": "public", "url": "https://nominatim.openstreetmap.org/search",
+         "delay": 1.0, "concurrency": 1, "timeout": 10}
+      ]
+    }
+
+Per endpoint: `delay` is the minimum spacing between request starts,
+`concurrency` the number of requests in flight, `timeout` the socket timeout
+and `user_agent` the User-Agent header. Endpoints are tried in order; the
+next one is used only when a request fails (network error, timeout, HTTP
+error, truncated response), not when it finds nothing. With `hedge_after`
+set, a request still unanswered after that many seconds is also sent to the
+next endpoint and the first answer wins.
+"""
+
+import http.client
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+DEFAULT_USER_AGENT = 'IITK-Student-Directory/1.0 (Educational Purpose)'
+PUBLIC_NOMINATIM = {
+    'name': 'public',
+    'url': 'https://nominatim.openstreetmap.org/search',
+    'delay': 1.0,  # Nominatim usage policy: at most 1 request per second
+    'concurrency': 1,
+    'timeout': 10,
+}
+
+
+class GeocoderError(Exception):
+    """A request failed (as opposed to finding nothing)"""
+
+
+class GeocoderEndpoint:
+    def __init__(self, name: str, url: str, delay: float = 1.0, concurrency: int = 1,
+                 timeout: float = 10, user_agent: str = DEFAULT_USER_AGENT):
+        self.name = name
+        self.url = url
+        self.delay = delay
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._rate_lock = threading.Lock()
+        self._next_start = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.elapsed = 0.0
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'GeocoderEndpoint':
+        unknown = set(config) - {'name', 'url', 'delay', 'concurrency', 'timeout', 'user_agent'}
+        if unknown or 'url' not in config:
+            raise ValueError(f'bad geocoder endpoint {config!r}')
+        return cls(**{'name': config['url'], **config})
+
+    def _wait_for_turn(self):
+        # Reserve the next start time under the lock, sleep outside it
+        with self._rate_lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+
+    def search(self, query: str) -> str:
+        """Raw state name of the first Indian match ('' when none); GeocoderError on failure"""
+        params = urllib.parse.urlencode({
+            'q': query, 'format': 'json', 'addressdetails': 1, 'limit': 1, 'countrycodes': 'in',
+        })
+        req = urllib.request.Request(
+            f'{self.url}?{params}',
+            headers={'User-Agent': self.user_agent, 'Accept': 'application/json'},
+        )
+        with self._slots:
+            self._wait_for_turn()
+            start = time.perf_counter()
+            self.requests += 1
+            try:
+                with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                    data = json.loads(response.read().decode('utf-8'))
+            except (urllib.error.URLError, http.client.HTTPException, OSError, ValueError) as e:
+                self.errors += 1
+                raise GeocoderError(f'{self.name}: {e}') from e
+            finally:
+                self.elapsed += time.perf_counter() - start
+
+        if not data:
+            return ''
+        address = data[0].get('address', {})
+        # Try to get state from different fields
+        return address.get('state') or address.get('state_district') or address.get('region') or ''
+
+
+class GeocoderPool:
+    def __init__(self, endpoints: list, hedge_after: float = None):
+        if not endpoints:
+            raise ValueError('at least one geocoder endpoint is required')
+        self.endpoints = endpoints
+        self.hedge_after = hedge_after
+        self.hedges = 0
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def parallelism(self) -> int:
+        """Concurrent lookups worth issuing: the first endpoint's concurrency"""
+        return self.endpoints[0].concurrency
+
+    def _submit(self, endpoint: GeocoderEndpoint, query: str):
+        with self._executor_lock:
+            if self._executor is None:
+                workers = sum(e.concurrency for e in self.endpoints) + 1
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='geocoder')
+        return self._executor.submit(endpoint.search, query)
+
+    def _hedged(self, query: str) -> str:
+        primary = self._submit(self.endpoints[0], query)
+        done, _ = wait({primary}, timeout=self.hedge_after)
+        if done:
+            try:
+                return primary.result()
+            except GeocoderError as e:
+                return self._in_order(query, self.endpoints[1:], [e])
+
+        # Slow: race it against the next endpoint, first answer wins
+        self.hedges += 1
+        pending = {primary, self._submit(self.endpoints[1], query)}
+        errors = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except GeocoderError as e:
+                    errors.append(e)
+        return self._in_order(query, self.endpoints[2:], errors)
+
+    def _in_order(self, query: str, endpoints: list, errors: list) -> str:
+        for endpoint in endpoints:
+            try:
+                return endpoint.search(query)
+            except GeocoderError as e:
+                errors.append(e)
+        raise GeocoderError('; '.join(str(e) for e in errors) or 'no endpoint answered')
+
+    def lookup(self, query: str) -> str:
+        """Raw state for query from the first endpoint that answers; GeocoderError if none does"""
+        if self.hedge_after is not None and len(self.endpoints) > 1:
+            return self._hedged(query)
+        return self._in_order(query, self.endpoints, [])
+
+    def stats(self) -> list:
+        return [{
+            'endpoint': e.name,
+            'requests': e.requests,
+            'errors': e.errors,
+            'mean_ms': e.elapsed / e.requests * 1000 if e.requests else 0.0,
+        } for e in self.endpoints]
+
+
+def load_geocoders(path: Path = None) -> GeocoderPool:
+    """Pool from a geocoders.json config, or the public instance when there is none"""
+    if path is None or not Path(path).exists():
+        return GeocoderPool([GeocoderEndpoint.from_config(PUBLIC_NOMINATIM)])
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    endpoints = [GeocoderEndpoint.from_config(e) for e in config.get('endpoints', [])]
+    return GeocoderPool(endpoints, config.get('hedge_after'))
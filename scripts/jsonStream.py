@@ -0,0 +1,90 @@
+"""
+Incremental reader for large top-level JSON objects and arrays.
+
+The file is read CHUNK_SIZE characters at a time and each member is decoded
+with JSONDecoder.raw_decode as soon as it is complete, so memory stays at
+about one chunk plus the member being decoded, whatever the file size. Used
+by mergeGeocodeCache.py (cache objects) and diffStudents.py (students.json).
+"""
+
+import json
+from pathlib import Path
+
+CHUNK_SIZE = 1 << 20  # characters read at a time
+
+_WHITESPACE = ' \t\r\n'
+
+
+def next_char(f, buf: str, pos: int):
+    """Next non-whitespace character as (char, buf, pos after it)"""
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos < len(buf):
+            return buf[pos], buf, pos + 1
+        buf, pos = f.read(CHUNK_SIZE), 0
+        if not buf:
+            raise ValueError('unexpected end of file')
+
+
+def next_value(f, decoder, buf: str, pos: int):
+    """Next JSON value as (value, buf, pos after it), reading more as needed"""
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+            return value, buf, end
+        except json.JSONDecodeError:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                raise
+            buf, pos = buf[pos:] + chunk, 0
+
+
+def iter_object(path: Path):
+    """Yield (key, value) from a file holding one JSON object"""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        char, buf, pos = next_char(f, '', 0)
+        if char != '{':
+            raise ValueError(f'{path}: not a JSON object')
+        char, buf, pos = next_char(f, buf, pos)
+        if char == '}':
+            return
+        pos -= 1
+        while True:
+            key, buf, pos = next_value(f, decoder, buf, pos)
+            char, buf, pos = next_char(f, buf, pos)
+            if not isinstance(key, str) or char != ':':
+                raise ValueError(f'{path}: malformed entry near {key!r}')
+            value, buf, pos = next_value(f, decoder, buf, pos)
+            yield key, value
+            char, buf, pos = next_char(f, buf, pos)
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f'{path}: expected "," after {key!r}')
+
+
+def iter_array(path: Path):
+    """Yield the elements of a file holding one JSON array"""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        char, buf, pos = next_char(f, '', 0)
+        if char != '[':
+            raise ValueError(f'{path}: not a JSON array')
+        char, buf, pos = next_char(f, buf, pos)
+        if char == ']':
+            return
+        pos -= 1
+        index = 0
+        while True:
+            value, buf, pos = next_value(f, decoder, buf, pos)
+            yield value
+            char, buf, pos = next_char(f, buf, pos)
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f'{path}: expected "," after element {index}')
+            index += 1
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Load test the hometown pipeline against the local OA/Nominatim stand-ins
+
+Usage:
+    python scripts/loadTest.py [--limit N] [--workers N] [--api-delay S]
+                               [--nominatim-workers N] [--timeout S]
+                               [--students PATH] [--latency SPEC]
+                               [--error-rate R] [--reset-rate R] [--truncate-rate R]
+
+Starts stubServers.py in-process with the given latency/fault profile, points
+the population script at it and runs its Phase 1 (OA fetch + offline
+resolution) and Phase 2 (Nominatim) on N rolls, in memory: students.json,
+the geocode cache and the derived artifacts are not touched.
+
+Reports throughput and p50/p90/p99/max request latency per phase, how many
+hometowns were lost (the fixture has one, the pipeline got nothing, e.g.
+because a failed request is swallowed) and what the stub actually served.
+Phase 1 keeps the script's API_DELAY pause per response unless --api-delay
+overrides it; that pause, not the stub, usually bounds its throughput.
+
+Example, a slow and flaky OA:
+    python scripts/loadTest.py --latency lognormal:0.08,1 --error-rate 0.05 --reset-rate 0.01 --api-delay 0
+"""
+
+import argparse
+import io
+import time
+from contextlib import redirect_stdout
+
+import populateHometownState as resolver
+from geocoders import GeocoderEndpoint, GeocoderPool
+from studentRecord import StudentRecord
+from stubServers import NOMINATIM_PATH, OA_PATH, add_fault_arguments, faults_from_args, start_stub
+
+
+def percentile(samples: list, q: float) -> float:
+    """Nearest-rank percentile (q in 0-100) of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def _timed(fn, samples: list):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - start)
+    return wrapper
+
+
+def run_load_test(server, limit: int = 500, workers: int = resolver.CONCURRENT_LIMIT,
+                  api_delay: float = resolver.API_DELAY, nominatim_workers: int = 8,
+                  timeout: float = resolver.OA_TIMEOUT) -> dict:
+    """Run Phase 1 and 2 against server; timings in seconds"""
+    saved = (resolver.OA_SERVLET_URL, resolver.OA_TIMEOUT, resolver.fetch_hometown,
+             resolver.CONCURRENT_LIMIT, resolver.API_DELAY, resolver.geocoders, resolver.geocode_cache)
+    oa_samples, geocoder_samples = [], []
+    try:
+        resolver.OA_SERVLET_URL = server.base_url + OA_PATH
+        resolver.OA_TIMEOUT = timeout
+        resolver.fetch_hometown = _timed(saved[2], oa_samples)
+        resolver.CONCURRENT_LIMIT = workers
+        resolver.API_DELAY = api_delay
+        resolver.geocode_cache = {}
+        endpoint = GeocoderEndpoint('stub', server.base_url + NOMINATIM_PATH, delay=0,
+                                    concurrency=nominatim_workers, timeout=timeout)
+        endpoint.search = _timed(endpoint.search, geocoder_samples)
+        resolver.geocoders = GeocoderPool([endpoint])
+
+        records = [StudentRecord(roll=roll) for roll in list(server.hometowns)[:limit]]
+        with redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            # Fresh fetch times: stub fetches must not touch oa_fetch_times.json
+            resolver.run_fetch_phase(records, resolver.resolve_many_detailed, fetch_times={})
+            phase1 = time.perf_counter() - start
+            unmapped = sum(1 for r in records if r.hometown and not r.homestate)
+            start = time.perf_counter()
+            mapped = resolver.run_nominatim_phase(records, resolver.resolve_many_detailed)
+            phase2 = time.perf_counter() - start
+    finally:
+        (resolver.OA_SERVLET_URL, resolver.OA_TIMEOUT, resolver.fetch_hometown,
+         resolver.CONCURRENT_LIMIT, resolver.API_DELAY, resolver.geocoders, resolver.geocode_cache) = saved
+
+    expected = sum(1 for r in records if server.hometowns[r.roll])
+    lost = sum(1 for r in records if server.hometowns[r.roll] and not r.hometown)
+    return {
+        'rolls': len(records),
+        'phase1': {'elapsed': phase1, 'samples': oa_samples},
+        'phase2': {'elapsed': phase2, 'samples': geocoder_samples,
+                   'errors': endpoint.errors, 'unmapped': unmapped, 'mapped': mapped},
+        'expected_hometowns': expected,
+        'lost_hometowns': lost,
+        'served': dict(server.counts),
+    }
+
+
+def _print_phase(name: str, phase: dict):
+    samples = phase['samples']
+    rate = len(samples) / phase['elapsed'] if phase['elapsed'] else 0.0
+    print(f'{name}: {len(samples)} requests in {phase["elapsed"]:.2f} s ({rate:.1f} req/s)')
+    if samples:
+        print('  latency ms  ' + '  '.join(
+            f'{label} {percentile(samples, q) * 1000:.1f}'
+            for label, q in (('p50', 50), ('p90', 90), ('p99', 99), ('max', 100))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the pipeline against local OA/Nominatim stubs')
+    parser.add_argument('--limit', type=int, default=500, help='rolls to fetch')
+    parser.add_argument('--workers', type=int, default=resolver.CONCURRENT_LIMIT, help='Phase 1 fetch threads')
+    parser.add_argument('--api-delay', type=float, default=resolver.API_DELAY,
+                        help='pause per Phase 1 response (the script uses %(default)s)')
+    parser.add_argument('--nominatim-workers', type=int, default=8, help='Phase 2 parallel lookups')
+    parser.add_argument('--timeout', type=float, default=resolver.OA_TIMEOUT, help='request timeout in seconds')
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        faults = faults_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    server = start_stub(0, args.students, faults)
+    try:
+        results = run_load_test(server, args.limit, args.workers, args.api_delay,
+                                args.nominatim_workers, args.timeout)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f'{results["rolls"]} rolls against {server.base_url} (latency {args.latency}, '
+          f'errors {args.error_rate:.0%}, resets {args.reset_rate:.0%}, truncated {args.truncate_rate:.0%})')
+    _print_phase('Phase 1 (OA)', results['phase1'])
+    expected, lost = results['expected_hometowns'], results['lost_hometowns']
+    print(f'  lost hometowns: {lost} of {expected}' + (f' ({lost / expected:.1%})' if expected else ''))
+    _print_phase('Phase 2 (Nominatim)', results['phase2'])
+    phase2 = results['phase2']
+    print(f'  failed requests: {phase2["errors"]}, students mapped: {phase2["mapped"]} of {phase2["unmapped"]}')
+    print('Served:')
+    for (path, outcome), count in sorted(results['served'].items()):
+        print(f'  {path:<32} {outcome:<9} {count}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Merge geocode caches from several machines or runs into one
+
+Usage:
+    python scripts/mergeGeocodeCache.py CACHE [CACHE ...] -o OUTPUT
+                                        [--strategy latest|confidence|priority]
+                                        [--priority audit,nominatim,legacy]
+
+    --strategy  how a key present in several caches with different entries
+                is decided:
+                latest      the newest entry (ts) wins (last writer)
+                confidence  the entry whose source gives the highest
+                            confidence wins (METHOD_CONFIDENCE of
+                            "cache_<source>"; negatives count as 0)
+                priority    the entry whose source comes first in --priority
+                            wins; unlisted sources come last
+    --priority  source order for --strategy priority
+
+Remaining ties are broken by positive over negative, then ts, then the
+entry's own content, so the result does not depend on the order of the
+inputs, and the output is sorted by key: merging the same caches always gives
+the same bytes. OUTPUT may be one of the inputs (it is replaced atomically).
+
+The caches are never loaded whole: each file is parsed incrementally
+(jsonStream.py), entries
+are spilled to key-sorted runs of --run-size entries in a temporary
+directory, and the runs are merged and written out as a stream. Legacy caches
+(bare "State" strings) are upgraded as they are read.
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import os
+import tempfile
+from operator import itemgetter
+from pathlib import Path
+
+import populateHometownState as resolver
+from jsonStream import iter_object
+
+STRATEGIES = ('latest', 'confidence', 'priority')
+DEFAULT_PRIORITY = ('audit', 'nominatim', 'legacy')
+DEFAULT_RUN_SIZE = 200_000  # entries held in memory before spilling a run
+
+
+def iter_cache_file(path: Path):
+    """Yield (key, entry) from a cache file, holding about one chunk in memory"""
+    for key, value in iter_object(path):
+        yield key, resolver.upgrade_cache_entry(value)
+
+
+def entry_confidence(entry: dict) -> float:
+    return resolver.resolution_confidence(entry['state'], f"cache_{entry['source']}")
+
+
+def entry_rank(strategy: str, priority=DEFAULT_PRIORITY):
+    """Sort key for candidate entries of one key; the largest wins"""
+    order = {source: i for i, source in enumerate(priority)}
+
+    def tiebreak(entry):
+        return (entry['kind'] == 'positive', entry.get('ts', 0),
+                json.dumps(entry, sort_keys=True, ensure_ascii=False))
+
+    if strategy == 'latest':
+        return lambda entry: (entry.get('ts', 0),) + tiebreak(entry)
+    if strategy == 'confidence':
+        return lambda entry: (entry_confidence(entry),) + tiebreak(entry)
+    if strategy == 'priority':
+        return lambda entry: (-order.get(entry['source'], len(order)),) + tiebreak(entry)
+    raise ValueError(f'unknown strategy {strategy!r}')
+
+
+def _spill(batch: list, directory: str) -> str:
+    batch.sort(key=itemgetter(0))
+    fd, path = tempfile.mkstemp(suffix='.jsonl', dir=directory)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        for item in batch:
+            f.write(json.dumps(item, ensure_ascii=False) + '\n')
+    return path
+
+
+def _read_run(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield tuple(json.loads(line))
+
+
+def merge_caches(paths: list, output: Path, strategy: str = 'latest',
+                 priority=DEFAULT_PRIORITY, run_size: int = DEFAULT_RUN_SIZE) -> dict:
+    """Merge cache files into output; returns counts for the report"""
+    rank = entry_rank(strategy, priority)
+    stats = {'read': {}, 'keys': 0, 'conflicts': 0, 'origins': {}}
+
+    with tempfile.TemporaryDirectory(prefix='geocode-merge-') as tmpdir:
+        runs, batch = [], []
+        for path in paths:
+            count = 0
+            for key, entry in iter_cache_file(path):
+                batch.append((key, entry))
+                count += 1
+                if len(batch) >= run_size:
+                    runs.append(_spill(batch, tmpdir))
+                    batch = []
+            stats['read'][str(path)] = count
+        if runs and batch:
+            runs.append(_spill(batch, tmpdir))
+            batch = []
+
+        if runs:
+            merged = heapq.merge(*(_read_run(run) for run in runs), key=itemgetter(0))
+        else:
+            merged = iter(sorted(batch, key=itemgetter(0)))
+
+        tmp_file = output.with_name(output.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write('{')
+            for key, group in itertools.groupby(merged, key=itemgetter(0)):
+                candidates = [entry for _, entry in group]
+                winner = max(candidates, key=rank)
+                if any(entry != winner for entry in candidates):
+                    stats['conflicts'] += 1
+                origin = winner.get('origin', '-')
+                stats['origins'][origin] = stats['origins'].get(origin, 0) + 1
+
+                # Same layout as json.dump(cache, indent=2) in write_geocode_cache
+                text = json.dumps(winner, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+                f.write(',\n  ' if stats['keys'] else '\n  ')
+                f.write(f'{json.dumps(key, ensure_ascii=False)}: {text}')
+                stats['keys'] += 1
+            f.write('\n}' if stats['keys'] else '}')
+        os.replace(tmp_file, output)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Deterministically merge geocode cache files')
+    parser.add_argument('caches', nargs='+', type=Path, help='cache files to merge')
+    parser.add_argument('-o', '--output', type=Path, required=True, help='merged cache file')
+    parser.add_argument('--strategy', choices=STRATEGIES, default='latest',
+                        help='how conflicting entries are decided (default: %(default)s)')
+    parser.add_argument('--priority', default=','.join(DEFAULT_PRIORITY),
+                        help='source order for --strategy priority (default: %(default)s)')
+    parser.add_argument('--run-size', type=int, default=DEFAULT_RUN_SIZE,
+                        help='entries sorted in memory per temporary run')
+    args = parser.parse_args()
+
+    missing = [path for path in args.caches if not path.exists()]
+    if missing:
+        print(f'Error: {", ".join(map(str, missing))} not found')
+        return
+
+    priority = tuple(source.strip() for source in args.priority.split(',') if source.strip())
+    print(f'Merging {len(args.caches)} caches ({args.strategy})...')
+    try:
+        stats = merge_caches(args.caches, args.output, args.strategy, priority, args.run_size)
+    except ValueError as e:
+        print(f'Error reading cache: {e}')
+        return
+
+    for path, count in stats['read'].items():
+        print(f'  {path}: {count} entries')
+    print(f"Wrote {stats['keys']} entries to {args.output} ({stats['conflicts']} conflicts resolved)")
+    for origin, count in sorted(stats['origins'].items(), key=lambda item: -item[1]):
+        print(f'  from {origin}: {count}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Static place -> state mappings used by the hometown resolver
+
+Usage:
+    python scripts/placeMappings.py    # (re)compile the snapshot
+
+The mappings are edited as plain data files in scripts/data/:
+- city_state.tsv      city/town -> state
+- district_state.tsv  district -> state (overrides city_state.tsv)
+- state_names.tsv     state name variation -> canonical state name
+- pin_prefixes.tsv    3-digit PIN code prefix ranges -> state
+- ambiguous_places.tsv
+                      place names shared by several states -> every
+                      candidate state with a prior
+- state_abbreviations.tsv
+                      "hp", "up", ... -> state (context for the above only)
+- junk_hometowns.txt  placeholder/garbage values (one per line), compiled
+                      into a Bloom filter whose hits are confirmed against
+                      the exact set (is_listed_junk); a mapped place listed
+                      here is a compile error, and `placeMappings.py` warns
+                      about cached places the resolver would treat as junk
+
+data/disambiguation_checks.tsv lists hometowns with the state the offline
+resolver must give them (or "-" for "leave it to Nominatim");
+`python scripts/placeMappings.py` checks them after compiling and exits
+with status 1 when one fails.
+
+Optionally, an India Post PIN code directory CSV (with `pincode` and
+`statename` columns, as published on data.gov.in) can be dropped in as
+scripts/data/pincode_directory.csv for exact 6-digit lookups. It is not
+committed.
+
+Reading and deriving indexes from them is done once and stored in
+scripts/data/mappings.snapshot (a pickle tagged with a format version, the
+sha256 of every TSV and the size/mtime of the PIN directory). load_mappings() uses the snapshot when it
+matches the sources and transparently recompiles it otherwise, so editing a
+TSV needs no code change and no manual build step.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import pickle
+import re
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+from bloomFilter import BloomFilter
+
+SCRIPT_DIR = Path(__file__).parent
+DATA_DIR = SCRIPT_DIR / "data"
+SNAPSHOT_FILE = DATA_DIR / "mappings.snapshot"
+
+SNAPSHOT_VERSION = 5
+
+SOURCES = {
+    'city_state': DATA_DIR / "city_state.tsv",
+    'district_state': DATA_DIR / "district_state.tsv",
+    'state_names': DATA_DIR / "state_names.tsv",
+    'pin_prefixes': DATA_DIR / "pin_prefixes.tsv",
+    'ambiguous_places': DATA_DIR / "ambiguous_places.tsv",
+    'state_abbreviations': DATA_DIR / "state_abbreviations.tsv",
+    'junk_hometowns': DATA_DIR / "junk_hometowns.txt",
+}
+PIN_DIRECTORY_FILE = DATA_DIR / "pincode_directory.csv"
+# Expected resolutions of ambiguous place names, checked when compiling by hand
+DISAMBIGUATION_CHECKS_FILE = DATA_DIR / "disambiguation_checks.tsv"
+
+_mappings = None
+_mappings_lock = threading.Lock()
+
+
+def read_tsv(text: str) -> dict:
+    """Parse key<TAB>value lines, skipping blanks and # comments (order kept)"""
+    mapping = {}
+    for line_no, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        key, sep, value = line.partition('\t')
+        if not sep or not key.strip() or not value.strip():
+            raise ValueError(f'line {line_no}: expected "<key>\\t<value>", got {line!r}')
+        mapping[key.strip()] = value.strip()
+    return mapping
+
+
+def read_list(text: str) -> list:
+    """Parse one value per line, skipping blanks and # comments"""
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.strip().startswith('#')]
+
+
+def _read_sources() -> dict:
+    return {name: path.read_bytes() for name, path in SOURCES.items()}
+
+
+def _pin_directory_stamp():
+    """Size and mtime of the optional PIN directory (too large to hash on every load)"""
+    if not PIN_DIRECTORY_FILE.exists():
+        return None
+    stat = PIN_DIRECTORY_FILE.stat()
+    return f'{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def _fingerprint(sources: dict) -> dict:
+    fingerprint = {name: hashlib.sha256(data).hexdigest() for name, data in sources.items()}
+    fingerprint['pin_directory'] = _pin_directory_stamp()
+    return fingerprint
+
+
+def _canonical_state(state: str, state_names: dict) -> str:
+    return state_names.get(state.lower().strip(), state.strip().title())
+
+
+def _expand_pin_prefixes(ranges: dict, state_names: dict) -> dict:
+    """{'201-243': 'Uttar Pradesh'} -> {'201': 'Uttar Pradesh', ..., '243': ...}"""
+    prefixes = {}
+    for span, state in ranges.items():
+        first, sep, last = span.partition('-')
+        if not (first.isdigit() and len(first) == 3 and (not sep or (last.isdigit() and len(last) == 3))):
+            raise ValueError(f'{SOURCES["pin_prefixes"].name}: bad prefix range {span!r}')
+        for prefix in range(int(first), int(last or first) + 1):
+            prefixes[str(prefix)] = _canonical_state(state, state_names)
+    return prefixes
+
+
+def _parse_candidates(places: dict, state_names: dict) -> dict:
+    """{'bilaspur': 'Chhattisgarh=0.75, ...'} -> {'bilaspur': (('Chhattisgarh', 0.75), ...)}, best first"""
+    candidates = {}
+    for place, spec in places.items():
+        priors = {}
+        for item in spec.split(','):
+            state, sep, prior = item.rpartition('=')
+            try:
+                value = float(prior)
+            except ValueError:
+                value = 0.0
+            if not sep or not state.strip() or value <= 0:
+                raise ValueError(f'{SOURCES["ambiguous_places"].name}: bad candidate {item.strip()!r} for {place!r}')
+            state = _canonical_state(state, state_names)
+            priors[state] = priors.get(state, 0.0) + value
+        if len(priors) < 2:
+            raise ValueError(f'{SOURCES["ambiguous_places"].name}: {place!r} needs at least two states')
+        total = sum(priors.values())
+        candidates[place.lower()] = tuple(sorted(((state, prior / total) for state, prior in priors.items()),
+                                                 key=lambda item: -item[1]))
+    return candidates
+
+
+def read_pin_directory(path: Path, state_names: dict) -> dict:
+    """6-digit PIN -> state from an India Post directory CSV (first state wins)"""
+    pins = {}
+    with open(path, 'r', encoding='utf-8-sig', errors='replace', newline='') as f:
+        reader = csv.DictReader(f)
+        columns = {name.lower().strip(): name for name in reader.fieldnames or []}
+        if 'pincode' not in columns or 'statename' not in columns:
+            raise ValueError(f'{path.name}: expected "pincode" and "statename" columns')
+        for row in reader:
+            pin = (row[columns['pincode']] or '').strip()
+            state = (row[columns['statename']] or '').strip()
+            if len(pin) == 6 and pin.isdigit() and state and pin not in pins:
+                pins[pin] = _canonical_state(state, state_names)
+    return pins
+
+
+def compile_mappings(sources: dict = None) -> dict:
+    """Build the mappings and their derived indexes from the TSV sources"""
+    if sources is None:
+        sources = _read_sources()
+
+    tables = {}
+    for name, data in sources.items():
+        try:
+            parse = read_list if SOURCES[name].suffix == '.txt' else read_tsv
+            tables[name] = parse(data.decode('utf-8'))
+        except ValueError as e:
+            raise ValueError(f'{SOURCES[name].name}: {e}') from None
+
+    all_mappings = dict(tables['city_state'])
+    all_mappings.update(tables['district_state'])
+
+    # Same normalization as the resolver: lowercase, letters/digits/spaces
+    junk_keys = frozenset(' '.join(re.sub(r'[^a-z0-9\s]', '', key.lower()).split())
+                          for key in tables['junk_hometowns'])
+    mapped_junk = sorted(junk_keys & {' '.join(key.split()) for key in all_mappings})
+    if mapped_junk:
+        raise ValueError(f'{SOURCES["junk_hometowns"].name} lists mapped places: {", ".join(mapped_junk)}')
+
+    pin_states = {}
+    if PIN_DIRECTORY_FILE.exists():
+        pin_states = read_pin_directory(PIN_DIRECTORY_FILE, tables['state_names'])
+
+    return {
+        'version': SNAPSHOT_VERSION,
+        'sources': _fingerprint(sources),
+        'city_state': tables['city_state'],
+        'district_state': tables['district_state'],
+        'all_mappings': all_mappings,
+        'state_names': tables['state_names'],
+        # Derived indexes
+        'canonical_states': frozenset(tables['state_names'].values()),
+        'mapped_states': sorted(set(all_mappings.values())),
+        'pin_prefix_states': _expand_pin_prefixes(tables['pin_prefixes'], tables['state_names']),
+        'pin_states': pin_states,
+        'ambiguous_places': _parse_candidates(tables['ambiguous_places'], tables['state_names']),
+        'state_abbreviations': {abbreviation: _canonical_state(state, tables['state_names'])
+                                for abbreviation, state in tables['state_abbreviations'].items()},
+        # The filter answers most lookups; its hits are confirmed in junk_keys
+        'junk_keys': junk_keys,
+        'junk_filter': BloomFilter.from_items(junk_keys),
+    }
+
+
+def is_listed_junk(key: str, mappings: dict) -> bool:
+    """Whether a normalized, space-collapsed string is in junk_hometowns.txt"""
+    return key in mappings['junk_filter'] and key in mappings['junk_keys']
+
+
+def cached_junk(mappings: dict, cache_file: Path) -> list:
+    """Places the geocode cache resolved to a state that the resolver calls junk"""
+    from populateHometownState import is_junk_hometown, normalize_hometown, upgrade_cache_entry
+    with open(cache_file, 'r', encoding='utf-8') as f:
+        cache = json.load(f)
+    flagged = []
+    for key, entry in cache.items():
+        entry = upgrade_cache_entry(entry)
+        if entry['kind'] == 'positive' and is_junk_hometown(key, normalize_hometown(key), mappings):
+            flagged.append(key)
+    return sorted(flagged)
+
+
+def write_snapshot(mappings: dict, path: Path = SNAPSHOT_FILE):
+    """Write the compiled mappings atomically (unique temp name: processes may race)"""
+    with tempfile.NamedTemporaryFile('wb', dir=path.parent, prefix=path.name + '.',
+                                     suffix='.tmp', delete=False) as f:
+        tmp_path = f.name
+        try:
+            pickle.dump(mappings, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            f.close()
+            os.unlink(tmp_path)
+            raise
+    os.replace(tmp_path, path)
+
+
+def load_mappings() -> dict:
+    """Return the compiled mappings, loading or rebuilding the snapshot once"""
+    if _mappings is not None:
+        return _mappings
+    # Pool workers and the watcher may all ask first; only one compiles
+    with _mappings_lock:
+        if _mappings is None:
+            _load_mappings()
+    return _mappings
+
+
+def _load_mappings():
+    global _mappings
+    sources = _read_sources()
+    fingerprint = _fingerprint(sources)
+
+    mappings = None
+    if SNAPSHOT_FILE.exists():
+        try:
+            with open(SNAPSHOT_FILE, 'rb') as f:
+                mappings = pickle.load(f)
+            if mappings.get('version') != SNAPSHOT_VERSION or mappings.get('sources') != fingerprint:
+                mappings = None
+        except Exception:
+            mappings = None
+
+    if mappings is None:
+        mappings = compile_mappings(sources)
+        try:
+            write_snapshot(mappings)
+        except OSError:
+            # Read-only checkout: still usable, just recompiled per process
+            pass
+
+    _mappings = mappings
+
+
+def disambiguation_failures(path: Path = DISAMBIGUATION_CHECKS_FILE) -> list:
+    """(hometown, expected, got) for the checks the offline resolver gets wrong"""
+    from populateHometownState import resolve_hometown
+    failures = []
+    for hometown, expected in read_tsv(path.read_text(encoding='utf-8')).items():
+        state, method = resolve_hometown(hometown, use_api_fallback=False)
+        got = '-' if (state, method) == ('', 'ambiguous') else state or f'({method})'
+        if got != expected:
+            failures.append((hometown, expected, got))
+    return failures
+
+
+def main():
+    global _mappings
+    mappings = compile_mappings()
+    write_snapshot(mappings)
+    _mappings = mappings
+    print(f'Compiled {len(mappings["all_mappings"])} place mappings, '
+          f'{len(mappings["state_names"])} state name variations, '
+          f'{len(mappings["pin_prefix_states"])} PIN prefixes, '
+          f'{len(mappings["ambiguous_places"])} ambiguous places and '
+          f'{len(mappings["pin_states"])} exact PINs to {SNAPSHOT_FILE}')
+
+    cache_file = SCRIPT_DIR / "city_state_cache.json"
+    if cache_file.exists():
+        flagged = cached_junk(mappings, cache_file)
+        if flagged:
+            print(f'Warning: {len(flagged)} geocoded places in {cache_file.name} would be treated as junk: '
+                  f'{", ".join(flagged[:20])}{" ..." if len(flagged) > 20 else ""}')
+
+    failures = disambiguation_failures()
+    for hometown, expected, got in failures:
+        print(f'Check failed: {hometown!r} should resolve to {expected}, got {got}')
+    if failures:
+        print(f'{len(failures)} of the checks in {DISAMBIGUATION_CHECKS_FILE.name} failed')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,1045 +3,214 @@
 Script to fetch hometown data from IITK OA API and add state mapping
 
 Usage:
-    python scripts/populateHometownState.py
+    python scripts/populateHometownState.py [--resolver URL] [--reresolve-below CONFIDENCE]
+                                            [--time-budget SECONDS] [--stage-stats]
+                                            [--geocoders PATH] [--hedge-after SECONDS]
+                                            [--profile DIR] [--change-feed PATH | --no-change-feed]
+
+    --resolver         resolve through a running resolverDaemon.py instead of
+                       loading the mappings and geocode cache in this process
+    --reresolve-below  skip the OA fetch and rerun resolution (offline, then
+                       Nominatim) only for stored hometowns whose
+                       homestate_confidence is below CONFIDENCE or missing
+    --time-budget      start no OA fetch after SECONDS; students are fetched
+                       missing hometown first, then newest batch, then least
+                       recently fetched (see fetchScheduler.py), and the
+                       ones not reached keep their stored data
+    --stage-stats      print hit rate and mean cost of each resolver stage
+                       (see resolverStages.py)
+    --geocoders        Nominatim endpoints with their rate limits, concurrency,
+                       timeouts and User-Agent (default scripts/geocoders.json
+                       if present, else the public instance at 1 req/s; see
+                       geocoders.py). Phase 2 runs as many lookups in parallel
+                       as the first endpoint allows
+    --hedge-after      resend lookups unanswered after SECONDS to the next
+                       endpoint and take the first answer
+    --profile          sample every thread (including the fetch/geocoder
+                       pools) and write wall.folded / cpu.folded flamegraph
+                       stacks and per-phase totals to DIR (samplingProfiler.py)
+    --change-feed      append one JSON line per student whose hometown or
+                       homestate changed, tagged with this run's id (default
+                       scripts/homestate_changes.jsonl; see changeFeed.py)
+    --no-change-feed   don't append to the change feed
 
 This script:
 1. Reads students.json from public folder
-2. Fetches hometown for each student from the API
+2. Fetches hometown for each student from the API (priority order,
+   last fetch times in scripts/oa_fetch_times.json)
 3. Maps hometown/city to Indian state (using static mapping + Nominatim API fallback)
-4. Writes back to students.json with hometown and homestate fields
+   The static mappings are edited in scripts/data/*.tsv (see placeMappings.py)
+4. Writes back to students.json with hometown and homestate fields, plus
+   homestate_method (which stage resolved it) and homestate_confidence
+   (0-1, see METHOD_CONFIDENCE)
+5. Writes derived artifacts for the frontend (facets.json, search-index.json,
+   aggregates.json counts per state/batch/department/program/hall/gender)
+   and local tooling sidecars (directory.db SQLite export, students.rollidx)
+6. Publishes minified, content-hashed copies of the data files
+   under public/data/ with a data-manifest.json for the client
 """
 
+import argparse
 import json
+import math
 import os
 import re
+import socket
 import time
 import urllib.request
 import urllib.error
 import urllib.parse
 import ssl
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from contextlib import nullcontext
 from pathlib import Path
 
+import changeFeed
+from buildAggregateCube import CubeBuilder, write_cube
+from buildFacetIndex import write_facet_index
+from buildSearchIndex import write_search_index
+from geocoders import GeocoderError, GeocoderPool, load_geocoders
+from placeMappings import is_listed_junk, load_mappings
+from exportSqlite import write_sqlite_export
+from fetchScheduler import FetchScheduler, load_fetch_times, save_fetch_times
+from publishAssets import publish_assets
+from resolverStages import Stage, StageChain, format_stage_stats, input_shape
+from rollIndex import write_roll_index
+from samplingProfiler import SamplingProfiler
+from studentRecord import StudentRecord, intern_value
+
 # Path to students.json
 SCRIPT_DIR = Path(__file__).parent
 STUDENTS_FILE = SCRIPT_DIR.parent / "public" / "students.json"
 CACHE_FILE = SCRIPT_DIR / "city_state_cache.json"
+GEOCODERS_FILE = SCRIPT_DIR / "geocoders.json"
+
+# IITK OA hometown lookup (stubServers.py serves a local stand-in)
+OA_SERVLET_URL = "https://oa.iitk.ac.in/Oa/servlet/AutocompleteServlet"
+OA_TIMEOUT = 10  # seconds
 
 # Rate limiting
 API_DELAY = 0.05  # 50ms between batches
 CONCURRENT_LIMIT = 10  # Concurrent requests
-NOMINATIM_DELAY = 1.0  # Nominatim requires 1 second between requests
 
-# Create SSL context that doesn't verify certificates (for IITK's certificate)
-ssl_context = ssl.create_default_context()
-ssl_context.check_hostname = False
-ssl_context.verify_mode = ssl.CERT_NONE
+# Empty geocode results are retried after this long; found states never expire
+NEGATIVE_CACHE_TTL = 30 * 24 * 3600  # 30 days
+# Tag on new cache entries, so merged caches show where each answer came from
+CACHE_ORIGIN = os.environ.get('GEOCODE_CACHE_ORIGIN') or socket.gethostname()
+
+# SSL context for IITK, created on first request (see get_ssl_context)
+ssl_context = None
 
 # Cache for geocoding results (to avoid repeated API calls)
+# key -> {'state': str, 'kind': 'positive'|'negative', 'source': str, 'ts': epoch seconds}
 geocode_cache = {}
 geocode_cache_lock = threading.Lock()
-nominatim_lock = threading.Lock()  # Ensure only one Nominatim request at a time
 last_nominatim_call = 0
 
-# Indian cities/towns to state mapping (comprehensive list)
-CITY_STATE_MAP = {
-    # Andhra Pradesh
-    'visakhapatnam': 'Andhra Pradesh',
-    'vizag': 'Andhra Pradesh',
-    'vijayawada': 'Andhra Pradesh',
-    'guntur': 'Andhra Pradesh',
-    'nellore': 'Andhra Pradesh',
-    'kurnool': 'Andhra Pradesh',
-    'rajahmundry': 'Andhra Pradesh',
-    'tirupati': 'Andhra Pradesh',
-    'kakinada': 'Andhra Pradesh',
-    'kadapa': 'Andhra Pradesh',
-    'anantapur': 'Andhra Pradesh',
-    'eluru': 'Andhra Pradesh',
-    'ongole': 'Andhra Pradesh',
-    'nandyal': 'Andhra Pradesh',
-    'machilipatnam': 'Andhra Pradesh',
-    'adoni': 'Andhra Pradesh',
-    'tenali': 'Andhra Pradesh',
-    'proddatur': 'Andhra Pradesh',
-    'chittoor': 'Andhra Pradesh',
-    'hindupur': 'Andhra Pradesh',
-    'bhimavaram': 'Andhra Pradesh',
-    'madanapalle': 'Andhra Pradesh',
-    'guntakal': 'Andhra Pradesh',
-    'dharmavaram': 'Andhra Pradesh',
-    'gudivada': 'Andhra Pradesh',
-    'srikakulam': 'Andhra Pradesh',
-    'narasaraopet': 'Andhra Pradesh',
-    'tadepalligudem': 'Andhra Pradesh',
-    'chilakaluripet': 'Andhra Pradesh',
-    'amaravati': 'Andhra Pradesh',
-
-    # Arunachal Pradesh
-    'itanagar': 'Arunachal Pradesh',
-    'naharlagun': 'Arunachal Pradesh',
-    'pasighat': 'Arunachal Pradesh',
-    'tawang': 'Arunachal Pradesh',
-    'ziro': 'Arunachal Pradesh',
-    'bomdila': 'Arunachal Pradesh',
-    'tezu': 'Arunachal Pradesh',
-    'aalo': 'Arunachal Pradesh',
-    'along': 'Arunachal Pradesh',
-
-    # Assam
-    'guwahati': 'Assam',
-    'silchar': 'Assam',
-    'dibrugarh': 'Assam',
-    'jorhat': 'Assam',
-    'nagaon': 'Assam',
-    'tinsukia': 'Assam',
-    'tezpur': 'Assam',
-    'karimganj': 'Assam',
-    'hailakandi': 'Assam',
-    'diphu': 'Assam',
-    'goalpara': 'Assam',
-    'bongaigaon': 'Assam',
-    'sibsagar': 'Assam',
-    'sivasagar': 'Assam',
-    'dhubri': 'Assam',
-    'golaghat': 'Assam',
-    'lakhimpur': 'Assam',
-    'north lakhimpur': 'Assam',
-    'barpeta': 'Assam',
-    'mangaldoi': 'Assam',
-    'nalbari': 'Assam',
-    'dhemaji': 'Assam',
-
-    # Bihar
-    'patna': 'Bihar',
-    'gaya': 'Bihar',
-    'bhagalpur': 'Bihar',
-    'muzaffarpur': 'Bihar',
-    'purnia': 'Bihar',
-    'darbhanga': 'Bihar',
-    'bihar sharif': 'Bihar',
-    'arrah': 'Bihar',
-    'begusarai': 'Bihar',
-    'katihar': 'Bihar',
-    'munger': 'Bihar',
-    'chhapra': 'Bihar',
-    'danapur': 'Bihar',
-    'saharsa': 'Bihar',
-    'sasaram': 'Bihar',
-    'hajipur': 'Bihar',
-    'dehri': 'Bihar',
-    'siwan': 'Bihar',
-    'motihari': 'Bihar',
-    'nawada': 'Bihar',
-    'bagaha': 'Bihar',
-    'buxar': 'Bihar',
-    'kishanganj': 'Bihar',
-    'sitamarhi': 'Bihar',
-    'jamalpur': 'Bihar',
-    'jehanabad': 'Bihar',
-    'aurangabad': 'Bihar',
-    'lakhisarai': 'Bihar',
-    'madhubani': 'Bihar',
-    'samastipur': 'Bihar',
-    'vaishali': 'Bihar',
-    'nalanda': 'Bihar',
-    'gopalganj': 'Bihar',
-    'bettiah': 'Bihar',
-    'khagaria': 'Bihar',
-    'madhepura': 'Bihar',
-    'supaul': 'Bihar',
-    'araria': 'Bihar',
-    'forbesganj': 'Bihar',
-    'banka': 'Bihar',
-    'jamui': 'Bihar',
-    'sheikhpura': 'Bihar',
-    'rohtas': 'Bihar',
-    'kaimur': 'Bihar',
-    'bhojpur': 'Bihar',
-    'saran': 'Bihar',
-    'east champaran': 'Bihar',
-    'west champaran': 'Bihar',
-
-    # Chhattisgarh
-    'raipur': 'Chhattisgarh',
-    'bhilai': 'Chhattisgarh',
-    'bilaspur': 'Chhattisgarh',
-    'korba': 'Chhattisgarh',
-    'durg': 'Chhattisgarh',
-    'rajnandgaon': 'Chhattisgarh',
-    'raigarh': 'Chhattisgarh',
-    'jagdalpur': 'Chhattisgarh',
-    'ambikapur': 'Chhattisgarh',
-    'dhamtari': 'Chhattisgarh',
-    'mahasamund': 'Chhattisgarh',
-    'chirmiri': 'Chhattisgarh',
-    'dalli rajhara': 'Chhattisgarh',
-    'naila janjgir': 'Chhattisgarh',
-    'tilda newra': 'Chhattisgarh',
-    'kanker': 'Chhattisgarh',
-    'kondagaon': 'Chhattisgarh',
-    'mungeli': 'Chhattisgarh',
-    'bemetara': 'Chhattisgarh',
-    'balod': 'Chhattisgarh',
-    'janjgir': 'Chhattisgarh',
-    'champa': 'Chhattisgarh',
-    'sakti': 'Chhattisgarh',
-
-    # Goa
-    'panaji': 'Goa',
-    'margao': 'Goa',
-    'vasco da gama': 'Goa',
-    'mapusa': 'Goa',
-    'ponda': 'Goa',
-    'bicholim': 'Goa',
-    'curchorem': 'Goa',
-    'sanquelim': 'Goa',
-    'cuncolim': 'Goa',
-    'valpoi': 'Goa',
-    'goa': 'Goa',
-
-    # Gujarat
-    'ahmedabad': 'Gujarat',
-    'surat': 'Gujarat',
-    'vadodara': 'Gujarat',
-    'rajkot': 'Gujarat',
-    'bhavnagar': 'Gujarat',
-    'jamnagar': 'Gujarat',
-    'junagadh': 'Gujarat',
-    'gandhinagar': 'Gujarat',
-    'gandhidham': 'Gujarat',
-    'anand': 'Gujarat',
-    'navsari': 'Gujarat',
-    'morbi': 'Gujarat',
-    'nadiad': 'Gujarat',
-    'surendranagar': 'Gujarat',
-    'bharuch': 'Gujarat',
-    'mehsana': 'Gujarat',
-    'bhuj': 'Gujarat',
-    'porbandar': 'Gujarat',
-    'palanpur': 'Gujarat',
-    'valsad': 'Gujarat',
-    'vapi': 'Gujarat',
-    'gondal': 'Gujarat',
-    'veraval': 'Gujarat',
-    'godhra': 'Gujarat',
-    'patan': 'Gujarat',
-    'botad': 'Gujarat',
-    'amreli': 'Gujarat',
-    'deesa': 'Gujarat',
-    'jetpur': 'Gujarat',
-    'wadhwan': 'Gujarat',
-    'ankleshwar': 'Gujarat',
-    'dahod': 'Gujarat',
-    'kalol': 'Gujarat',
-    'modasa': 'Gujarat',
-    'khambhat': 'Gujarat',
-    'kadi': 'Gujarat',
-    'dwarka': 'Gujarat',
-
-    # Haryana
-    'faridabad': 'Haryana',
-    'gurgaon': 'Haryana',
-    'gurugram': 'Haryana',
-    'panipat': 'Haryana',
-    'ambala': 'Haryana',
-    'yamunanagar': 'Haryana',
-    'rohtak': 'Haryana',
-    'hisar': 'Haryana',
-    'karnal': 'Haryana',
-    'sonipat': 'Haryana',
-    'panchkula': 'Haryana',
-    'bhiwani': 'Haryana',
-    'sirsa': 'Haryana',
-    'bahadurgarh': 'Haryana',
-    'jind': 'Haryana',
-    'thanesar': 'Haryana',
-    'kaithal': 'Haryana',
-    'rewari': 'Haryana',
-    'palwal': 'Haryana',
-    'pinjore': 'Haryana',
-    'mahendragarh': 'Haryana',
-    'hansi': 'Haryana',
-    'narnaul': 'Haryana',
-    'fatehabad': 'Haryana',
-    'tohana': 'Haryana',
-    'charkhi dadri': 'Haryana',
-    'hodal': 'Haryana',
-    'narwana': 'Haryana',
-    'kurukshetra': 'Haryana',
-
-    # Himachal Pradesh
-    'shimla': 'Himachal Pradesh',
-    'mandi': 'Himachal Pradesh',
-    'solan': 'Himachal Pradesh',
-    'nahan': 'Himachal Pradesh',
-    'kullu': 'Himachal Pradesh',
-    'hamirpur': 'Himachal Pradesh',
-    'una': 'Himachal Pradesh',
-    'palampur': 'Himachal Pradesh',
-    'baddi': 'Himachal Pradesh',
-    'sundernagar': 'Himachal Pradesh',
-    'paonta sahib': 'Himachal Pradesh',
-    'dharamshala': 'Himachal Pradesh',
-    'manali': 'Himachal Pradesh',
-    'chamba': 'Himachal Pradesh',
-    'kangra': 'Himachal Pradesh',
-    'kinnaur': 'Himachal Pradesh',
-    'lahaul': 'Himachal Pradesh',
-    'spiti': 'Himachal Pradesh',
-    'sirmaur': 'Himachal Pradesh',
-
-    # Jharkhand
-    'ranchi': 'Jharkhand',
-    'jamshedpur': 'Jharkhand',
-    'dhanbad': 'Jharkhand',
-    'bokaro': 'Jharkhand',
-    'bokaro steel city': 'Jharkhand',
-    'deoghar': 'Jharkhand',
-    'hazaribagh': 'Jharkhand',
-    'giridih': 'Jharkhand',
-    'ramgarh': 'Jharkhand',
-    'medininagar': 'Jharkhand',
-    'daltonganj': 'Jharkhand',
-    'chirkunda': 'Jharkhand',
-    'dumka': 'Jharkhand',
-    'chaibasa': 'Jharkhand',
-    'phusro': 'Jharkhand',
-    'adityapur': 'Jharkhand',
-    'chas': 'Jharkhand',
-    'chatra': 'Jharkhand',
-    'godda': 'Jharkhand',
-    'koderma': 'Jharkhand',
-    'lohardaga': 'Jharkhand',
-    'pakur': 'Jharkhand',
-    'sahibganj': 'Jharkhand',
-    'gumla': 'Jharkhand',
-    'simdega': 'Jharkhand',
-    'khunti': 'Jharkhand',
-    'seraikela': 'Jharkhand',
-
-    # Karnataka
-    'bengaluru': 'Karnataka',
-    'bangalore': 'Karnataka',
-    'mysuru': 'Karnataka',
-    'mysore': 'Karnataka',
-    'hubli': 'Karnataka',
-    'dharwad': 'Karnataka',
-    'mangaluru': 'Karnataka',
-    'mangalore': 'Karnataka',
-    'belgaum': 'Karnataka',
-    'belagavi': 'Karnataka',
-    'gulbarga': 'Karnataka',
-    'kalaburagi': 'Karnataka',
-    'davanagere': 'Karnataka',
-    'bellary': 'Karnataka',
-    'ballari': 'Karnataka',
-    'bijapur': 'Karnataka',
-    'vijayapura': 'Karnataka',
-    'shimoga': 'Karnataka',
-    'shivamogga': 'Karnataka',
-    'tumkur': 'Karnataka',
-    'tumakuru': 'Karnataka',
-    'raichur': 'Karnataka',
-    'bidar': 'Karnataka',
-    'hospet': 'Karnataka',
-    'hosapete': 'Karnataka',
-    'gadag': 'Karnataka',
-    'gadag betageri': 'Karnataka',
-    'robertsonpet': 'Karnataka',
-    'hassan': 'Karnataka',
-    'bhadravati': 'Karnataka',
-    'chitradurga': 'Karnataka',
-    'kolar': 'Karnataka',
-    'mandya': 'Karnataka',
-    'chikmagalur': 'Karnataka',
-    'chikkamagaluru': 'Karnataka',
-    'gangavati': 'Karnataka',
-    'bagalkot': 'Karnataka',
-    'ranebennur': 'Karnataka',
-    'udupi': 'Karnataka',
-    'yelahanka': 'Karnataka',
-
-    # Kerala
-    'thiruvananthapuram': 'Kerala',
-    'trivandrum': 'Kerala',
-    'kochi': 'Kerala',
-    'cochin': 'Kerala',
-    'ernakulam': 'Kerala',
-    'kozhikode': 'Kerala',
-    'calicut': 'Kerala',
-    'thrissur': 'Kerala',
-    'kollam': 'Kerala',
-    'quilon': 'Kerala',
-    'kannur': 'Kerala',
-    'alappuzha': 'Kerala',
-    'alleppey': 'Kerala',
-    'kottayam': 'Kerala',
-    'palakkad': 'Kerala',
-    'malappuram': 'Kerala',
-    'manjeri': 'Kerala',
-    'thalassery': 'Kerala',
-    'kasaragod': 'Kerala',
-    'kayamkulam': 'Kerala',
-    'nedumangad': 'Kerala',
-    'attingal': 'Kerala',
-    'neyyattinkara': 'Kerala',
-    'mattancherry': 'Kerala',
-    'edappal': 'Kerala',
-    'palai': 'Kerala',
-    'vadakara': 'Kerala',
-    'punalur': 'Kerala',
-    'perinthalmanna': 'Kerala',
-    'pathanamthitta': 'Kerala',
-    'idukki': 'Kerala',
-    'wayanad': 'Kerala',
-
-    # Madhya Pradesh
-    'bhopal': 'Madhya Pradesh',
-    'indore': 'Madhya Pradesh',
-    'jabalpur': 'Madhya Pradesh',
-    'gwalior': 'Madhya Pradesh',
-    'ujjain': 'Madhya Pradesh',
-    'sagar': 'Madhya Pradesh',
-    'dewas': 'Madhya Pradesh',
-    'satna': 'Madhya Pradesh',
-    'ratlam': 'Madhya Pradesh',
-    'rewa': 'Madhya Pradesh',
-    'murwara': 'Madhya Pradesh',
-    'katni': 'Madhya Pradesh',
-    'singrauli': 'Madhya Pradesh',
-    'burhanpur': 'Madhya Pradesh',
-    'khandwa': 'Madhya Pradesh',
-    'morena': 'Madhya Pradesh',
-    'bhind': 'Madhya Pradesh',
-    'chhindwara': 'Madhya Pradesh',
-    'guna': 'Madhya Pradesh',
-    'shivpuri': 'Madhya Pradesh',
-    'vidisha': 'Madhya Pradesh',
-    'damoh': 'Madhya Pradesh',
-    'mandsaur': 'Madhya Pradesh',
-    'khargone': 'Madhya Pradesh',
-    'neemuch': 'Madhya Pradesh',
-    'pithampur': 'Madhya Pradesh',
-    'hoshangabad': 'Madhya Pradesh',
-    'itarsi': 'Madhya Pradesh',
-    'seoni': 'Madhya Pradesh',
-    'datia': 'Madhya Pradesh',
-    'betul': 'Madhya Pradesh',
-    'nagda': 'Madhya Pradesh',
-    'shahdol': 'Madhya Pradesh',
-    'dhar': 'Madhya Pradesh',
-    'mhow': 'Madhya Pradesh',
-    'balaghat': 'Madhya Pradesh',
-    'tikamgarh': 'Madhya Pradesh',
-    'chhatarpur': 'Madhya Pradesh',
-    'panna': 'Madhya Pradesh',
-    'ashoknagar': 'Madhya Pradesh',
-    'rajgarh': 'Madhya Pradesh',
-    'sehore': 'Madhya Pradesh',
-    'harda': 'Madhya Pradesh',
-    'mandla': 'Madhya Pradesh',
-    'dindori': 'Madhya Pradesh',
-    'umaria': 'Madhya Pradesh',
-    'anuppur': 'Madhya Pradesh',
-    'sidhi': 'Madhya Pradesh',
-    'sheopur': 'Madhya Pradesh',
-    'barwani': 'Madhya Pradesh',
-    'jhabua': 'Madhya Pradesh',
-    'alirajpur': 'Madhya Pradesh',
-    'agar': 'Madhya Pradesh',
-
-    # Maharashtra
-    'mumbai': 'Maharashtra',
-    'pune': 'Maharashtra',
-    'nagpur': 'Maharashtra',
-    'thane': 'Maharashtra',
-    'pimpri chinchwad': 'Maharashtra',
-    'nashik': 'Maharashtra',
-    'kalyan dombivli': 'Maharashtra',
-    'kalyan': 'Maharashtra',
-    'dombivli': 'Maharashtra',
-    'vasai virar': 'Maharashtra',
-    'vasai': 'Maharashtra',
-    'virar': 'Maharashtra',
-    'navi mumbai': 'Maharashtra',
-    'solapur': 'Maharashtra',
-    'mira bhayandar': 'Maharashtra',
-    'bhiwandi': 'Maharashtra',
-    'amravati': 'Maharashtra',
-    'nanded': 'Maharashtra',
-    'sangli': 'Maharashtra',
-    'kolhapur': 'Maharashtra',
-    'akola': 'Maharashtra',
-    'latur': 'Maharashtra',
-    'dhule': 'Maharashtra',
-    'ahmednagar': 'Maharashtra',
-    'chandrapur': 'Maharashtra',
-    'parbhani': 'Maharashtra',
-    'jalna': 'Maharashtra',
-    'ichalkaranji': 'Maharashtra',
-    'jalgaon': 'Maharashtra',
-    'ambarnath': 'Maharashtra',
-    'ulhasnagar': 'Maharashtra',
-    'panvel': 'Maharashtra',
-    'badlapur': 'Maharashtra',
-    'beed': 'Maharashtra',
-    'gondia': 'Maharashtra',
-    'satara': 'Maharashtra',
-    'yavatmal': 'Maharashtra',
-    'osmanabad': 'Maharashtra',
-    'nandurbar': 'Maharashtra',
-    'wardha': 'Maharashtra',
-    'hinganghat': 'Maharashtra',
-    'udgir': 'Maharashtra',
-    'ratnagiri': 'Maharashtra',
-    'shirdi': 'Maharashtra',
-    'sindhudurg': 'Maharashtra',
-    'buldana': 'Maharashtra',
-    'washim': 'Maharashtra',
-
-    # Manipur
-    'imphal': 'Manipur',
-    'thoubal': 'Manipur',
-    'bishnupur': 'Manipur',
-    'churachandpur': 'Manipur',
-    'kakching': 'Manipur',
-    'senapati': 'Manipur',
-    'ukhrul': 'Manipur',
-    'tamenglong': 'Manipur',
-    'chandel': 'Manipur',
-
-    # Meghalaya
-    'shillong': 'Meghalaya',
-    'tura': 'Meghalaya',
-    'nongstoin': 'Meghalaya',
-    'jowai': 'Meghalaya',
-    'baghmara': 'Meghalaya',
-    'williamnagar': 'Meghalaya',
-    'cherrapunji': 'Meghalaya',
-    'sohra': 'Meghalaya',
-
-    # Mizoram
-    'aizawl': 'Mizoram',
-    'lunglei': 'Mizoram',
-    'champhai': 'Mizoram',
-    'serchhip': 'Mizoram',
-    'kolasib': 'Mizoram',
-    'lawngtlai': 'Mizoram',
-    'mamit': 'Mizoram',
-    'saiha': 'Mizoram',
-
-    # Nagaland
-    'kohima': 'Nagaland',
-    'dimapur': 'Nagaland',
-    'mokokchung': 'Nagaland',
-    'tuensang': 'Nagaland',
-    'wokha': 'Nagaland',
-    'zunheboto': 'Nagaland',
-    'mon': 'Nagaland',
-    'phek': 'Nagaland',
-
-    # Odisha
-    'bhubaneswar': 'Odisha',
-    'cuttack': 'Odisha',
-    'rourkela': 'Odisha',
-    'berhampur': 'Odisha',
-    'brahmapur': 'Odisha',
-    'sambalpur': 'Odisha',
-    'puri': 'Odisha',
-    'balasore': 'Odisha',
-    'baleshwar': 'Odisha',
-    'bhadrak': 'Odisha',
-    'baripada': 'Odisha',
-    'jharsuguda': 'Odisha',
-    'jeypore': 'Odisha',
-    'bargarh': 'Odisha',
-    'paradip': 'Odisha',
-    'bhawanipatna': 'Odisha',
-    'dhenkanal': 'Odisha',
-    'barbil': 'Odisha',
-    'kendrapara': 'Odisha',
-    'sunabeda': 'Odisha',
-    'jatani': 'Odisha',
-    'angul': 'Odisha',
-    'rajgangpur': 'Odisha',
-    'jajpur': 'Odisha',
-    'keonjhar': 'Odisha',
-    'koraput': 'Odisha',
-    'rayagada': 'Odisha',
-    'kendujhar': 'Odisha',
-    'nayagarh': 'Odisha',
-    'khordha': 'Odisha',
-    'ganjam': 'Odisha',
-    'mayurbhanj': 'Odisha',
-    'sundargarh': 'Odisha',
-
-    # Punjab
-    'ludhiana': 'Punjab',
-    'amritsar': 'Punjab',
-    'jalandhar': 'Punjab',
-    'patiala': 'Punjab',
-    'bathinda': 'Punjab',
-    'hoshiarpur': 'Punjab',
-    'batala': 'Punjab',
-    'pathankot': 'Punjab',
-    'moga': 'Punjab',
-    'abohar': 'Punjab',
-    'malerkotla': 'Punjab',
-    'khanna': 'Punjab',
-    'phagwara': 'Punjab',
-    'muktsar': 'Punjab',
-    'barnala': 'Punjab',
-    'rajpura': 'Punjab',
-    'firozpur': 'Punjab',
-    'kapurthala': 'Punjab',
-    'mansa': 'Punjab',
-    'sangrur': 'Punjab',
-    'faridkot': 'Punjab',
-    'mohali': 'Punjab',
-    'rupnagar': 'Punjab',
-    'ropar': 'Punjab',
-    'fatehgarh sahib': 'Punjab',
-    'nawanshahr': 'Punjab',
-    'shaheed bhagat singh nagar': 'Punjab',
-    'tarn taran': 'Punjab',
-    'fazilka': 'Punjab',
-    'gurdaspur': 'Punjab',
-
-    # Rajasthan
-    'jaipur': 'Rajasthan',
-    'jodhpur': 'Rajasthan',
-    'kota': 'Rajasthan',
-    'bikaner': 'Rajasthan',
-    'ajmer': 'Rajasthan',
-    'udaipur': 'Rajasthan',
-    'bhilwara': 'Rajasthan',
-    'alwar': 'Rajasthan',
-    'bharatpur': 'Rajasthan',
-    'sikar': 'Rajasthan',
-    'pali': 'Rajasthan',
-    'sri ganganagar': 'Rajasthan',
-    'ganganagar': 'Rajasthan',
-    'beawar': 'Rajasthan',
-    'hanumangarh': 'Rajasthan',
-    'dhaulpur': 'Rajasthan',
-    'dholpur': 'Rajasthan',
-    'gangapur city': 'Rajasthan',
-    'sawai madhopur': 'Rajasthan',
-    'churu': 'Rajasthan',
-    'jhunjhunu': 'Rajasthan',
-    'kishangarh': 'Rajasthan',
-    'tonk': 'Rajasthan',
-    'nagaur': 'Rajasthan',
-    'makrana': 'Rajasthan',
-    'sujangarh': 'Rajasthan',
-    'bundi': 'Rajasthan',
-    'chittorgarh': 'Rajasthan',
-    'banswara': 'Rajasthan',
-    'dungarpur': 'Rajasthan',
-    'pratapgarh': 'Rajasthan',
-    'rajsamand': 'Rajasthan',
-    'barmer': 'Rajasthan',
-    'jaisalmer': 'Rajasthan',
-    'jalore': 'Rajasthan',
-    'sirohi': 'Rajasthan',
-    'mount abu': 'Rajasthan',
-    'dausa': 'Rajasthan',
-    'karauli': 'Rajasthan',
-    'baran': 'Rajasthan',
-    'jhalawar': 'Rajasthan',
-
-    # Sikkim
-    'gangtok': 'Sikkim',
-    'namchi': 'Sikkim',
-    'mangan': 'Sikkim',
-    'gyalshing': 'Sikkim',
-    'geyzing': 'Sikkim',
-    'rangpo': 'Sikkim',
-    'singtam': 'Sikkim',
-    'jorethang': 'Sikkim',
-
-    # Tamil Nadu
-    'chennai': 'Tamil Nadu',
-    'coimbatore': 'Tamil Nadu',
-    'madurai': 'Tamil Nadu',
-    'tiruchirappalli': 'Tamil Nadu',
-    'trichy': 'Tamil Nadu',
-    'salem': 'Tamil Nadu',
-    'tirunelveli': 'Tamil Nadu',
-    'tiruppur': 'Tamil Nadu',
-    'erode': 'Tamil Nadu',
-    'vellore': 'Tamil Nadu',
-    'thoothukkudi': 'Tamil Nadu',
-    'tuticorin': 'Tamil Nadu',
-    'thoothukudi': 'Tamil Nadu',
-    'dindigul': 'Tamil Nadu',
-    'thanjavur': 'Tamil Nadu',
-    'ranipet': 'Tamil Nadu',
-    'sivakasi': 'Tamil Nadu',
-    'karur': 'Tamil Nadu',
-    'udhagamandalam': 'Tamil Nadu',
-    'ooty': 'Tamil Nadu',
-    'hosur': 'Tamil Nadu',
-    'nagercoil': 'Tamil Nadu',
-    'kanchipuram': 'Tamil Nadu',
-    'kumarapalayam': 'Tamil Nadu',
-    'karaikkudi': 'Tamil Nadu',
-    'neyveli': 'Tamil Nadu',
-    'cuddalore': 'Tamil Nadu',
-    'kumbakonam': 'Tamil Nadu',
-    'tiruvannamalai': 'Tamil Nadu',
-    'pollachi': 'Tamil Nadu',
-    'rajapalayam': 'Tamil Nadu',
-    'gudiyatham': 'Tamil Nadu',
-    'pudukkottai': 'Tamil Nadu',
-    'vaniyambadi': 'Tamil Nadu',
-    'ambur': 'Tamil Nadu',
-    'nagapattinam': 'Tamil Nadu',
-    'kanyakumari': 'Tamil Nadu',
-    'tiruvallur': 'Tamil Nadu',
-    'villupuram': 'Tamil Nadu',
-    'ariyalur': 'Tamil Nadu',
-    'perambalur': 'Tamil Nadu',
-    'krishnagiri': 'Tamil Nadu',
-    'dharmapuri': 'Tamil Nadu',
-    'namakkal': 'Tamil Nadu',
-    'virudhunagar': 'Tamil Nadu',
-    'sivaganga': 'Tamil Nadu',
-    'ramnad': 'Tamil Nadu',
-    'ramanathapuram': 'Tamil Nadu',
-    'theni': 'Tamil Nadu',
-    'tenkasi': 'Tamil Nadu',
-    'tirupattur': 'Tamil Nadu',
-    'chengalpattu': 'Tamil Nadu',
-    'kallakurichi': 'Tamil Nadu',
-    'mayiladuthurai': 'Tamil Nadu',
-
-    # Telangana
-    'hyderabad': 'Telangana',
-    'warangal': 'Telangana',
-    'nizamabad': 'Telangana',
-    'karimnagar': 'Telangana',
-    'ramagundam': 'Telangana',
-    'khammam': 'Telangana',
-    'mahbubnagar': 'Telangana',
-    'nalgonda': 'Telangana',
-    'adilabad': 'Telangana',
-    'suryapet': 'Telangana',
-    'siddipet': 'Telangana',
-    'miryalaguda': 'Telangana',
-    'jagtial': 'Telangana',
-    'mancherial': 'Telangana',
-    'nirmal': 'Telangana',
-    'kamareddy': 'Telangana',
-    'bodhan': 'Telangana',
-    'armoor': 'Telangana',
-    'kothagudem': 'Telangana',
-    'sangareddy': 'Telangana',
-    'medak': 'Telangana',
-    'vikarabad': 'Telangana',
-    'wanaparthy': 'Telangana',
-    'gadwal': 'Telangana',
-    'narayanpet': 'Telangana',
-    'secunderabad': 'Telangana',
-    'rangareddy': 'Telangana',
-    'medchal': 'Telangana',
-
-    # Tripura
-    'agartala': 'Tripura',
-    'dharmanagar': 'Tripura',
-    'kailashahar': 'Tripura',
-    'belonia': 'Tripura',
-    'ambassa': 'Tripura',
-    'khowai': 'Tripura',
-    'teliamura': 'Tripura',
-    'sabroom': 'Tripura',
-
-    # Uttar Pradesh
-    'lucknow': 'Uttar Pradesh',
-    'kanpur': 'Uttar Pradesh',
-    'ghaziabad': 'Uttar Pradesh',
-    'agra': 'Uttar Pradesh',
-    'varanasi': 'Uttar Pradesh',
-    'banaras': 'Uttar Pradesh',
-    'meerut': 'Uttar Pradesh',
-    'prayagraj': 'Uttar Pradesh',
-    'allahabad': 'Uttar Pradesh',
-    'bareilly': 'Uttar Pradesh',
-    'aligarh': 'Uttar Pradesh',
-    'moradabad': 'Uttar Pradesh',
-    'saharanpur': 'Uttar Pradesh',
-    'gorakhpur': 'Uttar Pradesh',
-    'noida': 'Uttar Pradesh',
-    'greater noida': 'Uttar Pradesh',
-    'firozabad': 'Uttar Pradesh',
-    'jhansi': 'Uttar Pradesh',
-    'muzaffarnagar': 'Uttar Pradesh',
-    'mathura': 'Uttar Pradesh',
-    'budaun': 'Uttar Pradesh',
-    'badaun': 'Uttar Pradesh',
-    'rampur': 'Uttar Pradesh',
-    'shahjahanpur': 'Uttar Pradesh',
-    'farrukhabad': 'Uttar Pradesh',
-    'mau': 'Uttar Pradesh',
-    'hapur': 'Uttar Pradesh',
-    'etawah': 'Uttar Pradesh',
-    'mirzapur': 'Uttar Pradesh',
-    'bulandshahr': 'Uttar Pradesh',
-    'sambhal': 'Uttar Pradesh',
-    'amroha': 'Uttar Pradesh',
-    'hardoi': 'Uttar Pradesh',
-    'fatehpur': 'Uttar Pradesh',
-    'raebareli': 'Uttar Pradesh',
-    'orai': 'Uttar Pradesh',
-    'sitapur': 'Uttar Pradesh',
-    'bahraich': 'Uttar Pradesh',
-    'modinagar': 'Uttar Pradesh',
-    'unnao': 'Uttar Pradesh',
-    'jaunpur': 'Uttar Pradesh',
-    'hathras': 'Uttar Pradesh',
-    'banda': 'Uttar Pradesh',
-    'pilibhit': 'Uttar Pradesh',
-    'barabanki': 'Uttar Pradesh',
-    'khurja': 'Uttar Pradesh',
-    'gonda': 'Uttar Pradesh',
-    'mainpuri': 'Uttar Pradesh',
-    'lalitpur': 'Uttar Pradesh',
-    'etah': 'Uttar Pradesh',
-    'deoria': 'Uttar Pradesh',
-    'sultanpur': 'Uttar Pradesh',
-    'azamgarh': 'Uttar Pradesh',
-    'bijnor': 'Uttar Pradesh',
-    'basti': 'Uttar Pradesh',
-    'chandausi': 'Uttar Pradesh',
-    'akbarpur': 'Uttar Pradesh',
-    'ballia': 'Uttar Pradesh',
-    'ghazipur': 'Uttar Pradesh',
-    'faizabad': 'Uttar Pradesh',
-    'ayodhya': 'Uttar Pradesh',
-    'kasganj': 'Uttar Pradesh',
-    'shikohabad': 'Uttar Pradesh',
-    'kheri': 'Uttar Pradesh',
-    'lakhimpur kheri': 'Uttar Pradesh',
-    'sonbhadra': 'Uttar Pradesh',
-    'bhadohi': 'Uttar Pradesh',
-    'sant ravidas nagar': 'Uttar Pradesh',
-    'chandauli': 'Uttar Pradesh',
-    'ambedkar nagar': 'Uttar Pradesh',
-    'amethi': 'Uttar Pradesh',
-    'auraiya': 'Uttar Pradesh',
-    'kannauj': 'Uttar Pradesh',
-    'kanpur dehat': 'Uttar Pradesh',
-    'kaushambi': 'Uttar Pradesh',
-    'kushinagar': 'Uttar Pradesh',
-    'mahoba': 'Uttar Pradesh',
-    'shamli': 'Uttar Pradesh',
-    'shrawasti': 'Uttar Pradesh',
-
-    # Uttarakhand
-    'dehradun': 'Uttarakhand',
-    'haridwar': 'Uttarakhand',
-    'roorkee': 'Uttarakhand',
-    'haldwani': 'Uttarakhand',
-    'kashipur': 'Uttarakhand',
-    'rudrapur': 'Uttarakhand',
-    'rishikesh': 'Uttarakhand',
-    'pithoragarh': 'Uttarakhand',
-    'kotdwar': 'Uttarakhand',
-    'ramnagar': 'Uttarakhand',
-    'almora': 'Uttarakhand',
-    'nainital': 'Uttarakhand',
-    'mussoorie': 'Uttarakhand',
-    'pauri': 'Uttarakhand',
-    'tehri': 'Uttarakhand',
-    'chamoli': 'Uttarakhand',
-    'champawat': 'Uttarakhand',
-    'bageshwar': 'Uttarakhand',
-    'uttarkashi': 'Uttarakhand',
-    'udham singh nagar': 'Uttarakhand',
-
-    # West Bengal
-    'kolkata': 'West Bengal',
-    'calcutta': 'West Bengal',
-    'howrah': 'West Bengal',
-    'asansol': 'West Bengal',
-    'siliguri': 'West Bengal',
-    'durgapur': 'West Bengal',
-    'bardhaman': 'West Bengal',
-    'burdwan': 'West Bengal',
-    'malda': 'West Bengal',
-    'baharampur': 'West Bengal',
-    'habra': 'West Bengal',
-    'kharagpur': 'West Bengal',
-    'shantipur': 'West Bengal',
-    'dankuni': 'West Bengal',
-    'dhulian': 'West Bengal',
-    'ranaghat': 'West Bengal',
-    'haldia': 'West Bengal',
-    'raiganj': 'West Bengal',
-    'krishnanagar': 'West Bengal',
-    'nabadwip': 'West Bengal',
-    'medinipur': 'West Bengal',
-    'midnapore': 'West Bengal',
-    'jalpaiguri': 'West Bengal',
-    'balurghat': 'West Bengal',
-    'basirhat': 'West Bengal',
-    'bankura': 'West Bengal',
-    'barrackpore': 'West Bengal',
-    'barasat': 'West Bengal',
-    'kalyani': 'West Bengal',
-    'bongaon': 'West Bengal',
-    'alipurduar': 'West Bengal',
-    'cooch behar': 'West Bengal',
-    'purulia': 'West Bengal',
-    'darjeeling': 'West Bengal',
-    'kalimpong': 'West Bengal',
-    'hooghly': 'West Bengal',
-    'serampore': 'West Bengal',
-    'chandannagar': 'West Bengal',
-    'north 24 parganas': 'West Bengal',
-    'south 24 parganas': 'West Bengal',
-    'murshidabad': 'West Bengal',
-    'nadia': 'West Bengal',
-    'birbhum': 'West Bengal',
-    'jhargram': 'West Bengal',
-
-    # Union Territories
-    # Delhi
-    'delhi': 'Delhi',
-    'new delhi': 'Delhi',
-    'north delhi': 'Delhi',
-    'south delhi': 'Delhi',
-    'east delhi': 'Delhi',
-    'west delhi': 'Delhi',
-    'central delhi': 'Delhi',
-    'shahdara': 'Delhi',
-    'rohini': 'Delhi',
-
-    # Jammu & Kashmir
-    'srinagar': 'Jammu & Kashmir',
-    'jammu': 'Jammu & Kashmir',
-    'anantnag': 'Jammu & Kashmir',
-    'sopore': 'Jammu & Kashmir',
-    'baramulla': 'Jammu & Kashmir',
-    'kathua': 'Jammu & Kashmir',
-    'udhampur': 'Jammu & Kashmir',
-    'poonch': 'Jammu & Kashmir',
-    'rajouri': 'Jammu & Kashmir',
-    'kupwara': 'Jammu & Kashmir',
-    'pulwama': 'Jammu & Kashmir',
-    'budgam': 'Jammu & Kashmir',
-    'ganderbal': 'Jammu & Kashmir',
-    'bandipora': 'Jammu & Kashmir',
-    'kulgam': 'Jammu & Kashmir',
-    'shopian': 'Jammu & Kashmir',
-    'doda': 'Jammu & Kashmir',
-    'kishtwar': 'Jammu & Kashmir',
-    'ramban': 'Jammu & Kashmir',
-    'reasi': 'Jammu & Kashmir',
-    'samba': 'Jammu & Kashmir',
-
-    # Ladakh
-    'leh': 'Ladakh',
-    'kargil': 'Ladakh',
-
-    # Chandigarh
-    'chandigarh': 'Chandigarh',
-
-    # Puducherry
-    'puducherry': 'Puducherry',
-    'pondicherry': 'Puducherry',
-    'karaikal': 'Puducherry',
-    'mahe': 'Puducherry',
-    'yanam': 'Puducherry',
-
-    # Andaman and Nicobar Islands
-    'port blair': 'Andaman and Nicobar Islands',
-
-    # Lakshadweep
-    'kavaratti': 'Lakshadweep',
-    'lakshadweep': 'Lakshadweep',
-
-    # Dadra and Nagar Haveli and Daman and Diu
-    'silvassa': 'Dadra and Nagar Haveli and Daman and Diu',
-    'daman': 'Dadra and Nagar Haveli and Daman and Diu',
-    'diu': 'Dadra and Nagar Haveli and Daman and Diu',
-    'dadra': 'Dadra and Nagar Haveli and Daman and Diu',
-    'nagar haveli': 'Dadra and Nagar Haveli and Daman and Diu',
+# Nominatim endpoints and their request policies, loaded on first lookup
+geocoders = None
+
+# Artifacts derived from the final records, written after students.json
+DERIVED_ARTIFACTS = [
+    ('facets.json', write_facet_index),
+    ('search-index.json', write_search_index),
+    ('directory.db', write_sqlite_export),
+    ('students.rollidx', write_roll_index),
+    # Last, so it picks up the artifacts written above
+    ('data-manifest.json', publish_assets),
+]
+
+# Static place -> state mappings live in scripts/data/*.tsv and are loaded
+# lazily (see placeMappings.py). These names are kept for importers.
+_LAZY_MAPPINGS = {
+    'CITY_STATE_MAP': 'city_state',
+    'DISTRICT_STATE_MAP': 'district_state',
+    'ALL_MAPPINGS': 'all_mappings',
+    'STATE_NAME_VARIATIONS': 'state_names',
 }
 
-# Additional district-based mappings
-DISTRICT_STATE_MAP = {
-    'kanpur nagar': 'Uttar Pradesh',
-    'kanpur dehat': 'Uttar Pradesh',
-    'gautam buddha nagar': 'Uttar Pradesh',
-    'gautam buddh nagar': 'Uttar Pradesh',
-    'sant kabir nagar': 'Uttar Pradesh',
-    'maharajganj': 'Uttar Pradesh',
-    'siddharthnagar': 'Uttar Pradesh',
-    'balrampur': 'Uttar Pradesh',
-    'bilaspur': 'Chhattisgarh',  # Note: Also in HP but more common for CG
-}
 
-# Merge all mappings
-ALL_MAPPINGS = {**CITY_STATE_MAP, **DISTRICT_STATE_MAP}
-
-# Indian state name variations for normalization
-STATE_NAME_VARIATIONS = {
-    'andhra pradesh': 'Andhra Pradesh',
-    'arunachal pradesh': 'Arunachal Pradesh',
-    'assam': 'Assam',
-    'bihar': 'Bihar',
-    'chhattisgarh': 'Chhattisgarh',
-    'chattisgarh': 'Chhattisgarh',
-    'goa': 'Goa',
-    'gujarat': 'Gujarat',
-    'haryana': 'Haryana',
-    'himachal pradesh': 'Himachal Pradesh',
-    'jharkhand': 'Jharkhand',
-    'karnataka': 'Karnataka',
-    'kerala': 'Kerala',
-    'madhya pradesh': 'Madhya Pradesh',
-    'maharashtra': 'Maharashtra',
-    'manipur': 'Manipur',
-    'meghalaya': 'Meghalaya',
-    'mizoram': 'Mizoram',
-    'nagaland': 'Nagaland',
-    'odisha': 'Odisha',
-    'orissa': 'Odisha',
-    'punjab': 'Punjab',
-    'rajasthan': 'Rajasthan',
-    'sikkim': 'Sikkim',
-    'tamil nadu': 'Tamil Nadu',
-    'tamilnadu': 'Tamil Nadu',
-    'telangana': 'Telangana',
-    'tripura': 'Tripura',
-    'uttar pradesh': 'Uttar Pradesh',
-    'uttarakhand': 'Uttarakhand',
-    'uttaranchal': 'Uttarakhand',
-    'west bengal': 'West Bengal',
-    'delhi': 'Delhi',
-    'new delhi': 'Delhi',
-    'nct of delhi': 'Delhi',
-    'national capital territory of delhi': 'Delhi',
-    'jammu and kashmir': 'Jammu & Kashmir',
-    'jammu & kashmir': 'Jammu & Kashmir',
-    'jammu kashmir': 'Jammu & Kashmir',
-    'ladakh': 'Ladakh',
-    'chandigarh': 'Chandigarh',
-    'puducherry': 'Puducherry',
-    'pondicherry': 'Puducherry',
-    'andaman and nicobar islands': 'Andaman and Nicobar Islands',
-    'andaman and nicobar': 'Andaman and Nicobar Islands',
-    'andaman & nicobar islands': 'Andaman and Nicobar Islands',
-    'lakshadweep': 'Lakshadweep',
-    'dadra and nagar haveli and daman and diu': 'Dadra and Nagar Haveli and Daman and Diu',
-    'dadra and nagar haveli': 'Dadra and Nagar Haveli and Daman and Diu',
-    'daman and diu': 'Dadra and Nagar Haveli and Daman and Diu',
-    'daman & diu': 'Dadra and Nagar Haveli and Daman and Diu',
-}
+def __getattr__(name):
+    if name in _LAZY_MAPPINGS:
+        return load_mappings()[_LAZY_MAPPINGS[name]]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_ssl_context() -> ssl.SSLContext:
+    """SSL context that doesn't verify certificates (for IITK's certificate), created on first use"""
+    global ssl_context
+    if ssl_context is None:
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+    return ssl_context
+
+
+def make_cache_entry(state: str, source: str, ts: float = None, origin: str = None) -> dict:
+    """
+    Geocode cache entry; an empty state is a negative (not found) result.
+    origin names the machine that paid for the answer (see mergeGeocodeCache.py)
+    """
+    entry = {
+        'state': state,
+        'kind': 'positive' if state else 'negative',
+        'source': source,
+        'ts': int(time.time() if ts is None else ts),
+    }
+    if origin:
+        entry['origin'] = origin
+    return entry
+
+
+def upgrade_cache_entry(value) -> dict:
+    """
+    Accept both entry dicts and the legacy bare "State" strings. Legacy
+    entries get ts 0, so legacy negatives are retried on the next run.
+    """
+    if isinstance(value, dict):
+        return value
+    return make_cache_entry(value or '', 'legacy', ts=0)
+
+
+def cache_entry_expired(entry: dict, now: float = None) -> bool:
+    if entry['kind'] != 'negative':
+        return False
+    return (time.time() if now is None else now) - entry.get('ts', 0) >= NEGATIVE_CACHE_TTL
+
+
+def cache_get_entry(key: str):
+    """Cache entry for key, None if missing or expired"""
+    with geocode_cache_lock:
+        entry = geocode_cache.get(key)
+    if entry is None or cache_entry_expired(entry):
+        return None
+    return entry
+
+
+def cache_get(key: str):
+    """Cached state for key ('' for a live negative), None if missing or expired"""
+    entry = cache_get_entry(key)
+    return None if entry is None else entry['state']
+
+
+def cache_put(key: str, state: str, source: str):
+    with geocode_cache_lock:
+        geocode_cache[key] = make_cache_entry(state, source, origin=CACHE_ORIGIN)
+
+
+def read_geocode_cache(path: Path = CACHE_FILE) -> dict:
+    """Read a cache file into entry dicts (legacy files are upgraded)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return {key: upgrade_cache_entry(value) for key, value in json.load(f).items()}
+
+
+def write_geocode_cache(cache: dict, path: Path = CACHE_FILE):
+    """Write a cache file atomically"""
+    tmp_file = path.with_name(path.name + '.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, path)
 
 
 def load_geocode_cache():
@@ -1049,18 +218,30 @@ def load_geocode_cache():
     global geocode_cache
     if CACHE_FILE.exists():
         try:
-            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                geocode_cache = json.load(f)
-            print(f'Loaded {len(geocode_cache)} cached city-state mappings')
+            geocode_cache = read_geocode_cache(CACHE_FILE)
+            expired = sum(1 for entry in geocode_cache.values() if cache_entry_expired(entry))
+            print(f'Loaded {len(geocode_cache)} cached city-state mappings '
+                  f'({expired} expired negative results will be retried)')
         except Exception:
             geocode_cache = {}
 
 
 def save_geocode_cache():
     """Save geocode cache to file"""
+    # Snapshot under the lock: worker threads may still be adding entries
+    with geocode_cache_lock:
+        snapshot = dict(geocode_cache)
+    # Keep what other runs saved since this one loaded the file (newest entry wins)
+    try:
+        on_disk = read_geocode_cache(CACHE_FILE) if CACHE_FILE.exists() else {}
+    except Exception:
+        on_disk = {}
+    for key, entry in on_disk.items():
+        ours = snapshot.get(key)
+        if ours is None or entry.get('ts', 0) > ours.get('ts', 0):
+            snapshot[key] = entry
     try:
-        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(geocode_cache, f, indent=2, ensure_ascii=False)
+        write_geocode_cache(snapshot, CACHE_FILE)
     except Exception as e:
         print(f'\nWarning: Could not save cache: {e}')
 
@@ -1070,149 +251,490 @@ def normalize_state_name(state: str) -> str:
     if not state:
         return ''
     normalized = state.lower().strip()
-    return STATE_NAME_VARIATIONS.get(normalized, state.title())
+    return load_mappings()['state_names'].get(normalized, state.title())
 
 
 def geocode_with_nominatim(query: str) -> str:
     """
     Use Nominatim (OpenStreetMap) API to geocode a location and extract state.
-    Rate limited to 1 request per second as per Nominatim usage policy.
+    The public instance is rate limited to 1 request per second as per its
+    usage policy; a local instance can be configured in geocoders.json.
     """
     global last_nominatim_call
     
     if not query or query.strip() == '':
         return ''
+
+    # Never spend a request (or a cache entry) on placeholder input
+    if is_junk_hometown(query, normalize_hometown(query), load_mappings()):
+        return ''
     
     # Check cache first
     cache_key = query.lower().strip()
-    with geocode_cache_lock:
-        if cache_key in geocode_cache:
-            return geocode_cache[cache_key]
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return cached
     
-    # Rate limiting for Nominatim (1 request per second)
-    with nominatim_lock:
-        current_time = time.time()
-        time_since_last = current_time - last_nominatim_call
-        if time_since_last < NOMINATIM_DELAY:
-            time.sleep(NOMINATIM_DELAY - time_since_last)
-        
-        try:
-            # Add "India" to improve accuracy
-            search_query = f"{query}, India"
-            encoded_query = urllib.parse.quote(search_query)
-            url = f"https://nominatim.openstreetmap.org/search?q={encoded_query}&format=json&addressdetails=1&limit=1&countrycodes=in"
-            
-            req = urllib.request.Request(
-                url,
-                headers={
-                    'User-Agent': 'IITK-Student-Directory/1.0 (Educational Purpose)',
-                    'Accept': 'application/json'
-                }
-            )
-            
-            with urllib.request.urlopen(req, timeout=10) as response:
-                data = json.loads(response.read().decode('utf-8'))
-                
-                if data and len(data) > 0:
-                    address = data[0].get('address', {})
-                    
-                    # Try to get state from different fields
-                    state = (
-                        address.get('state') or 
-                        address.get('state_district') or 
-                        address.get('region') or
-                        ''
-                    )
-                    
-                    if state:
-                        normalized_state = normalize_state_name(state)
-                        
-                        # Cache the result
-                        with geocode_cache_lock:
-                            geocode_cache[cache_key] = normalized_state
-                        
-                        last_nominatim_call = time.time()
-                        return normalized_state
-            
-            # Cache empty result to avoid repeated lookups
-            with geocode_cache_lock:
-                geocode_cache[cache_key] = ''
-            
-            last_nominatim_call = time.time()
-            return ''
-            
-        except Exception as e:
-            last_nominatim_call = time.time()
-            return ''
+    # Rate limits, parallelism and fallback are per endpoint (see geocoders.py)
+    try:
+        # Add "India" to improve accuracy
+        state = geocoder_pool().lookup(f"{query}, India")
+    except GeocoderError:
+        # Request failures are not cached at all
+        last_nominatim_call = time.time()
+        return ''
 
+    normalized_state = normalize_state_name(state) if state else ''
+    # Empty results are cached too, to avoid repeated lookups (until they expire)
+    cache_put(cache_key, normalized_state, 'nominatim')
+    last_nominatim_call = time.time()
+    return normalized_state
 
-def get_state_from_hometown(hometown: str, use_api_fallback: bool = True) -> str:
-    """Map hometown/city to state using static mapping and API fallback"""
-    if not hometown or hometown.strip() == '':
-        return ''
-    
-    # Normalize: lowercase, remove special chars
-    normalized = re.sub(r'[^a-z0-9\s]', '', hometown.lower()).strip()
-    
-    # Check cache first
-    with geocode_cache_lock:
-        if normalized in geocode_cache:
-            return geocode_cache[normalized]
-    
+
+def geocoder_pool() -> GeocoderPool:
+    """Configured geocoder endpoints, loaded from GEOCODERS_FILE on first use"""
+    global geocoders
+    if geocoders is None:
+        geocoders = load_geocoders(GEOCODERS_FILE)
+    return geocoders
+
+
+NON_ALNUM_RE = re.compile(r'[^a-z0-9\s]')
+# Context words looked at around an ambiguous place name ("uttar pradesh" is 2)
+CONTEXT_MAX_WORDS = 3
+# Take an ambiguous place's most likely state without context from this prior
+AMBIGUOUS_PRIOR_ACCEPT = 0.8
+# Indian PIN code: 6 digits, first non-zero, sometimes written "208 016"
+PIN_RE = re.compile(r'(?<!\d)([1-9]\d{2})\s?(\d{3})(?!\d)')
+
+
+def normalize_hometown(hometown: str) -> str:
+    """Normalize: lowercase, remove special chars"""
+    return NON_ALNUM_RE.sub('', hometown.lower()).strip()
+
+
+def normalize_hometowns(hometowns: list) -> list:
+    """
+    Normalize many hometowns at once, with pandas' vectorized string
+    operations when pandas is installed (same result as normalize_hometown)
+    """
+    try:
+        import pandas as pd
+    except ImportError:
+        return [normalize_hometown(h) for h in hometowns]
+    series = pd.Series(hometowns, dtype=object)
+    return series.str.lower().str.replace(NON_ALNUM_RE.pattern, '', regex=True).str.strip().tolist()
+
+
+# Junk detection thresholds (on the letters of the normalized hometown)
+JUNK_MIN_LETTERS = 3  # "na", "x"
+JUNK_MIN_ENTROPY = 1.0  # bits per letter: "hjhhj"
+JUNK_NO_VOWEL_LENGTH = 5  # vowel-less mashes; shorter ones are station codes (cnb, njp)
+
+
+def _letter_entropy(letters: str) -> float:
+    counts = {}
+    for c in letters:
+        counts[c] = counts.get(c, 0) + 1
+    n = len(letters)
+    return -sum(k / n * math.log2(k / n) for k in counts.values())
+
+
+def is_junk_hometown(hometown: str, normalized: str, mappings: dict) -> bool:
+    """
+    Cheap check for placeholder/garbage hometowns ("xxx", "none", emails, ...)
+    so they are never scanned, sent to Nominatim or cached. Known place and
+    state names and strings with a PIN code are never junk.
+    """
+    if '@' in hometown:
+        return True
+    if normalized in mappings['all_mappings'] or normalized in mappings['state_names']:
+        return False
+    if is_listed_junk(' '.join(normalized.split()), mappings):
+        return True
+    if PIN_RE.search(normalized):
+        return False
+
+    letters = ''.join(c for c in normalized if 'a' <= c <= 'z')
+    if len(letters) < JUNK_MIN_LETTERS:
+        return True
+    # Repeated letters: "xxx" at any length, low entropy from 4 letters up
+    # (three-letter names like "ara" legitimately repeat a letter)
+    if len(set(letters)) == 1:
+        return True
+    if len(letters) > 3 and _letter_entropy(letters) < JUNK_MIN_ENTROPY:
+        return True
+    if len(letters) >= JUNK_NO_VOWEL_LENGTH and not any(c in 'aeiouy' for c in letters):
+        return True
+    return False
+
+
+# Resolution method -> confidence that the resolved state is right.
+# Cache hits are "cache_<source>" (nominatim, audit, legacy).
+METHOD_CONFIDENCE = {
+    'pin_exact': 0.98,
+    'exact': 0.95,
+    'comma_part': 0.9,
+    'state_name': 0.9,
+    'cache_audit': 0.9,
+    'pin_prefix': 0.85,
+    # Ambiguous place name settled by a PIN, state or other place in the string
+    'disambiguated': 0.85,
+    # ... or, without context, by its prior (at least AMBIGUOUS_PRIOR_ACCEPT)
+    'ambiguous_prior': 0.75,
+    'nominatim': 0.7,
+    'cache_nominatim': 0.7,
+    'partial': 0.6,
+    'nominatim_first_part': 0.6,
+    'cache_legacy': 0.6,
+    'state_fuzzy': 0.5,
+    # Loose substring hit on a place name this short ("una", "chas") is
+    # usually a coincidence inside a longer name
+    'partial_short': 0.3,
+}
+PARTIAL_SHORT_LENGTH = 4
+
+
+def resolution_confidence(state: str, method: str) -> float:
+    """Confidence of a (state, method) result; 0 when unresolved"""
+    if not state:
+        return 0.0
+    return METHOD_CONFIDENCE.get(method, 0.5)
+
+
+def state_from_pin(text: str, mappings: dict) -> tuple:
+    """
+    (state, method) for the first PIN code in text: exact lookup in the PIN
+    directory when one is installed ('pin_exact'), else by 3-digit prefix
+    ('pin_prefix'). ('', '') when there is no PIN or its prefix is shared by
+    several states.
+    """
+    for match in PIN_RE.finditer(text):
+        pin = match.group(1) + match.group(2)
+        if pin in mappings['pin_states']:
+            return mappings['pin_states'][pin], 'pin_exact'
+        state = mappings['pin_prefix_states'].get(match.group(1))
+        if state:
+            return state, 'pin_prefix'
+    return '', ''
+
+
+class HometownQuery:
+    """One hometown as the resolver stages see it (comma parts split lazily)"""
+    __slots__ = ('hometown', 'normalized', 'shape', '_parts')
+
+    def __init__(self, hometown: str, normalized: str):
+        self.hometown = hometown
+        self.normalized = normalized
+        self.shape = input_shape(hometown, normalized)
+        self._parts = None
+
+    @property
+    def parts(self) -> list:
+        if self._parts is None:
+            self._parts = [NON_ALNUM_RE.sub('', p.strip().lower()) for p in self.hometown.split(',')]
+        return self._parts
+
+
+# Resolver stages: (query, mappings) -> (state, method), or None to pass on
+
+def _phrases(tokens: list):
+    """(start, end, phrase) for the word n-grams of tokens, longest first"""
+    for n in range(min(CONTEXT_MAX_WORDS, len(tokens)), 0, -1):
+        for i in range(len(tokens) - n + 1):
+            yield i, i + n, ' '.join(tokens[i:i + n])
+
+
+def context_states(segments: list, mappings: dict) -> list:
+    """
+    States named by the words around an ambiguous place: state names and
+    abbreviations first, then other mapped places (districts, towns)
+    """
+    named, places = [], []
+    for segment in segments:
+        for _, _, phrase in _phrases(segment):
+            state = mappings['state_names'].get(phrase) or mappings['state_abbreviations'].get(phrase)
+            if state:
+                named.append(state)
+            elif len(phrase) > PARTIAL_SHORT_LENGTH and phrase not in mappings['ambiguous_places']:
+                state = mappings['all_mappings'].get(phrase)
+                if state:
+                    places.append(state)
+    return named + places
+
+
+def disambiguate_place(normalized: str, mappings: dict):
+    """
+    (state, method) when normalized names a place from ambiguous_places.tsv,
+    None otherwise (also when a longer mapped place such as "north lakhimpur"
+    contains the name). The rest of the string decides: a PIN code, then a state
+    name or abbreviation, then another known place ('disambiguated'; a
+    candidate state is preferred, but an explicit other state wins over the
+    priors). Without context the top candidate is taken when its prior is at
+    least AMBIGUOUS_PRIOR_ACCEPT ('ambiguous_prior'); otherwise the result is
+    ('', 'ambiguous'), which only the Nominatim stages may settle.
+    """
+    ambiguous = mappings['ambiguous_places']
+    if not ambiguous:
+        return None
+    tokens = normalized.split()
+    match = next(((start, end, phrase) for start, end, phrase in _phrases(tokens)
+                  if phrase in ambiguous), None)
+    if match is None:
+        return None
+    start, end, place = match
+    # A longer single-state place containing the name ("north lakhimpur
+    # district"): the exact/partial stages resolve that one
+    all_mappings = mappings['all_mappings']
+    for n in range(len(tokens), end - start, -1):
+        for i in range(max(0, end - n), min(start, len(tokens) - n) + 1):
+            phrase = ' '.join(tokens[i:i + n])
+            if phrase in all_mappings and phrase not in ambiguous:
+                return None
+    candidates = ambiguous[place]
+
+    evidence = []
+    pin_state, _ = state_from_pin(normalized, mappings)
+    if pin_state:
+        evidence.append(pin_state)
+    evidence.extend(context_states([tokens[:start], tokens[end:]], mappings))
+    if evidence:
+        names = {state for state, _ in candidates}
+        return next((state for state in evidence if state in names), evidence[0]), 'disambiguated'
+
+    state, prior = candidates[0]
+    if prior >= AMBIGUOUS_PRIOR_ACCEPT:
+        return state, 'ambiguous_prior'
+    return '', 'ambiguous'
+
+
+def _stage_cache(query: HometownQuery, mappings: dict):
+    entry = cache_get_entry(query.normalized)
+    if entry is not None:
+        return entry['state'], f"cache_{entry['source']}"
+    return None
+
+
+def _stage_ambiguous(query: HometownQuery, mappings: dict):
+    # Place names shared by several states, before the single-state lookups
+    return disambiguate_place(query.normalized, mappings)
+
+
+def _stage_exact(query: HometownQuery, mappings: dict):
     # Direct match in static mapping
-    if normalized in ALL_MAPPINGS:
-        return ALL_MAPPINGS[normalized]
-    
-    # Try to find partial match
-    for city, state in ALL_MAPPINGS.items():
+    state = mappings['all_mappings'].get(query.normalized)
+    return (state, 'exact') if state else None
+
+
+def _stage_pin(query: HometownQuery, mappings: dict):
+    # PIN code in the string (O(1), no network)
+    state, method = state_from_pin(query.normalized, mappings)
+    return (state, method) if state else None
+
+
+def _stage_partial(query: HometownQuery, mappings: dict):
+    normalized = query.normalized
+    for city, state in mappings['all_mappings'].items():
         if city in normalized or normalized in city:
-            return state
-    
-    # Try splitting by comma (format: "City, State" or "City, District, State")
-    parts = [re.sub(r'[^a-z0-9\s]', '', p.strip().lower()) for p in hometown.split(',')]
-    for part in parts:
-        if part in ALL_MAPPINGS:
-            return ALL_MAPPINGS[part]
-    
-    # Check if any part is a state name directly
-    for part in parts:
+            return state, 'partial_short' if len(city) <= PARTIAL_SHORT_LENGTH else 'partial'
+    return None
+
+
+def _stage_comma_part(query: HometownQuery, mappings: dict):
+    # "City, State" or "City, District, State"
+    for part in query.parts:
+        if part in mappings['all_mappings']:
+            return mappings['all_mappings'][part], 'comma_part'
+    return None
+
+
+def _stage_state_name_part(query: HometownQuery, mappings: dict):
+    # Any part is a state name directly
+    for part in query.parts:
         normalized_part = normalize_state_name(part)
-        if normalized_part in STATE_NAME_VARIATIONS.values():
-            return normalized_part
-    
-    # Check if last part is a state name
-    if len(parts) > 1:
-        last_part = parts[-1].strip()
-        if last_part in STATE_NAME_VARIATIONS:
-            return STATE_NAME_VARIATIONS[last_part]
-        
-        state_names = list(set(ALL_MAPPINGS.values()))
-        for state in state_names:
-            if last_part in state.lower() or state.lower() in last_part:
-                return state
-    
-    # Use Nominatim API as fallback
+        if normalized_part in mappings['canonical_states']:
+            return normalized_part, 'state_name'
+    return None
+
+
+def _stage_last_part_state(query: HometownQuery, mappings: dict):
+    last_part = query.parts[-1].strip()
+    if last_part in mappings['state_names']:
+        return mappings['state_names'][last_part], 'state_name'
+    return None
+
+
+def _stage_state_fuzzy(query: HometownQuery, mappings: dict):
+    last_part = query.parts[-1].strip()
+    for state in mappings['mapped_states']:
+        if last_part in state.lower() or state.lower() in last_part:
+            return state, 'state_fuzzy'
+    return None
+
+
+def _stage_nominatim(query: HometownQuery, mappings: dict):
+    state = geocode_with_nominatim(query.hometown)
+    return (state, 'nominatim') if state else None
+
+
+def _stage_nominatim_first_part(query: HometownQuery, mappings: dict):
+    # Just the city name
+    first = query.parts[0]
+    state = geocode_with_nominatim(first) if first else ''
+    return (state, 'nominatim_first_part') if state else None
+
+
+ADAPTIVE_STAGES = True
+_stage_chains = None
+
+
+def stage_chains() -> dict:
+    """
+    The resolver's stage chains, built once:
+    - key:   stages that only look at the normalized string (memoizable);
+             an ambiguous place name without context ends here with
+             ('', 'ambiguous') and skips the parts stages, whose comma-part
+             lookup would just take its single mapped state
+    - parts: stages on the comma-separated parts of the raw string
+    - api:   Nominatim lookups, only run when the API fallback is on
+    A comma-part lookup cannot hit without a comma (the single part is the
+    normalized key, which the exact stage already missed), and the
+    last-part stages need a comma by definition.
+    """
+    global _stage_chains
+    if _stage_chains is None:
+        # Exact and PIN lookups probe the same key; both can hit only if a
+        # mapped place name itself contains a PIN code
+        lookup = None if any(PIN_RE.search(key) for key in load_mappings()['all_mappings']) else 'lookup'
+        _stage_chains = {
+            'key': StageChain([
+                Stage('cache', _stage_cache),
+                Stage('ambiguous', _stage_ambiguous),
+                Stage('exact', _stage_exact, group=lookup),
+                Stage('pin', _stage_pin, requires='digit', group=lookup),
+                Stage('partial', _stage_partial),
+            ], adaptive=ADAPTIVE_STAGES),
+            'parts': StageChain([
+                Stage('comma_part', _stage_comma_part, requires='comma'),
+                Stage('state_name_part', _stage_state_name_part),
+                Stage('last_part_state', _stage_last_part_state, requires='comma'),
+                Stage('state_fuzzy', _stage_state_fuzzy, requires='comma'),
+            ], adaptive=ADAPTIVE_STAGES),
+            'api': StageChain([
+                Stage('nominatim', _stage_nominatim),
+                Stage('nominatim_first_part', _stage_nominatim_first_part),
+            ], adaptive=False),
+        }
+    return _stage_chains
+
+
+def _resolve_rest(query: HometownQuery, mappings: dict, use_api_fallback: bool) -> tuple:
+    """Comma part, state name and (optionally) API stages after a key miss"""
+    chains = stage_chains()
+    result = chains['parts'].run(query, mappings)
+    if result is None and use_api_fallback:
+        result = chains['api'].run(query, mappings)
+    return result or ('', 'unresolved')
+
+
+def _resolve_ambiguous(query: HometownQuery, mappings: dict, use_api_fallback: bool) -> tuple:
+    """An ambiguous place name the offline stages could not settle: network only"""
     if use_api_fallback:
-        state = geocode_with_nominatim(hometown)
-        if state:
-            return state
-        
-        # Try with just the first part (city name)
-        if parts and parts[0]:
-            state = geocode_with_nominatim(parts[0])
-            if state:
-                return state
+        result = stage_chains()['api'].run(query, mappings)
+        if result is not None:
+            return result
+    return '', 'ambiguous'
+
+
+def resolve_hometown(hometown: str, use_api_fallback: bool = True) -> tuple:
+    """
+    Map hometown/city to (state, method) using static mapping and API
+    fallback. method is '' for an empty hometown, 'junk' for placeholders,
+    'ambiguous' for a place name shared by several states that neither the
+    string's context nor the network settled, and 'unresolved' when no stage
+    found a state.
+    """
+    if not hometown or hometown.strip() == '':
+        return '', ''
     
-    return ''
+    mappings = load_mappings()
+    normalized = normalize_hometown(hometown)
+
+    if is_junk_hometown(hometown, normalized, mappings):
+        return '', 'junk'
+
+    query = HometownQuery(hometown, normalized)
+    result = stage_chains()['key'].run(query, mappings)
+    if result is None:
+        return _resolve_rest(query, mappings, use_api_fallback)
+    if result[1] == 'ambiguous':
+        return _resolve_ambiguous(query, mappings, use_api_fallback)
+    return result
+
+
+def get_state_from_hometown(hometown: str, use_api_fallback: bool = True) -> str:
+    """Map hometown/city to state using static mapping and API fallback"""
+    return resolve_hometown(hometown, use_api_fallback)[0]
+
+
+def resolve_many_detailed(hometowns, use_api_fallback: bool = False) -> list:
+    """
+    (state, method) for many hometowns; same results as calling
+    resolve_hometown on each, in input order.
+
+    Each distinct raw string is normalized once (in bulk) and resolved once;
+    the key stages (cache/exact/PIN/partial), which only see the normalized
+    string, run once per distinct normalized string.
+    """
+    hometowns = [h or '' for h in hometowns]
+    unique = list(dict.fromkeys(hometowns))
+    mappings = load_mappings()
+    key_chain = stage_chains()['key']
+
+    by_normalized = {}
+    resolved = {}
+    for hometown, normalized in zip(unique, normalize_hometowns(unique)):
+        if hometown.strip() == '':
+            resolved[hometown] = ('', '')
+            continue
+        if is_junk_hometown(hometown, normalized, mappings):
+            resolved[hometown] = ('', 'junk')
+            continue
+
+        query = HometownQuery(hometown, normalized)
+        if normalized in by_normalized:
+            result = by_normalized[normalized]
+        else:
+            result = key_chain.run(query, mappings)
+            # API lookups below can fill the cache for this key, so a miss is
+            # only reusable when they are off
+            if result is not None or not use_api_fallback:
+                by_normalized[normalized] = result
+
+        if result is None:
+            result = _resolve_rest(query, mappings, use_api_fallback)
+        elif result[1] == 'ambiguous':
+            result = _resolve_ambiguous(query, mappings, use_api_fallback)
+        resolved[hometown] = result
+
+    return [resolved[h] for h in hometowns]
+
+
+def resolve_many(hometowns, use_api_fallback: bool = False) -> list:
+    """
+    Map many hometowns to states; same results as calling
+    get_state_from_hometown on each, in input order.
+    """
+    return [state for state, _ in resolve_many_detailed(hometowns, use_api_fallback)]
 
 
 def fetch_hometown(roll_no: str) -> str:
     """Fetch hometown from IITK OA API"""
-    url = f"https://oa.iitk.ac.in/Oa/servlet/AutocompleteServlet?action=complete&id={roll_no}"
+    url = f"{OA_SERVLET_URL}?action=complete&id={roll_no}"
     
     try:
         req = urllib.request.Request(url)
-        with urllib.request.urlopen(req, timeout=10, context=ssl_context) as response:
+        with urllib.request.urlopen(req, timeout=OA_TIMEOUT, context=get_ssl_context()) as response:
             data = response.read().decode('utf-8')
             
             # Parse XML response to extract Home_town
@@ -1224,140 +746,238 @@ def fetch_hometown(roll_no: str) -> str:
         return ''
 
 
+def resolution_fields(state: str, method: str) -> dict:
+    """homestate plus its provenance, as stored on each record"""
+    return {
+        'homestate': state,
+        'homestate_method': method,
+        'homestate_confidence': resolution_confidence(state, method),
+    }
+
+
 def process_student(student: dict, use_api_fallback: bool = False) -> dict:
     """Process a single student - fetch hometown and map state"""
     roll_no = student.get('roll', '')
     
     # Skip if no roll number
     if not roll_no:
-        return {**student, 'hometown': '', 'homestate': ''}
+        return {**student, 'hometown': '', **resolution_fields('', '')}
     
     hometown = fetch_hometown(roll_no)
-    homestate = get_state_from_hometown(hometown, use_api_fallback=use_api_fallback)
+    state, method = resolve_hometown(hometown, use_api_fallback=use_api_fallback)
     
-    return {**student, 'hometown': hometown, 'homestate': homestate}
-
+    return {**student, 'hometown': hometown, **resolution_fields(state, method)}
 
-def main():
-    global geocode_cache
-    
-    print('=' * 60)
-    print('IITK Student Hometown & State Population Script')
-    print('=' * 60)
-    print()
 
-    # Load geocode cache
-    load_geocode_cache()
+def set_resolution(record: StudentRecord, state: str, method: str):
+    """Store homestate and its provenance on a record in place"""
+    record.homestate = intern_value(state)
+    record.homestate_method = intern_value(method)
+    record.homestate_confidence = resolution_confidence(state, method)
 
-    # Read students.json
-    print('Reading students.json...')
-    try:
-        with open(STUDENTS_FILE, 'r', encoding='utf-8') as f:
-            students = json.load(f)
-        print(f'Loaded {len(students)} students')
-    except Exception as e:
-        print(f'Error reading students.json: {e}')
-        return
 
-    # Stats
-    total_students = len(students)
-    processed = 0
+def run_fetch_phase(records: list, resolve_detailed, time_budget: float = None,
+                    fetch_times: dict = None) -> list:
+    """
+    Phase 1: fetch hometowns from the OA API and resolve them offline (in
+    place), most valuable first (see fetchScheduler.py). With time_budget
+    (seconds) no fetch starts after the deadline; the students not reached
+    keep their stored hometown and homestate.
+
+    fetch_times (roll -> last fetch time) orders the fetches and is updated
+    in place; loading and saving oa_fetch_times.json is up to the caller,
+    so runs on stub data (loadTest.py) leave it alone.
+    """
+    total_students = len(records)
     hometown_found = 0
-    state_mapped = 0
 
     print()
     print('Phase 1: Fetching hometown data from IITK OA API...')
     print('(Using static mapping only)')
+    if time_budget is not None:
+        print(f'(Time budget: {time_budget:g}s)')
     print()
 
-    updated_students = []
+    # Students without a roll number keep an empty hometown
+    targets = [i for i, record in enumerate(records) if not record.roll]
+    for i in targets:
+        records[i].hometown = ''
 
-    # Phase 1: Process with thread pool for concurrency (static mapping only)
+    fetched_at = fetch_times if fetch_times is not None else {}
+    scheduler = FetchScheduler(records, fetched_at, time_budget)
+    processed = total_students - scheduler.total
+
+    # Keep only a few fetches queued, so the order and the deadline hold
     with ThreadPoolExecutor(max_workers=CONCURRENT_LIMIT) as executor:
-        # Submit all tasks
-        future_to_student = {executor.submit(process_student, student, False): i 
-                           for i, student in enumerate(students)}
-        
-        # Process results as they complete
-        for future in as_completed(future_to_student):
-            idx = future_to_student[future]
-            try:
-                result = future.result()
-                updated_students.append((idx, result))
-                
+        future_to_student = {}
+
+        def submit_next():
+            while len(future_to_student) < 2 * CONCURRENT_LIMIT:
+                idx = scheduler.next()
+                if idx is None:
+                    return
+                future_to_student[executor.submit(fetch_hometown, records[idx].roll)] = idx
+
+        submit_next()
+        while future_to_student:
+            done, _ = wait(future_to_student, return_when=FIRST_COMPLETED)
+            for future in done:
+                idx = future_to_student.pop(future)
+                try:
+                    records[idx].hometown = intern_value(future.result())
+                except Exception as e:
+                    print(f'\nError processing student {idx}: {e}')
+                    records[idx].hometown = ''
+                fetched_at[records[idx].roll] = round(time.time(), 3)
+                targets.append(idx)
+
                 processed += 1
-                if result.get('hometown'):
+                if records[idx].hometown:
                     hometown_found += 1
-                if result.get('homestate'):
-                    state_mapped += 1
-                
+
                 # Progress update every 100 students
                 if processed % 100 == 0 or processed == total_students:
                     pct = (processed / total_students) * 100
                     print(f'\rProgress: {processed}/{total_students} ({pct:.1f}%) | '
-                          f'Hometown found: {hometown_found} | State mapped: {state_mapped}', 
+                          f'Hometown found: {hometown_found}',
                           end='', flush=True)
-                
+
                 # Small delay for rate limiting
                 time.sleep(API_DELAY)
-                
-            except Exception as e:
-                print(f'\nError processing student {idx}: {e}')
-                updated_students.append((idx, {**students[idx], 'hometown': '', 'homestate': ''}))
+            submit_next()
 
-    # Sort by original index to maintain order
-    updated_students.sort(key=lambda x: x[0])
-    phase1_students = [s[1] for s in updated_students]
+    # Resolve the fetched hometowns in one batch (each distinct hometown once)
+    results = resolve_detailed([records[i].hometown for i in targets])
+    for i, (state, method) in zip(targets, results):
+        set_resolution(records[i], state, method)
 
+    state_mapped = sum(1 for state, _ in results if state)
     print('\n')
+    if len(scheduler):
+        print(f'Time budget reached: {len(scheduler)} of {scheduler.total} students not fetched '
+              f'(stored hometowns kept)')
     print(f'Phase 1 complete: {state_mapped} of {hometown_found} hometowns mapped')
-    
-    # Phase 2: Use Nominatim API for unmapped hometowns
-    unmapped = [(i, s) for i, s in enumerate(phase1_students) 
-                if s.get('hometown') and not s.get('homestate')]
-    
-    if unmapped:
-        print()
-        print(f'Phase 2: Using Nominatim API for {len(unmapped)} unmapped cities...')
+    return records
+
+
+def save_fetch_times_or_warn(fetch_times: dict):
+    try:
+        save_fetch_times(fetch_times)
+    except Exception as e:
+        print(f'Warning: could not save fetch times: {e}')
+
+
+def run_reresolve_phase(records: list, threshold: float, resolve_detailed) -> list:
+    """
+    Phase 1 without fetching: re-resolve offline only the stored hometowns
+    whose confidence is below threshold (or was never recorded). Returns the
+    indices of the records that were rerun.
+    """
+    targets = [i for i, r in enumerate(records)
+               if r.hometown and (r.homestate_confidence or 0.0) < threshold]
+
+    print()
+    print(f'Phase 1: Re-resolving {len(targets)} hometowns with confidence below {threshold}...')
+    print('(Using stored hometowns and static mapping only)')
+
+    results = resolve_detailed([records[i].hometown for i in targets])
+    changed = 0
+    for i, (state, method) in zip(targets, results):
+        if state != records[i].homestate:
+            changed += 1
+        set_resolution(records[i], state, method)
+
+    print()
+    print(f'Phase 1 complete: {changed} of {len(targets)} states changed')
+    return targets
+
+
+def run_nominatim_phase(records: list, resolve_detailed, indices=None) -> int:
+    """Phase 2: Nominatim lookups for records (or just indices) still unmapped"""
+    if indices is None:
+        indices = range(len(records))
+    unmapped = [i for i in indices
+                if records[i].hometown and not records[i].homestate]
+    if not unmapped:
+        return 0
+
+    # Look up each distinct hometown once
+    by_hometown = {}
+    for orig_idx in unmapped:
+        by_hometown.setdefault(records[orig_idx].hometown, []).append(orig_idx)
+
+    print()
+    print(f'Phase 2: Using Nominatim API for {len(by_hometown)} unmapped cities '
+          f'({len(unmapped)} students)...')
+    workers = geocoder_pool().parallelism()
+    if workers > 1:
+        print(f'({workers} lookups in parallel, per-endpoint rate limits apply)')
+    else:
         print('(This will be slower due to API rate limiting - 1 req/sec)')
-        print()
-        
-        nominatim_mapped = 0
-        for idx, (orig_idx, student) in enumerate(unmapped):
-            hometown = student.get('hometown', '')
-            homestate = get_state_from_hometown(hometown, use_api_fallback=True)
+    print()
+    
+    nominatim_mapped = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        future_to_hometown = {executor.submit(resolve_detailed, [hometown], True): hometown
+                              for hometown in by_hometown}
+        for idx, future in enumerate(as_completed(future_to_hometown)):
+            group = by_hometown[future_to_hometown[future]]
+            try:
+                state, method = future.result()[0]
+            except Exception as e:
+                print(f'\nError resolving {future_to_hometown[future]!r}: {e}')
+                state, method = '', 'unresolved'
             
-            if homestate:
-                phase1_students[orig_idx]['homestate'] = homestate
-                nominatim_mapped += 1
-                state_mapped += 1
+            if state:
+                for orig_idx in group:
+                    set_resolution(records[orig_idx], state, method)
+                nominatim_mapped += len(group)
             
             # Progress update
-            if (idx + 1) % 10 == 0 or idx + 1 == len(unmapped):
-                print(f'\rNominatim progress: {idx + 1}/{len(unmapped)} | '
+            if (idx + 1) % 10 == 0 or idx + 1 == len(by_hometown):
+                print(f'\rNominatim progress: {idx + 1}/{len(by_hometown)} | '
                       f'Newly mapped: {nominatim_mapped}', 
                       end='', flush=True)
-        
-        print('\n')
-        print(f'Phase 2 complete: {nominatim_mapped} additional cities mapped')
-        
-        # Save cache after Nominatim lookups
-        save_geocode_cache()
-
-    final_students = phase1_students
     
+    print('\n')
+    print(f'Phase 2 complete: {nominatim_mapped} additional cities mapped')
+    for row in geocoder_pool().stats():
+        if row['requests']:
+            print(f"  {row['endpoint']}: {row['requests']} requests, {row['errors']} errors, "
+                  f"{row['mean_ms']:.0f} ms mean")
+    if geocoder_pool().hedges:
+        print(f'  {geocoder_pool().hedges} slow requests hedged')
+    return nominatim_mapped
+
+
+def print_summary(records: list):
+    processed = len(records)
+    hometown_found = sum(1 for r in records if r.hometown)
+    state_mapped = sum(1 for r in records if r.hometown and r.homestate)
+
     # Find still unmapped
-    still_unmapped = [(s.get('roll'), s.get('hometown')) 
-                      for s in final_students 
-                      if s.get('hometown') and not s.get('homestate')]
+    still_unmapped = [(r.roll, r.hometown) 
+                      for r in records 
+                      if r.hometown and not r.homestate]
+
+    by_method = {}
+    for r in records:
+        if r.hometown:
+            method = r.homestate_method or 'unresolved'
+            by_method[method] = by_method.get(method, 0) + 1
     
     print()
     print('=' * 60)
     print('Summary:')
     print('=' * 60)
     print(f'Total students processed: {processed}')
-    print(f'Hometown found: {hometown_found} ({(hometown_found / processed) * 100:.1f}%)')
+    print(f'Hometown found: {hometown_found} ({(hometown_found / processed) * 100:.1f}%)' if processed else 'Hometown found: 0')
     print(f'State mapped: {state_mapped} ({(state_mapped / hometown_found) * 100:.1f}% of found hometowns)' if hometown_found else 'State mapped: 0')
+
+    if by_method:
+        print('\nResolution methods:')
+        for method, count in sorted(by_method.items(), key=lambda item: -item[1]):
+            print(f'  {method:<22} {count:>6}  (confidence {METHOD_CONFIDENCE.get(method, 0.0):.2f})')
     
     if still_unmapped:
         print(f'\nStill unmapped ({len(still_unmapped)}):')
@@ -1368,19 +988,173 @@ def main():
     
     print()
 
-    # Write back to file
+
+def write_outputs(records: list) -> bool:
+    """Write students.json and the aggregation cube, then the derived artifacts"""
+    # Records become plain dicts only here, for serialization; the cube is
+    # counted in the same pass
+    cube = CubeBuilder()
+    students = []
+    for record in records:
+        student = record.to_dict()
+        cube.add(student)
+        students.append(student)
+
     print('Writing updated students.json...')
     try:
-        with open(STUDENTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(final_students, f, indent=4, ensure_ascii=False)
+        # Replace atomically: watchers and the dev server never see a partial file
+        tmp_file = STUDENTS_FILE.with_name(STUDENTS_FILE.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(students, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_file, STUDENTS_FILE)
         print('Successfully wrote students.json')
     except Exception as e:
         print(f'Error writing students.json: {e}')
-        return
+        return False
 
+    print('Writing aggregates.json...')
+    try:
+        write_cube(cube.build())
+        print('Successfully wrote aggregates.json')
+    except Exception as e:
+        print(f'Error writing aggregates.json: {e}')
+
+    for name, write_artifact in DERIVED_ARTIFACTS:
+        print(f'Writing {name}...')
+        try:
+            write_artifact(students)
+            print(f'Successfully wrote {name}')
+        except Exception as e:
+            print(f'Error writing {name}: {e}')
+    return True
+
+
+def main():
+    global geocoders
+
+    parser = argparse.ArgumentParser(description='Fetch hometowns and map them to states')
+    parser.add_argument('--resolver', metavar='URL',
+                        help='use a running resolver daemon (e.g. http://127.0.0.1:8765)')
+    parser.add_argument('--reresolve-below', type=float, metavar='CONFIDENCE',
+                        help='skip fetching; re-resolve stored hometowns below this confidence')
+    parser.add_argument('--time-budget', type=float, metavar='SECONDS',
+                        help='stop starting OA fetches after this long (most valuable students first)')
+    parser.add_argument('--stage-stats', action='store_true',
+                        help='print per-stage hit rates and costs of the resolver')
+    parser.add_argument('--geocoders', type=Path, metavar='PATH',
+                        help=f'geocoder endpoint config (default: {GEOCODERS_FILE.name} if present)')
+    parser.add_argument('--hedge-after', type=float, metavar='SECONDS',
+                        help='also send lookups slower than this to the next endpoint')
+    parser.add_argument('--profile', type=Path, metavar='DIR',
+                        help='sample all threads and write per-phase wall/CPU flamegraph stacks to DIR')
+    parser.add_argument('--change-feed', type=Path, default=changeFeed.CHANGE_FEED_FILE, metavar='PATH',
+                        help=f'append per-student changes to this JSONL feed (default: {changeFeed.CHANGE_FEED_FILE.name})')
+    parser.add_argument('--no-change-feed', action='store_true', help='do not append to the change feed')
+    args = parser.parse_args()
+    
+    print('=' * 60)
+    print('IITK Student Hometown & State Population Script')
+    print('=' * 60)
     print()
-    print('Done!')
 
+    # Resolve through the daemon when one is running, locally otherwise
+    client = None
+    if args.resolver:
+        from resolverDaemon import ResolverClient
+        client = ResolverClient(args.resolver)
+        if client.available():
+            print(f'Using resolver daemon at {args.resolver}')
+        else:
+            print(f'Resolver daemon not reachable at {args.resolver}, resolving locally')
+            client = None
+    resolve_detailed = client.resolve_many_detailed if client else resolve_many_detailed
+
+    # Load geocode cache (the daemon keeps its own)
+    if not client:
+        load_geocode_cache()
+
+    if args.geocoders:
+        if not args.geocoders.exists():
+            print(f'Error: geocoder config {args.geocoders} not found')
+            return
+        geocoders = load_geocoders(args.geocoders)
+    if args.hedge_after is not None:
+        geocoder_pool().hedge_after = args.hedge_after
+
+    profiler = SamplingProfiler().start() if args.profile else None
+    phase = profiler.phase if profiler else (lambda name: nullcontext())
+    try:
+        run_pipeline(args, client, resolve_detailed, phase)
+    finally:
+        if profiler:
+            profiler.stop()
+            written = profiler.write(args.profile)
+            print()
+            print(profiler.summary())
+            print(f'Wrote {", ".join(p.name for p in written)} ({profiler.samples} samples) to {args.profile}')
+
+
+def run_pipeline(args, client, resolve_detailed, phase):
+    """Load, Phase 1, Phase 2, summary and write, each inside phase(name)"""
+    # Read students.json
+    with phase('load'):
+        print('Reading students.json...')
+        try:
+            with open(STUDENTS_FILE, 'r', encoding='utf-8') as f:
+                students = json.load(f)
+            print(f'Loaded {len(students)} students')
+        except Exception as e:
+            print(f'Error reading students.json: {e}')
+            return
+
+        records = [StudentRecord.from_dict(student) for student in students]
+        del students
+        before = changeFeed.snapshot(records)
+
+    with phase('phase1'):
+        if args.reresolve_below is not None:
+            targets = run_reresolve_phase(records, args.reresolve_below, resolve_detailed)
+        else:
+            fetch_times = load_fetch_times()
+            run_fetch_phase(records, resolve_detailed, args.time_budget, fetch_times)
+            save_fetch_times_or_warn(fetch_times)
+            targets = None
+
+    with phase('phase2'):
+        # Phase 2: Use Nominatim API for unmapped hometowns
+        run_nominatim_phase(records, resolve_detailed, targets)
+
+        # Save cache after Nominatim lookups
+        if client:
+            client.flush()
+        else:
+            save_geocode_cache()
+
+    print_summary(records)
+    if args.stage_stats:
+        if client:
+            print('(stage statistics are kept by the daemon: GET /stats)')
+        else:
+            print(format_stage_stats(stage_chains()))
+        print()
+
+    # Write back to file
+    with phase('write'):
+        if not write_outputs(records):
+            return
+
+    # Only after students.json is written, so the feed never runs ahead of it
+    if not args.no_change_feed:
+        run_id = changeFeed.new_run_id()
+        try:
+            entries = changeFeed.record_changes(records, before, run_id)
+            count = changeFeed.append_changes(entries, args.change_feed)
+            print(f'Appended {count} changes to {args.change_feed.name} (run {run_id})')
+        except Exception as e:
+            print(f'Error appending to the change feed: {e}')
+
+    print()
+    print('Done!')
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Probe which student photos exist and optionally build WebP thumbnails
+
+Usage:
+    python scripts/probePhotos.py [--workers N] [--thumbnails] [--thumb-size PX]
+                                  [--oa-base URL] [--home-base URL]
+
+    --workers     concurrent requests (default 16); each worker keeps one
+                  keep-alive connection per host
+    --thumbnails  download the photo each card shows (home page photo, else
+                  the OA photo) and write a WebP thumbnail of it to
+                  public/thumbs/<hash>.webp (needs the optional Pillow
+                  package). The name is a hash of the photo bytes and the
+                  thumbnail settings, so unchanged photos are not re-encoded
+                  and the files can be cached as immutable
+    --thumb-size  longest side of the thumbnails in pixels (default 160)
+    --oa-base     scheme://host[:port] to use instead of the OA photo server
+    --home-base   scheme://host[:port] to use instead of home.iitk.ac.in
+                  (point both at stubServers.py to test locally)
+
+Both photo URLs the client uses (getOAImageUrl / getHomeImageUrl in
+src/lib/config.ts) are probed for every student, with HEAD (falling back to
+GET when HEAD is refused) and following redirects. A photo counts as
+available for a 200 response with an image Content-Type; home pages that
+answer 200 with HTML do not count. Each student gets:
+- photo_oa, photo_home: true/false (left as they were when the probe failed,
+  e.g. on a timeout, so a flaky run does not hide photos)
+- thumb: "thumbs/<hash>.webp", with --thumbnails
+
+students.json is written back through the population script's
+write_outputs, so the aggregation cube and every derived artifact (facets,
+search index, directory.db, students.rollidx, the published data files) are
+rebuilt from the same records.
+The client skips photos flagged false and shows thumb in the grid.
+Thumbnails no longer referenced by any student are removed.
+"""
+
+import argparse
+import hashlib
+import http.client
+import io
+import json
+import os
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from studentRecord import StudentRecord
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+SCRIPT_DIR = Path(__file__).parent
+PUBLIC_DIR = SCRIPT_DIR.parent / "public"
+STUDENTS_FILE = PUBLIC_DIR / "students.json"
+THUMBS_DIR_NAME = "thumbs"
+
+# Same URLs as getOAImageUrl / getHomeImageUrl in src/lib/config.ts
+OA_PHOTO_BASE = "https://oa.cc.iitk.ac.in"
+OA_PHOTO_PATH = "/Oa/Jsp/Photo/{roll}_0.jpg"
+HOME_PHOTO_BASE = "http://home.iitk.ac.in"
+HOME_PHOTO_PATH = "/~{username}/dp"
+
+DEFAULT_WORKERS = 16
+PROBE_TIMEOUT = 10  # seconds
+MAX_REDIRECTS = 3
+THUMB_SIZE = 160  # pixels, longest side
+THUMB_QUALITY = 75
+HASH_LENGTH = 16
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections, one per host for each worker thread"""
+
+    def __init__(self, timeout: float = PROBE_TIMEOUT, ssl_context=None):
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self._local = threading.local()
+
+    def _connection(self, scheme: str, netloc: str):
+        connections = self._local.__dict__.setdefault('connections', {})
+        conn = connections.get((scheme, netloc))
+        if conn is None:
+            if scheme == 'https':
+                conn = http.client.HTTPSConnection(netloc, timeout=self.timeout, context=self.ssl_context)
+            else:
+                conn = http.client.HTTPConnection(netloc, timeout=self.timeout)
+            connections[(scheme, netloc)] = conn
+        return conn
+
+    def _drop(self, scheme: str, netloc: str):
+        conn = self._local.__dict__.get('connections', {}).pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def request(self, method: str, url: str):
+        """(status, content type, body or None for HEAD), following redirects"""
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            target = parts.path + (f'?{parts.query}' if parts.query else '')
+            # A kept-alive connection may have been closed by the server since
+            # its last use; retry once on a fresh one
+            for attempt in range(2):
+                conn = self._connection(parts.scheme, parts.netloc)
+                try:
+                    conn.request(method, target or '/', headers={'User-Agent': 'Mozilla/5.0'})
+                    response = conn.getresponse()
+                    body = response.read()
+                    break
+                except (http.client.HTTPException, OSError):
+                    self._drop(parts.scheme, parts.netloc)
+                    if attempt:
+                        raise
+            if response.will_close:
+                self._drop(parts.scheme, parts.netloc)
+
+            location = response.getheader('Location')
+            if response.status in REDIRECT_STATUSES and location:
+                url = urllib.parse.urljoin(url, location)
+                method = 'GET' if response.status == 303 else method
+                continue
+            content_type = response.getheader('Content-Type') or ''
+            return response.status, content_type, body if method == 'GET' else None
+        raise http.client.HTTPException(f'too many redirects for {url}')
+
+
+def photo_urls(student: dict, oa_base: str = OA_PHOTO_BASE, home_base: str = HOME_PHOTO_BASE) -> dict:
+    """{'oa': url, 'home': url} for the photos the client would request"""
+    urls = {}
+    if student.get('roll'):
+        urls['oa'] = oa_base + OA_PHOTO_PATH.format(roll=urllib.parse.quote(str(student['roll'])))
+    if student.get('username'):
+        urls['home'] = home_base + HOME_PHOTO_PATH.format(username=urllib.parse.quote(student['username']))
+    return urls
+
+
+def is_photo(url: str, status: int, content_type: str) -> bool:
+    """Whether a response is a photo; server errors raise (they say nothing about the photo)"""
+    if status >= 500 or status == 429:
+        raise http.client.HTTPException(f'{status} from {url}')
+    return status == 200 and (not content_type or content_type.startswith('image/'))
+
+
+def probe(pool: ConnectionPool, url: str) -> bool:
+    """Whether url serves an image; raises on network and server errors"""
+    status, content_type, _ = pool.request('HEAD', url)
+    if status in (405, 501):
+        status, content_type, _ = pool.request('GET', url)
+    return is_photo(url, status, content_type)
+
+
+def make_thumbnail(data: bytes, size: int = THUMB_SIZE, quality: int = THUMB_QUALITY) -> bytes:
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert('RGB')
+        image.thumbnail((size, size))
+        out = io.BytesIO()
+        image.save(out, 'WEBP', quality=quality, method=6)
+    return out.getvalue()
+
+
+def thumbnail_name(data: bytes, size: int, quality: int) -> str:
+    digest = hashlib.sha256(data + f'|{size}|{quality}'.encode('ascii')).hexdigest()[:HASH_LENGTH]
+    return f'{digest}.webp'
+
+
+def fetch_thumbnail(pool: ConnectionPool, url: str, thumbs_dir: Path, size: int) -> str:
+    """Thumbnail path (relative to public/) for the photo at url, '' if it is gone"""
+    status, content_type, data = pool.request('GET', url)
+    if not is_photo(url, status, content_type) or not data:
+        return ''
+    name = thumbnail_name(data, size, THUMB_QUALITY)
+    path = thumbs_dir / name
+    if not path.exists():
+        # Several students can share a photo; give each writer its own temp file
+        tmp_path = path.with_name(f'{name}.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(make_thumbnail(data, size, THUMB_QUALITY))
+        os.replace(tmp_path, path)
+    return f'{THUMBS_DIR_NAME}/{name}'
+
+
+def _run(tasks: dict, workers: int, label: str) -> dict:
+    """Run {key: callable} on a thread pool; returns {key: result or exception}"""
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fn): key for key, fn in tasks.items()}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                results[futures[future]] = e
+            if done % 100 == 0 or done == len(futures):
+                print(f'\r{label}: {done}/{len(futures)}', end='', flush=True)
+    if futures:
+        print()
+    return results
+
+
+def probe_photos(students: list, pool: ConnectionPool, workers: int = DEFAULT_WORKERS,
+                 oa_base: str = OA_PHOTO_BASE, home_base: str = HOME_PHOTO_BASE) -> dict:
+    """Set photo_oa / photo_home on each student in place; returns counts"""
+    tasks = {}
+    for i, student in enumerate(students):
+        for kind, url in photo_urls(student, oa_base, home_base).items():
+            tasks[(i, kind)] = lambda url=url: probe(pool, url)
+
+    counts = {'oa': 0, 'home': 0, 'failed': 0}
+    for (i, kind), result in _run(tasks, workers, 'Probing photos').items():
+        if isinstance(result, Exception):
+            counts['failed'] += 1
+            continue
+        students[i][f'photo_{kind}'] = result
+        counts[kind] += result
+    return counts
+
+
+def build_thumbnails(students: list, pool: ConnectionPool, thumbs_dir: Path, size: int,
+                     workers: int = DEFAULT_WORKERS, oa_base: str = OA_PHOTO_BASE,
+                     home_base: str = HOME_PHOTO_BASE) -> dict:
+    """Set thumb on each student with a photo (home first, as the client); returns counts"""
+    thumbs_dir.mkdir(parents=True, exist_ok=True)
+    tasks = {}
+    for i, student in enumerate(students):
+        urls = photo_urls(student, oa_base, home_base)
+        kind = 'home' if student.get('photo_home') else 'oa' if student.get('photo_oa') else None
+        if kind:
+            tasks[i] = lambda url=urls[kind]: fetch_thumbnail(pool, url, thumbs_dir, size)
+        else:
+            student.pop('thumb', None)
+
+    counts = {'thumbs': 0, 'failed': 0}
+    for i, result in _run(tasks, workers, 'Building thumbnails').items():
+        if isinstance(result, Exception):
+            counts['failed'] += 1  # keep the previous thumbnail, if any
+        elif result:
+            students[i]['thumb'] = result
+            counts['thumbs'] += 1
+        else:
+            students[i].pop('thumb', None)
+
+    # Drop thumbnails of photos that changed or disappeared
+    live = {Path(s['thumb']).name for s in students if s.get('thumb')}
+    for path in thumbs_dir.glob('*.webp'):
+        if path.name not in live:
+            path.unlink()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Probe student photo availability and build thumbnails')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='concurrent requests')
+    parser.add_argument('--thumbnails', action='store_true', help='also build WebP thumbnails (needs Pillow)')
+    parser.add_argument('--thumb-size', type=int, default=THUMB_SIZE, help='thumbnail size in pixels')
+    parser.add_argument('--oa-base', default=OA_PHOTO_BASE, help='OA photo server (scheme://host[:port])')
+    parser.add_argument('--home-base', default=HOME_PHOTO_BASE, help='home page server (scheme://host[:port])')
+    args = parser.parse_args()
+
+    if args.thumbnails and Image is None:
+        print('Error: --thumbnails needs Pillow (pip install Pillow)')
+        return
+
+    print('Reading students.json...')
+    try:
+        with open(STUDENTS_FILE, 'r', encoding='utf-8') as f:
+            students = json.load(f)
+        print(f'Loaded {len(students)} students')
+    except Exception as e:
+        print(f'Error reading students.json: {e}')
+        return
+
+    # Same certificate handling as the OA servlet fetches, and the same write
+    from populateHometownState import get_ssl_context, write_outputs
+    pool = ConnectionPool(PROBE_TIMEOUT, get_ssl_context())
+    bases = {'oa_base': args.oa_base.rstrip('/'), 'home_base': args.home_base.rstrip('/')}
+
+    counts = probe_photos(students, pool, args.workers, **bases)
+    print(f"OA photos: {counts['oa']}, home page photos: {counts['home']}, "
+          f"failed probes: {counts['failed']} (flags left unchanged)")
+
+    if args.thumbnails:
+        thumbs = build_thumbnails(students, pool, PUBLIC_DIR / THUMBS_DIR_NAME, args.thumb_size,
+                                  args.workers, **bases)
+        print(f"Thumbnails: {thumbs['thumbs']} ({thumbs['failed']} downloads failed)")
+
+    # students.json plus everything derived from it, so no sidecar serves
+    # the records from before the probe
+    write_outputs([StudentRecord.from_dict(student) for student in students])
+
+
+if __name__ == '__main__':
+    main()
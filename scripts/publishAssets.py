@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Publish minified, content-hashed copies of the data files
+
+Usage:
+    python scripts/publishAssets.py [--public DIR]
+
+For each published JSON file (students.json, familytree.json and the derived
+indexes) this writes public/data/<name>.<hash>.json, minified JSON with hash = sha256
+of its bytes, and public/data-manifest.json mapping each logical name to its hashed path.
+The client fetches the small manifest first (revalidated on every load) and
+the hashed files can be cached as immutable, since any change to the data
+changes their URL. Hashed files no longer referenced by the manifest are
+removed. Compression is left to the host (Vercel compresses responses on the
+fly); the manifest records each file's gzip size for reference.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PUBLIC_DIR = SCRIPT_DIR.parent / "public"
+DATA_DIR_NAME = "data"
+MANIFEST_NAME = "data-manifest.json"
+
+MANIFEST_VERSION = 1
+HASH_LENGTH = 16
+
+# Files served to the client, in the public folder
+PUBLISHED_FILES = ['students.json', 'familytree.json', 'facets.json', 'search-index.json', 'aggregates.json']
+
+
+def minify_json(obj) -> bytes:
+    """Serialize without whitespace"""
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _write_bytes(path: Path, data: bytes):
+    """Write via a temp file so readers never see a partial asset"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_hashed_asset(name: str, data: bytes, data_dir: Path) -> dict:
+    """Write data under a content-hashed name"""
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    stem, suffix = os.path.splitext(name)
+    filename = f'{stem}.{digest}{suffix}'
+    path = data_dir / filename
+
+    entry = {
+        'path': f'{DATA_DIR_NAME}/{filename}',
+        'hash': digest,
+        'size': len(data),
+        'gzipSize': len(gzip.compress(data, compresslevel=6, mtime=0)),
+    }
+
+    # Same hash means same bytes, so existing files can be reused as-is
+    if not path.exists():
+        _write_bytes(path, data)
+    return entry
+
+
+def publish_assets(students: list = None, public_dir: Path = PUBLIC_DIR) -> dict:
+    """
+    Publish every file in PUBLISHED_FILES and write the manifest.
+    `students` may be passed to avoid re-reading students.json.
+    """
+    data_dir = public_dir / DATA_DIR_NAME
+    data_dir.mkdir(exist_ok=True)
+
+    assets = {}
+    for name in PUBLISHED_FILES:
+        if name == 'students.json' and students is not None:
+            obj = students
+        else:
+            source = public_dir / name
+            if not source.exists():
+                continue
+            with open(source, 'r', encoding='utf-8') as f:
+                obj = json.load(f)
+        assets[name] = write_hashed_asset(name, minify_json(obj), data_dir)
+
+    manifest = {'version': MANIFEST_VERSION, 'assets': assets}
+    _write_bytes(public_dir / MANIFEST_NAME,
+                 json.dumps(manifest, indent=2, ensure_ascii=False).encode('utf-8'))
+
+    # Drop hashed files from previous runs (and their old .gz/.br variants)
+    live = {Path(entry['path']).name for entry in assets.values()}
+    for path in data_dir.iterdir():
+        if path.name not in live:
+            path.unlink()
+
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Publish hashed data assets')
+    parser.add_argument('--public', type=Path, default=PUBLIC_DIR, help='public folder to publish from')
+    args = parser.parse_args()
+
+    manifest = publish_assets(public_dir=args.public)
+    for name, entry in manifest['assets'].items():
+        print(f'  {name} -> {entry["path"]} ({entry["size"]} B, gzip {entry["gzipSize"]} B)')
+
+
+if __name__ == '__main__':
+    main()
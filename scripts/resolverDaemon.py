@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Long-running hometown -> state resolver service
+
+Usage:
+    python scripts/resolverDaemon.py [--port PORT] [--flush-interval SECONDS] [--geocoders PATH]
+    python scripts/populateHometownState.py --resolver http://127.0.0.1:8765
+
+Loads the static mappings and the geocode cache once and answers lookups
+over localhost HTTP, so other tools (and repeated runs of the population
+script) skip the startup cost and share one warm cache:
+
+    GET  /health                              -> {"ok": true, "cached": N}
+    GET  /stats                               -> {"key": [per-stage stats], ...}
+    GET  /resolve?q=<hometown>&api=0|1        -> {"state": "..."}
+    POST /resolve  {"hometowns": [...], "api": false}
+                                              -> {"states": [...]}
+    POST /resolve  {"hometowns": [...], "api": false, "detailed": true}
+                                              -> {"results": [[state, method], ...]}
+    POST /flush                               -> {"ok": true}
+
+A malformed request gets 400 and a resolver failure 500, both as
+{"error": "..."}.
+
+Cache updates (new Nominatim answers) are written back to
+city_state_cache.json every --flush-interval seconds and on shutdown. Only
+one daemon should own the cache file at a time.
+"""
+
+import argparse
+import json
+import signal
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import populateHometownState as resolver
+from geocoders import load_geocoders
+from placeMappings import load_mappings
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_FLUSH_INTERVAL = 60.0  # seconds
+CLIENT_TIMEOUT = 30  # seconds; API lookups hold requests for ~1 s each
+
+
+class _CacheFlusher:
+    """Saves the geocode cache when Nominatim has been called since the last save"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._saved_marker = resolver.last_nominatim_call
+        # The timer and POST /flush both save; the cache file has one .tmp path
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def flush(self):
+        with self._lock:
+            marker = resolver.last_nominatim_call
+            if marker != self._saved_marker:
+                resolver.save_geocode_cache()
+                self._saved_marker = marker
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+
+class ResolverHandler(BaseHTTPRequestHandler):
+    server_version = 'HometownResolver/1.0'
+
+    def _send(self, status: int, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        params = urllib.parse.parse_qs(url.query)
+
+        if url.path == '/health':
+            self._send(200, {'ok': True, 'cached': len(resolver.geocode_cache)})
+        elif url.path == '/stats':
+            self._send(200, {name: chain.stats() for name, chain in resolver.stage_chains().items()})
+        elif url.path == '/resolve':
+            hometown = params.get('q', [''])[0]
+            use_api = params.get('api', ['0'])[0] == '1'
+            self._send(200, {'state': resolver.resolve_many([hometown], use_api)[0]})
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path == '/flush':
+            self.server.flusher.flush()
+            self._send(200, {'ok': True})
+            return
+        if self.path != '/resolve':
+            self._send(404, {'error': 'not found'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(body, dict):
+                raise ValueError('body must be a JSON object')
+            hometowns = body['hometowns']
+            if not isinstance(hometowns, list):
+                raise ValueError('hometowns must be a list')
+        except (ValueError, KeyError) as e:
+            self._send(400, {'error': f'bad request: {e}'})
+            return
+
+        use_api = bool(body.get('api', False))
+        try:
+            if body.get('detailed'):
+                results = resolver.resolve_many_detailed(hometowns, use_api)
+                payload = {'results': [list(r) for r in results]}
+            else:
+                payload = {'states': resolver.resolve_many(hometowns, use_api)}
+        except Exception as e:
+            self._send(500, {'error': f'resolver failed: {type(e).__name__}: {e}'})
+            return
+        self._send(200, payload)
+
+    def log_message(self, format, *args):
+        # Lookups are frequent; keep the console for errors only
+        pass
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+          flush_interval: float = DEFAULT_FLUSH_INTERVAL, geocoders_file=None):
+    """Load everything once and serve until interrupted"""
+    resolver.load_geocode_cache()
+    if geocoders_file:
+        resolver.geocoders = load_geocoders(geocoders_file)
+    mappings = load_mappings()
+    print(f'Loaded {len(mappings["all_mappings"])} static mappings')
+
+    server = ThreadingHTTPServer((host, port), ResolverHandler)
+    server.daemon_threads = True
+    server.flusher = _CacheFlusher(flush_interval)
+    server.flusher.start()
+
+    # Stop cleanly on SIGTERM too, so the final flush runs
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+
+    print(f'Resolver listening on http://{host}:{port} (Ctrl+C to stop)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('\nShutting down...')
+    finally:
+        server.server_close()
+        server.flusher.stop()
+        print('Resolver stopped')
+
+
+class ResolverClient:
+    """Client for a running resolver daemon"""
+
+    def __init__(self, url: str = f'http://{DEFAULT_HOST}:{DEFAULT_PORT}'):
+        self.url = url.rstrip('/')
+
+    def _request(self, path: str, body: dict = None) -> dict:
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        req = urllib.request.Request(
+            f'{self.url}{path}',
+            data=data,
+            headers={'Content-Type': 'application/json'},
+            method='POST' if data is not None else 'GET',
+        )
+        with urllib.request.urlopen(req, timeout=CLIENT_TIMEOUT) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def available(self) -> bool:
+        try:
+            return bool(self._request('/health').get('ok'))
+        except (urllib.error.URLError, OSError, ValueError):
+            return False
+
+    def resolve_many(self, hometowns, use_api_fallback: bool = False) -> list:
+        """Same contract as populateHometownState.resolve_many"""
+        body = {'hometowns': [h or '' for h in hometowns], 'api': use_api_fallback}
+        return self._request('/resolve', body)['states']
+
+    def resolve_many_detailed(self, hometowns, use_api_fallback: bool = False) -> list:
+        """Same contract as populateHometownState.resolve_many_detailed"""
+        body = {'hometowns': [h or '' for h in hometowns], 'api': use_api_fallback, 'detailed': True}
+        return [tuple(r) for r in self._request('/resolve', body)['results']]
+
+    def flush(self):
+        self._request('/flush', {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve hometown -> state lookups from a warm process')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='address to bind (keep it local)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='port to listen on')
+    parser.add_argument('--flush-interval', type=float, default=DEFAULT_FLUSH_INTERVAL,
+                        help='seconds between cache saves')
+    parser.add_argument('--geocoders', help='geocoder endpoint config (default: geocoders.json if present)')
+    args = parser.parse_args()
+    serve(args.host, args.port, args.flush_interval, args.geocoders)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Ordered chain of resolver stages with per-stage hit rate and cost tracking.
+
+A stage is a function (query, mappings) -> (state, method) that ends the
+chain, or None to pass to the next stage. The chain keeps call/hit/time
+counters per stage and per input shape (comma present, digit present, single
+token), and uses them in two ways that never change the answer:
+
+- a stage that declares `requires='digit'` (or 'comma') is skipped for inputs
+  without that feature, because it cannot hit on them;
+- adjacent stages sharing a `group` are known never to both hit on the same
+  input, so their relative order is irrelevant to the result. Within a group
+  the chain runs stages by expected cost per hit (mean cost / hit rate),
+  re-planned every REPLAN_EVERY lookups from the counters.
+
+Everything else runs in the configured order. Counters are updated without a
+lock; under concurrent use a few increments can be lost, which only makes
+the statistics approximate.
+"""
+
+import time
+from collections import namedtuple
+
+REPLAN_EVERY = 512
+
+InputShape = namedtuple('InputShape', 'comma digit single_token')
+
+
+def input_shape(hometown: str, normalized: str) -> InputShape:
+    return InputShape(
+        comma=',' in hometown,
+        digit=any(c.isdigit() for c in normalized),
+        single_token=' ' not in normalized.strip(),
+    )
+
+
+class Stage:
+    def __init__(self, name: str, run, requires: str = None, group: str = None):
+        self.name = name
+        self.run = run
+        self.requires = requires  # InputShape field the input must have
+        self.group = group  # adjacent stages in one group may be reordered
+
+    def __repr__(self):
+        return f'Stage({self.name!r})'
+
+
+class StageChain:
+    def __init__(self, stages: list, adaptive: bool = True):
+        self.stages = list(stages)
+        self.adaptive = adaptive
+        self._plans = {}  # InputShape -> ordered stages
+        self._counters = {}  # (stage name, InputShape) -> [calls, hits, ns]
+        self._runs = 0
+
+    def run(self, query, mappings: dict):
+        """First stage result for query (which must have a .shape), or None"""
+        self._runs += 1
+        if self.adaptive and self._runs % REPLAN_EVERY == 0:
+            self._plans = {}
+
+        shape = query.shape
+        plan = self._plans.get(shape)
+        if plan is None:
+            plan = self._plans[shape] = self._plan(shape)
+
+        for stage in plan:
+            counter = self._counters.get((stage.name, shape))
+            if counter is None:
+                counter = self._counters.setdefault((stage.name, shape), [0, 0, 0])
+            start = time.perf_counter_ns()
+            result = stage.run(query, mappings)
+            counter[2] += time.perf_counter_ns() - start
+            counter[0] += 1
+            if result is not None:
+                counter[1] += 1
+                return result
+        return None
+
+    def _cost_per_hit(self, stage: Stage, shape: InputShape) -> float:
+        calls, hits, ns = self._counters.get((stage.name, shape), (0, 0, 0))
+        if not calls:
+            return 0.0  # unmeasured: try it early so it gets measured
+        # Laplace-smoothed hit rate, so a stage that never hit is not infinite
+        return (ns / calls) / ((hits + 1) / (calls + 2))
+
+    def _plan(self, shape: InputShape) -> list:
+        stages = [s for s in self.stages if s.requires is None or getattr(shape, s.requires)]
+        if not self.adaptive:
+            return stages
+
+        plan = []
+        i = 0
+        while i < len(stages):
+            j = i + 1
+            while stages[i].group and j < len(stages) and stages[j].group == stages[i].group:
+                j += 1
+            run = stages[i:j]
+            if len(run) > 1:
+                run = sorted(run, key=lambda s: self._cost_per_hit(s, shape))
+            plan.extend(run)
+            i = j
+        return plan
+
+    def order(self, shape: InputShape) -> list:
+        """Stage names in the order the chain currently runs them for shape"""
+        return [s.name for s in self._plans.get(shape) or self._plan(shape)]
+
+    def stats(self) -> list:
+        """Per stage, totals over all shapes: calls, hits, hit rate, mean cost"""
+        rows = []
+        for stage in self.stages:
+            calls = hits = ns = 0
+            for (name, _), (c, h, t) in list(self._counters.items()):
+                if name == stage.name:
+                    calls, hits, ns = calls + c, hits + h, ns + t
+            rows.append({
+                'stage': stage.name,
+                'calls': calls,
+                'hits': hits,
+                'hit_rate': hits / calls if calls else 0.0,
+                'mean_us': ns / calls / 1000 if calls else 0.0,
+            })
+        return rows
+
+    def reset_stats(self):
+        self._counters = {}
+        self._plans = {}
+        self._runs = 0
+
+
+def format_stage_stats(chains: dict) -> str:
+    """Table of stats() for several named chains"""
+    lines = [f'{"stage":<28} {"calls":>8} {"hits":>8} {"hit rate":>9} {"mean cost":>11}']
+    for chain_name, chain in chains.items():
+        for row in chain.stats():
+            lines.append(f'{chain_name + "." + row["stage"]:<28} {row["calls"]:>8} {row["hits"]:>8} '
+                         f'{row["hit_rate"]:>8.1%} {row["mean_us"]:>8.1f} us')
+    return '\n'.join(lines)
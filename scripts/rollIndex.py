@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped roll number -> record index for point lookups
+
+Usage:
+    python scripts/rollIndex.py [--students PATH] [--out PATH]
+    python scripts/rollIndex.py --get 230001
+    python scripts/rollIndex.py --prefix 23
+
+Writes scripts/students.rollidx, a single binary file:
+
+    header   magic b'RIDX', version (u32), record count (u32),
+             key width (u32), blob offset (u64)
+    keys     count fixed-width slots, roll numbers sorted bytewise and
+             NUL-padded to the key width
+    offsets  count (u64 offset, u32 length) pairs into the blob
+    blob     each record as minified UTF-8 JSON
+
+RollIndex maps the file and binary searches the key table, so a lookup
+touches O(log n) keys and deserializes only the records it returns. Range
+scans by roll prefix ("all of batch 23") read one contiguous key range.
+"""
+
+import argparse
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+STUDENTS_FILE = SCRIPT_DIR.parent / "public" / "students.json"
+ROLL_INDEX_FILE = SCRIPT_DIR / "students.rollidx"
+
+MAGIC = b'RIDX'
+ROLL_INDEX_VERSION = 1
+HEADER = struct.Struct('<4sIIIQ')
+ENTRY = struct.Struct('<QI')
+
+
+def write_roll_index(students: list, path: Path = ROLL_INDEX_FILE) -> int:
+    """Write the roll index for students; returns the number of records"""
+    records = []
+    for student in students:
+        roll = str(student.get('roll') or '').strip()
+        if roll:
+            blob = json.dumps(student, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+            records.append((roll.encode('utf-8'), blob))
+    # Stable sort keeps duplicate rolls in file order
+    records.sort(key=lambda r: r[0])
+
+    key_width = max((len(k) for k, _ in records), default=1)
+    count = len(records)
+    blob_offset = HEADER.size + count * key_width + count * ENTRY.size
+
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, ROLL_INDEX_VERSION, count, key_width, blob_offset))
+        for key, _ in records:
+            f.write(key.ljust(key_width, b'\0'))
+        offset = 0
+        for _, blob in records:
+            f.write(ENTRY.pack(offset, len(blob)))
+            offset += len(blob)
+        for _, blob in records:
+            f.write(blob)
+    os.replace(tmp_path, path)
+    return count
+
+
+class _KeyView:
+    """Sequence view over the fixed-width key table, for bisect"""
+
+    def __init__(self, buf, start: int, count: int, width: int):
+        self.buf = buf
+        self.start = start
+        self.count = count
+        self.width = width
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        pos = self.start + i * self.width
+        return bytes(self.buf[pos:pos + self.width]).rstrip(b'\0')
+
+
+class RollIndex:
+    """Read-only, memory-mapped view of a roll index file"""
+
+    def __init__(self, path: Path = ROLL_INDEX_FILE):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file cannot be mapped
+            self._file.close()
+            raise ValueError(f'{path} is not a roll index')
+        magic, version, count, key_width, blob_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != ROLL_INDEX_VERSION:
+            self.close()
+            raise ValueError(f'{path} is not a version {ROLL_INDEX_VERSION} roll index')
+        self.count = count
+        self._keys = _KeyView(self._map, HEADER.size, count, key_width)
+        self._entries_start = HEADER.size + count * key_width
+        self._blob_offset = blob_offset
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _record(self, i: int) -> dict:
+        offset, length = ENTRY.unpack_from(self._map, self._entries_start + i * ENTRY.size)
+        start = self._blob_offset + offset
+        return json.loads(self._map[start:start + length])
+
+    def _range(self, prefix: bytes) -> range:
+        lo = bisect.bisect_left(self._keys, prefix)
+        # Every key with the prefix sorts below prefix + 0xff
+        hi = bisect.bisect_left(self._keys, prefix + b'\xff', lo)
+        return range(lo, hi)
+
+    def get(self, roll: str):
+        """Record for roll, or None (first one if the roll is duplicated)"""
+        key = str(roll).strip().encode('utf-8')
+        i = bisect.bisect_left(self._keys, key)
+        if i < self.count and self._keys[i] == key:
+            return self._record(i)
+        return None
+
+    def rolls_with_prefix(self, prefix: str) -> list:
+        """Roll numbers starting with prefix, without reading any record"""
+        return [self._keys[i].decode('utf-8') for i in self._range(str(prefix).encode('utf-8'))]
+
+    def scan_prefix(self, prefix: str):
+        """Yield records whose roll starts with prefix, in roll order"""
+        for i in self._range(str(prefix).encode('utf-8')):
+            yield self._record(i)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the memory-mapped roll index')
+    parser.add_argument('--students', type=Path, default=STUDENTS_FILE, help='students.json to index')
+    parser.add_argument('--out', type=Path, default=ROLL_INDEX_FILE, help='roll index to write/read')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--get', metavar='ROLL', help='print one record')
+    group.add_argument('--prefix', help='print all records whose roll starts with PREFIX')
+    args = parser.parse_args()
+
+    if args.get is None and args.prefix is None:
+        with open(args.students, 'r', encoding='utf-8') as f:
+            students = json.load(f)
+        count = write_roll_index(students, args.out)
+        print(f'Wrote roll index for {count} students to {args.out}')
+        return
+
+    with RollIndex(args.out) as index:
+        if args.get is not None:
+            record = index.get(args.get)
+            if record is None:
+                print(f'No student with roll {args.get}')
+                sys.exit(1)
+            print(json.dumps(record, indent=4, ensure_ascii=False))
+        else:
+            count = 0
+            for record in index.scan_prefix(args.prefix):
+                print(f'  - {record.get("roll")}: {record.get("name", "")}')
+                count += 1
+            print(f'{count} students')
+
+
+if __name__ == '__main__':
+    main()
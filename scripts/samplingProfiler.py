@@ -0,0 +1,141 @@
+"""
+Low-overhead sampling profiler covering every thread, split by phase.
+
+A background thread snapshots the stack of every other thread every
+`interval` seconds (sys._current_frames), so time spent in thread pool
+workers (fetch_hometown, Nominatim lookups) shows up, not just the main
+thread. Each sample is recorded twice:
+- wall: weighted by the sampling interval, whether the thread was running
+  or blocked (sleeping, waiting on a socket or a lock)
+- cpu:  weighted by the CPU time the thread used since the previous sample
+  (read from /proc on Linux; elsewhere the CPU profile stays empty)
+
+Stacks are rooted at the current phase and the thread's name (pool workers
+merged), and written in the folded format ("a;b;c <count>") that
+flamegraph.pl, speedscope and inferno read directly. Counts are
+microseconds.
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_INTERVAL = 0.005  # seconds
+_WORKER_SUFFIX_RE = re.compile(r'_\d+$')
+
+try:
+    _CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+except (AttributeError, ValueError, OSError):
+    _CLOCK_TICKS = 100
+
+
+def _thread_cpu_seconds(native_id: int):
+    """CPU time of a thread from /proc (Linux), None when unavailable"""
+    try:
+        with open(f'/proc/self/task/{native_id}/stat', 'rb') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # Fields after the parenthesized command name; utime and stime are 14 and 15
+    fields = stat[stat.rfind(b')') + 2:].split()
+    return (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+
+
+def _frame_label(code) -> str:
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.wall = {}  # folded stack -> microseconds
+        self.cpu = {}
+        self.phases = {}  # phase -> {'wall': s, 'cpu': s}
+        self.samples = 0
+        self._phase = 'startup'
+        self._last_cpu = {}  # thread ident -> cpu seconds at the last sample
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Attribute samples taken inside the block to phase `name`"""
+        previous, self._phase = self._phase, name
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            totals = self.phases.setdefault(name, {'wall': 0.0, 'cpu': 0.0})
+            totals['wall'] += time.perf_counter() - wall_start
+            totals['cpu'] += time.process_time() - cpu_start
+            self._phase = previous
+
+    def _run(self):
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed_us = int((now - last) * 1e6)
+            last = now
+            self._sample(own, elapsed_us)
+
+    def _sample(self, own: int, elapsed_us: int):
+        threads = {t.ident: t for t in threading.enumerate()}
+        phase = self._phase
+        self.samples += 1
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            thread = threads.get(ident)
+            name = _WORKER_SUFFIX_RE.sub('', thread.name) if thread else f'thread-{ident}'
+
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            folded = ';'.join([phase, name] + stack[::-1])
+            self.wall[folded] = self.wall.get(folded, 0) + elapsed_us
+
+            native_id = getattr(thread, 'native_id', None)
+            cpu = _thread_cpu_seconds(native_id) if native_id else None
+            if cpu is not None:
+                used = cpu - self._last_cpu.get(ident, cpu)
+                self._last_cpu[ident] = cpu
+                if used > 0:
+                    self.cpu[folded] = self.cpu.get(folded, 0) + int(used * 1e6)
+
+    def write(self, directory: Path) -> list:
+        """Write wall.folded, cpu.folded and phases.json into directory"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        written = []
+        for name, stacks in (('wall.folded', self.wall), ('cpu.folded', self.cpu)):
+            path = directory / name
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in sorted(stacks.items()):
+                    f.write(f'{stack} {count}\n')
+            written.append(path)
+        path = directory / 'phases.json'
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'interval': self.interval, 'samples': self.samples, 'phases': self.phases}, f, indent=2)
+        written.append(path)
+        return written
+
+    def summary(self) -> str:
+        lines = [f'{"phase":<16} {"wall":>9} {"cpu":>9}']
+        for name, totals in self.phases.items():
+            lines.append(f'{name:<16} {totals["wall"]:>8.2f}s {totals["cpu"]:>8.2f}s')
+        return '\n'.join(lines)
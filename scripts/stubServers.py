@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the IITK OA servlet and Nominatim, with fault injection
+
+Usage:
+    python scripts/stubServers.py [--port PORT] [--students PATH]
+                                  [--latency SPEC] [--error-rate R]
+                                  [--reset-rate R] [--truncate-rate R]
+
+Serves, from fixture data:
+    GET /Oa/servlet/AutocompleteServlet?action=complete&id=<roll>
+        AutocompleteServlet-style XML with the student's <Home_town>
+    GET /search?q=<query>&format=json&...
+        Nominatim-style JSON ([{"address": {"state": ...}}] or [])
+    GET|HEAD /Oa/Jsp/Photo/<roll>_0.jpg and /~<username>/dp
+        student photos (see probePhotos.py): a small image for a fixed,
+        hash-chosen share of rolls (OA_PHOTO_SHARE) and usernames
+        (HOME_PHOTO_SHARE), 404 otherwise; a few home pages answer 200
+        with an HTML page instead of an image, as the real server does
+
+The fixture is the roll/hometown/homestate of each record in --students
+(public/students.json by default). When that file does not exist, a
+synthetic roster is generated from the rolls in familytree.json and the
+static place mappings, so the stub works on a fresh checkout.
+
+Every response first waits for a latency drawn from --latency:
+    fixed:S            always S seconds
+    uniform:A,B        between A and B seconds
+    exp:MEAN           exponential with the given mean
+    lognormal:MEDIAN,SIGMA
+                       long-tailed; SIGMA around 1 gives a heavy p99
+and then fails with the given probabilities: --error-rate answers 503,
+--reset-rate drops the connection with a TCP reset, --truncate-rate sends
+half of the body with the full Content-Length.
+
+See loadTest.py for a runner that drives the pipeline against it.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import socket
+import struct
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from placeMappings import load_mappings
+from studentUtils import extract_batch_year
+
+SCRIPT_DIR = Path(__file__).parent
+STUDENTS_FILE = SCRIPT_DIR.parent / "public" / "students.json"
+FAMILY_TREE_FILE = SCRIPT_DIR.parent / "public" / "familytree.json"
+
+OA_PATH = '/Oa/servlet/AutocompleteServlet'
+NOMINATIM_PATH = '/search'
+OA_PHOTO_PREFIX = '/Oa/Jsp/Photo/'
+DEFAULT_PORT = 8790
+
+OA_PHOTO_SHARE = 0.7
+HOME_PHOTO_SHARE = 0.4
+HOME_HTML_SHARE = 0.05  # 200 text/html, no photo
+
+# 1x1 GIF; the first palette colour (bytes 13-15) is varied per photo so
+# each photo has its own content hash
+_GIF = bytes.fromhex('474946383961010001008000000000ffffff21f90401000000002c'
+                     '00000000010001000002024401003b')
+
+
+def parse_latency(spec: str):
+    """Latency spec -> function(rng) returning seconds"""
+    kind, _, args = spec.partition(':')
+    try:
+        values = [float(v) for v in args.split(',')] if args else []
+        if kind == 'fixed' and len(values) == 1:
+            return lambda rng: values[0]
+        if kind == 'uniform' and len(values) == 2:
+            return lambda rng: rng.uniform(values[0], values[1])
+        if kind == 'exp' and len(values) == 1 and values[0] > 0:
+            return lambda rng: rng.expovariate(1 / values[0])
+        if kind == 'lognormal' and len(values) == 2 and values[0] > 0:
+            return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    except ValueError:
+        pass
+    raise ValueError(f'bad latency spec {spec!r} (fixed:S, uniform:A,B, exp:MEAN, lognormal:MEDIAN,SIGMA)')
+
+
+class FaultProfile:
+    """Latency distribution and failure probabilities for the stub"""
+
+    def __init__(self, latency: str = 'fixed:0', error_rate: float = 0.0,
+                 reset_rate: float = 0.0, truncate_rate: float = 0.0, seed: int = None):
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.reset_rate = reset_rate
+        self.truncate_rate = truncate_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self):
+        """(delay seconds, fault or None) for one request"""
+        with self._lock:
+            delay = max(0.0, self.latency(self._rng))
+            roll = self._rng.random()
+        for fault, rate in (('error', self.error_rate), ('reset', self.reset_rate),
+                            ('truncate', self.truncate_rate)):
+            if roll < rate:
+                return delay, fault
+            roll -= rate
+        return delay, None
+
+
+def _synthetic_fixture(seed: int = 42) -> list:
+    """Roster from familytree.json rolls with hometowns drawn from the mappings"""
+    rng = random.Random(seed)
+    rolls = []
+    if FAMILY_TREE_FILE.exists():
+        with open(FAMILY_TREE_FILE, 'r', encoding='utf-8') as f:
+            stack = [json.load(f)]
+        while stack:
+            node = stack.pop()
+            head, sep, roll = (node.get('name') or '').rpartition('-')
+            if sep and extract_batch_year(roll.strip()):
+                rolls.append(roll.strip())
+            stack.extend(node.get('children') or [])
+    if not rolls:
+        rolls = [f'{year % 100:02d}{n:04d}' for year in range(2016, 2025) for n in range(1, 501)]
+
+    places = list(load_mappings()['all_mappings'].items())
+    records = []
+    for roll in dict.fromkeys(rolls):
+        city, state = rng.choice(places)
+        shape = rng.random()
+        if shape < 0.6:
+            hometown = city.title()
+        elif shape < 0.8:
+            hometown = f'{city.title()}, {state}'
+        elif shape < 0.9:
+            hometown = ''
+        else:
+            hometown = f'{city.title()} Jn'
+        records.append({'roll': roll, 'hometown': hometown, 'homestate': state if hometown else ''})
+    return records
+
+
+def load_fixture(students_file: Path = STUDENTS_FILE) -> tuple:
+    """(roll -> hometown, lowercased place -> state) for the stub to serve"""
+    if students_file and Path(students_file).exists():
+        with open(students_file, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+    else:
+        records = _synthetic_fixture()
+
+    hometowns = {}
+    places = {place: state for place, state in load_mappings()['all_mappings'].items()}
+    for record in records:
+        if not record.get('roll'):
+            continue
+        hometown = (record.get('hometown') or '').strip()
+        hometowns[str(record['roll'])] = hometown
+        if hometown and record.get('homestate'):
+            places[hometown.lower()] = record['homestate']
+    return hometowns, places
+
+
+def _photo_bucket(name: str) -> float:
+    """Stable number in [0, 1) for a roll or username"""
+    return int.from_bytes(hashlib.sha256(name.encode('utf-8')).digest()[:4], 'big') / 2 ** 32
+
+
+def stub_photo(path: str):
+    """(status, body, content type) for a photo path, None for other paths"""
+    if path.startswith(OA_PHOTO_PREFIX) and path.endswith('_0.jpg'):
+        name, share, html_share = path[len(OA_PHOTO_PREFIX):-len('_0.jpg')], OA_PHOTO_SHARE, 0.0
+    elif path.startswith('/~') and path.endswith('/dp'):
+        name, share, html_share = path[2:-len('/dp')], HOME_PHOTO_SHARE, HOME_HTML_SHARE
+    else:
+        return None
+    bucket = _photo_bucket(name)
+    if bucket < share:
+        colour = hashlib.sha256(name.encode('utf-8')).digest()[:3]
+        return 200, _GIF[:13] + colour + _GIF[16:], 'image/gif'
+    if bucket < share + html_share:
+        return 200, b'<html><body>Home page</body></html>', 'text/html'
+    return 404, b'Not Found', 'text/html'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = 'OAStub/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self, status: int, body: bytes, content_type: str, fault, head: bool = False):
+        if fault == 'reset':
+            # SO_LINGER 0 makes close() send RST instead of FIN
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            self.connection.close()
+            self.close_connection = True
+            return
+        if fault == 'error':
+            status, body, content_type = 503, b'Service Unavailable', 'text/plain'
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if fault == 'truncate':
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+            body = body[:len(body) // 2]
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_GET(self, head: bool = False):
+        url = urllib.parse.urlparse(self.path)
+        params = urllib.parse.parse_qs(url.query)
+        delay, fault = self.server.faults.draw()
+        if delay:
+            time.sleep(delay)
+        photo = stub_photo(url.path)
+        self.server.count(OA_PHOTO_PREFIX if url.path.startswith(OA_PHOTO_PREFIX)
+                          else '/~/dp' if photo else url.path, fault)
+
+        if photo:
+            self._reply(*photo, fault, head=head)
+        elif url.path == OA_PATH:
+            roll = params.get('id', [''])[0]
+            hometown = self.server.hometowns.get(roll)
+            if hometown is None:
+                body = '<?xml version="1.0" encoding="UTF-8"?><response></response>'
+            else:
+                body = ('<?xml version="1.0" encoding="UTF-8"?><response><student>'
+                        f'<Roll_no>{escape(roll)}</Roll_no>'
+                        f'<Home_town>{escape(hometown)}</Home_town>'
+                        '</student></response>')
+            self._reply(200, body.encode('utf-8'), 'text/xml; charset=utf-8', fault)
+        elif url.path == NOMINATIM_PATH:
+            query = params.get('q', [''])[0].strip().lower()
+            if query.endswith(', india'):
+                query = query[:-len(', india')]
+            state = self.server.places.get(query.strip())
+            results = [{'display_name': f'{query}, {state}, India', 'address': {'state': state}}] if state else []
+            self._reply(200, json.dumps(results).encode('utf-8'), 'application/json', fault)
+        else:
+            self._reply(404, b'{"error": "not found"}', 'application/json', None)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops SYNs under a burst of workers, which
+    # shows up as ~1 s retransmit stalls the real servers would not cause
+    request_queue_size = 128
+
+    def __init__(self, address, hometowns: dict, places: dict, faults: FaultProfile):
+        super().__init__(address, StubHandler)
+        self.hometowns = hometowns
+        self.places = places
+        self.faults = faults
+        self.counts = {}
+        self._count_lock = threading.Lock()
+
+    def count(self, path: str, fault):
+        with self._count_lock:
+            key = (path, fault or 'ok')
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def handle_error(self, request, client_address):
+        # Reset connections make the handler's cleanup fail; that is the point
+        pass
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def start_stub(port: int = 0, students_file: Path = STUDENTS_FILE,
+               faults: FaultProfile = None) -> StubServer:
+    """Start a stub on a background thread (port 0 picks a free one)"""
+    hometowns, places = load_fixture(students_file)
+    server = StubServer(('127.0.0.1', port), hometowns, places, faults or FaultProfile())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--students', type=Path, default=STUDENTS_FILE, help='fixture records')
+    parser.add_argument('--latency', default='fixed:0', help='latency spec (see module docstring)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of 503 responses')
+    parser.add_argument('--reset-rate', type=float, default=0.0, help='share of reset connections')
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help='share of truncated bodies')
+    parser.add_argument('--seed', type=int, help='fault/latency random seed')
+
+
+def faults_from_args(args) -> FaultProfile:
+    return FaultProfile(args.latency, args.error_rate, args.reset_rate, args.truncate_rate, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve OA and Nominatim stand-ins with fault injection')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='port to listen on')
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        faults = faults_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    server = start_stub(args.port, args.students, faults)
+    print(f'Serving {len(server.hometowns)} rolls and {len(server.places)} places on {server.base_url}')
+    print(f'  OA:        {server.base_url}{OA_PATH}?action=complete&id=<roll>')
+    print(f'  Nominatim: {server.base_url}{NOMINATIM_PATH}')
+    print(f'  Photos:    {server.base_url}{OA_PHOTO_PREFIX}<roll>_0.jpg, {server.base_url}/~<username>/dp')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print('\nStopping')
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Compact in-memory student record for the enrichment pipeline.
+
+students.json is loaded into StudentRecord objects (slots, no per-record
+dict) and enriched in place; records become dicts again only when they are
+serialized. Categorical values (dept, program, hall, gender, blood group,
+hometown, state, resolution method) are interned, so the thousands of
+records sharing a value share one string. Fields outside the known schema
+are kept in `extra`, and to_dict() reproduces the original key order, so a
+round trip leaves unenriched records byte-for-byte unchanged.
+"""
+
+import sys
+from dataclasses import dataclass, fields
+
+INTERNED_FIELDS = frozenset({
+    'dept', 'program', 'hall', 'gender', 'blood_group',
+    'hometown', 'homestate', 'homestate_method',
+})
+# Set by the pipeline; appended after the original keys when not already there
+ENRICHMENT_FIELDS = ('hometown', 'homestate', 'homestate_method', 'homestate_confidence')
+# Set by probePhotos.py (kept in `extra`)
+PHOTO_FIELDS = ('photo_oa', 'photo_home', 'thumb')
+# Every field the pipeline owns, as opposed to the directory's own data
+PIPELINE_FIELDS = frozenset(ENRICHMENT_FIELDS + PHOTO_FIELDS)
+
+# One shared tuple per distinct key order (almost every record has the same)
+_key_orders = {}
+
+
+def intern_value(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+@dataclass(slots=True, eq=False)
+class StudentRecord:
+    roll: str = None
+    name: str = None
+    dept: str = None
+    program: str = None
+    hall: str = None
+    room: str = None
+    gender: str = None
+    blood_group: str = None
+    username: str = None
+    hometown: str = None
+    homestate: str = None
+    homestate_method: str = None
+    homestate_confidence: float = None
+    extra: dict = None  # fields outside the schema above
+    keys: tuple = ()  # original key order
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'StudentRecord':
+        record = cls()
+        extra = None
+        for key, value in data.items():
+            if key in _FIELD_NAMES:
+                setattr(record, key, intern_value(value) if key in INTERNED_FIELDS else value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        keys = tuple(data)
+        record.keys = _key_orders.setdefault(keys, keys)
+        record.extra = extra
+        return record
+
+    def to_dict(self) -> dict:
+        data = {}
+        for key in self.keys:
+            data[key] = getattr(self, key) if key in _FIELD_NAMES else self.extra[key]
+        for key in ENRICHMENT_FIELDS:
+            if key not in data:
+                value = getattr(self, key)
+                if value is not None:
+                    data[key] = value
+        return data
+
+
+_FIELD_NAMES = frozenset(f.name for f in fields(StudentRecord)) - {'extra', 'keys'}
@@ -0,0 +1,89 @@
+"""
+Student record helpers shared by the pipeline scripts.
+
+These mirror the derivations in src/lib/studentUtils.ts so that anything the
+scripts precompute matches what the frontend would have computed itself.
+"""
+
+import re
+from typing import Optional
+
+
+def extract_batch_year(roll_no) -> Optional[int]:
+    """Extract batch year from roll number (same rules as extractBatchYear)"""
+    if not roll_no:
+        return None
+
+    roll_str = str(roll_no).strip()
+
+    # Legacy format Y8xxx, Y9xxx
+    if roll_str.startswith('Y'):
+        year_digit = roll_str[1:2]
+        if year_digit == '8':
+            return 2008
+        if year_digit == '9':
+            return 2009
+        return None
+
+    if not roll_str[:2].isdigit():
+        return None
+    prefix = int(roll_str[:2])
+
+    # 5-digit format: 10xxx -> 2010
+    if len(roll_str) == 5 and 10 <= prefix <= 14:
+        return 2000 + prefix
+
+    # 6-digit format: 150xxx -> 2015, 8-digit format: 23001234 -> 2023
+    if len(roll_str) in (6, 8) and 15 <= prefix <= 30:
+        return 2000 + prefix
+
+    return None
+
+
+def clean_name(name) -> str:
+    """Strip date-of-birth suffixes and extra whitespace (same as cleanName)"""
+    if not name:
+        return ''
+    name = re.sub(r'\s*\(\d{2}-\d{2}-\d{4}\)', '', name)
+    return re.sub(r'\s+', ' ', name).strip()
+
+
+def student_facets(student: dict) -> dict:
+    """
+    Facet values of a raw students.json record, using the same field
+    fallbacks as mergeStudentData. Missing values are None.
+    """
+    department = student.get('dept') or student.get('department') or ''
+    program = student.get('program') or ''
+    hall = (student.get('hall') or '').strip()
+    gender = (student.get('gender') or '').strip()
+    blood_group = (student.get('blood_group') or student.get('bloodGroup') or '').strip()
+    state = (student.get('homestate') or student.get('state') or '').strip()
+
+    return {
+        'batchYear': extract_batch_year(student.get('roll') or student.get('rollNo')),
+        'department': department if department and department != 'N/A' else None,
+        'program': program if program and program != 'N/A' else None,
+        'hall': hall or None,
+        'gender': gender or None,
+        'bloodGroup': blood_group or None,
+        'state': state or None,
+    }
+
+
+def parse_facet_filters(clauses: list, facets) -> dict:
+    """
+    FACET=VALUE command-line filters -> {facet: [values]} (repeated facets
+    are ORed). facets lists the allowed names; batchYear values become ints.
+    """
+    filters = {}
+    for clause in clauses:
+        facet, sep, value = clause.partition('=')
+        if not sep or facet not in facets:
+            raise ValueError(f'Invalid filter {clause!r} (facets: {", ".join(facets)})')
+        if facet == 'batchYear':
+            if not value.isdigit():
+                raise ValueError(f'Invalid filter {clause!r} (batchYear is a year)')
+            value = int(value)
+        filters.setdefault(facet, []).append(value)
+    return filters
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Watch students.json and enrich only the students that are new or changed
+
+Usage:
+    python scripts/watchStudents.py [--interval SECONDS] [--settle SECONDS] [--once]
+                                    [--resolver URL] [--no-change-feed]
+
+    --interval        how often to check students.json (default 2 s)
+    --settle          after a change, wait until the file has stopped changing
+                      for this long before reading it (default 1 s)
+    --once            check (and enrich) once, then exit
+    --resolver        resolve through a running resolverDaemon.py
+    --no-change-feed  don't append to the change feed (see changeFeed.py)
+
+A change is detected by the file's mtime and size, confirmed by its SHA-256
+(a touch alone does nothing). Each student is fingerprinted by a hash of its
+fields other than the ones the pipeline sets (studentRecord.PIPELINE_FIELDS:
+hometown, homestate and its provenance, the photo flags and thumbnail), so
+neither an enrichment run nor probePhotos.py makes students look changed;
+Phase 1 (OA fetch + offline
+resolution) and Phase 2 (Nominatim) then run only for students whose roll is
+new, whose fingerprint changed, or who were never enriched. students.json
+is written back atomically, followed by the derived artifacts.
+
+Fingerprints and the last seen file signature are kept in
+scripts/students.fingerprints.json, so a restarted watcher picks up where it
+left off. On the first run (no fingerprints yet) only students without a
+hometown field are enriched. If students.json changes again while a batch is
+being enriched, that result is dropped and the next check starts over.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import changeFeed
+import populateHometownState as resolver
+from fetchScheduler import load_fetch_times
+from studentRecord import PIPELINE_FIELDS, StudentRecord
+
+SCRIPT_DIR = Path(__file__).parent
+FINGERPRINT_FILE = SCRIPT_DIR / "students.fingerprints.json"
+
+# Bumped when fingerprint() changes; older stored fingerprints are discarded
+FINGERPRINT_VERSION = 2
+
+DEFAULT_INTERVAL = 2.0  # seconds
+DEFAULT_SETTLE = 1.0  # seconds
+
+
+def file_signature(path: Path):
+    """(mtime_ns, size) of path, None when it does not exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(student: dict) -> str:
+    """Hash of a student's source fields (everything the pipeline doesn't set)"""
+    source = {k: v for k, v in student.items() if k not in PIPELINE_FIELDS}
+    text = json.dumps(source, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def load_state() -> dict:
+    empty = {'version': FINGERPRINT_VERSION, 'signature': None, 'digest': None, 'rolls': None}
+    try:
+        with open(FINGERPRINT_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return empty
+    except Exception as e:
+        print(f'Warning: could not read {FINGERPRINT_FILE.name} ({e}); fingerprinting from scratch')
+        return empty
+    if state.get('version') != FINGERPRINT_VERSION:
+        # Fingerprinted differently: start over as on a first run
+        return empty
+    return state
+
+
+def save_state(state: dict):
+    tmp_path = FINGERPRINT_FILE.with_name(FINGERPRINT_FILE.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(tmp_path, FINGERPRINT_FILE)
+
+
+def fingerprint_map(records: list, fingerprints: list) -> dict:
+    """roll -> fingerprint (a list of them for the rare roll listed twice)"""
+    rolls = {}
+    for record, fp in zip(records, fingerprints):
+        if not record.roll:
+            continue
+        seen = rolls.get(record.roll)
+        if seen is None:
+            rolls[record.roll] = fp
+        elif isinstance(seen, list):
+            seen.append(fp)
+        else:
+            rolls[record.roll] = [seen, fp]
+    return rolls
+
+
+def changed_targets(records: list, fingerprints: list, known) -> list:
+    """Indices of records to enrich: never enriched, new roll or changed fingerprint"""
+    targets = []
+    for i, (record, fp) in enumerate(zip(records, fingerprints)):
+        if not record.roll:
+            continue
+        if record.hometown is None:
+            targets.append(i)
+        elif known is not None:
+            seen = known.get(record.roll)
+            if fp != seen and not (isinstance(seen, list) and fp in seen):
+                targets.append(i)
+    return targets
+
+
+def enrich_changed(state: dict, resolve_detailed, client=None, change_feed=True) -> bool:
+    """
+    Enrich the new/changed students in students.json and write it back.
+    Returns False when the file could not be used yet (retry on the next check).
+    """
+    students_file = resolver.STUDENTS_FILE
+    signature = file_signature(students_file)
+    try:
+        with open(students_file, 'r', encoding='utf-8') as f:
+            students = json.load(f)
+    except Exception as e:
+        print(f'Error reading students.json: {e}')
+        return False
+
+    fingerprints = [fingerprint(student) for student in students]
+    records = [StudentRecord.from_dict(student) for student in students]
+    del students
+
+    targets = changed_targets(records, fingerprints, state['rolls'])
+    print(f'{len(records)} students, {len(targets)} new or changed')
+
+    if targets:
+        batch = [records[i] for i in targets]
+        before = changeFeed.snapshot(batch)
+        fetch_times = load_fetch_times()
+        resolver.run_fetch_phase(batch, resolve_detailed, fetch_times=fetch_times)
+        resolver.save_fetch_times_or_warn(fetch_times)
+        resolver.run_nominatim_phase(batch, resolve_detailed)
+        if client:
+            client.flush()
+        else:
+            resolver.save_geocode_cache()
+
+        # Don't overwrite students that were added while this batch was fetched
+        if file_signature(students_file) != signature:
+            print('students.json changed while enriching; starting over')
+            return False
+        if not resolver.write_outputs(records):
+            return False
+
+        if change_feed:
+            run_id = changeFeed.new_run_id()
+            try:
+                entries = changeFeed.record_changes(batch, before, run_id)
+                count = changeFeed.append_changes(entries, changeFeed.CHANGE_FEED_FILE)
+                print(f'Appended {count} changes to {changeFeed.CHANGE_FEED_FILE.name} (run {run_id})')
+            except Exception as e:
+                print(f'Error appending to the change feed: {e}')
+
+    state['signature'] = file_signature(students_file)
+    state['digest'] = file_digest(students_file)
+    state['rolls'] = fingerprint_map(records, fingerprints)
+    save_state(state)
+    return True
+
+
+def watch(interval: float, settle: float, resolve_detailed, client=None,
+          change_feed=True, once=False):
+    state = load_state()
+    print(f'Watching {resolver.STUDENTS_FILE} (every {interval:g} s)')
+    while True:
+        signature = file_signature(resolver.STUDENTS_FILE)
+        if signature is not None and signature != state['signature']:
+            # Wait for a writer that is still appending to finish
+            time.sleep(settle)
+            if file_signature(resolver.STUDENTS_FILE) != signature:
+                continue
+            if file_digest(resolver.STUDENTS_FILE) == state['digest']:
+                state['signature'] = signature  # touched, not modified
+                save_state(state)
+            else:
+                print()
+                print(f'[{time.strftime("%H:%M:%S")}] students.json changed')
+                start = time.perf_counter()
+                if enrich_changed(state, resolve_detailed, client, change_feed):
+                    print(f'Enriched in {time.perf_counter() - start:.1f}s')
+        if once:
+            return
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Enrich new or changed students whenever students.json changes')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='seconds between checks')
+    parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE,
+                        help='seconds the file must stay unchanged before it is read')
+    parser.add_argument('--once', action='store_true', help='check once and exit')
+    parser.add_argument('--resolver', metavar='URL', help='use a running resolver daemon')
+    parser.add_argument('--no-change-feed', action='store_true', help='do not append to the change feed')
+    args = parser.parse_args()
+
+    client = None
+    if args.resolver:
+        from resolverDaemon import ResolverClient
+        client = ResolverClient(args.resolver)
+        if client.available():
+            print(f'Using resolver daemon at {args.resolver}')
+        else:
+            print(f'Resolver daemon not reachable at {args.resolver}, resolving locally')
+            client = None
+    if not client:
+        resolver.load_geocode_cache()
+    resolve_detailed = client.resolve_many_detailed if client else resolver.resolve_many_detailed
+
+    try:
+        watch(args.interval, args.settle, resolve_detailed, client,
+              change_feed=not args.no_change_feed, once=args.once)
+    except KeyboardInterrupt:
+        print()
+        print('Stopped')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,7 @@
 import { useState, useEffect, useRef, memo } from "react";
 import type { Student, StudentGridProps } from "@/types/student";
 import { getBatchLabel, ITEMS_PER_PAGE } from "@/lib/constants";
-import { getHomeImageUrl, getOAImageUrl } from "@/lib/config";
+import { getHomeImageUrl, getOAImageUrl, getThumbnailUrl } from "@/lib/config";
 import { Frown, User, Loader2 } from "lucide-react";
 
 interface StudentCardProps {
@@ -11,31 +11,29 @@ interface StudentCardProps {
 
 function StudentCard({ student, onClick }: StudentCardProps) {
   const [imageLoaded, setImageLoaded] = useState(false);
-  const [imageError, setImageError] = useState(false);
-  const [useOa, setUseOa] = useState(false);
-
-  const homeUrl = student.username ? getHomeImageUrl(student.username) : "";
-  const oaUrl = getOAImageUrl(student.rollNo);
-  
-  // Use home URL first if available, otherwise use OA
-  const imageUrl = !homeUrl || useOa ? oaUrl : homeUrl;
+  const [sourceIndex, setSourceIndex] = useState(0);
+
+  // Thumbnail first, then home, then OA; photos probed as missing are skipped
+  const sources = [
+    getThumbnailUrl(student.thumb),
+    student.username && student.photo_home !== false
+      ? getHomeImageUrl(student.username)
+      : "",
+    student.photo_oa !== false ? getOAImageUrl(student.rollNo) : "",
+  ].filter(Boolean);
+  const imageUrl = sources[sourceIndex];
+  const imageError = !imageUrl;
 
   // Reset state when student changes
   useEffect(() => {
     setImageLoaded(false);
-    setImageError(false);
-    setUseOa(false);
+    setSourceIndex(0);
   }, [student.rollNo]);
 
   const handleImageError = () => {
-    if (!useOa && homeUrl) {
-      // Home image failed, try OA
-      setUseOa(true);
-      setImageLoaded(false);
-    } else {
-      // Both failed
-      setImageError(true);
-    }
+    // Try the next source; past the last one imageError becomes true
+    setSourceIndex((index) => index + 1);
+    setImageLoaded(false);
   };
 
   return (
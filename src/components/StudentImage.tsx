@@ -9,6 +9,9 @@ interface StudentImageProps {
   name: string;
   size?: "sm" | "md" | "lg" | "xl" | "2xl" | "3xl";
   showIdCardButton?: boolean;
+  // From scripts/probePhotos.py; false skips a photo known to be missing
+  hasHomePhoto?: boolean;
+  hasOaPhoto?: boolean;
 }
 
 type ImageSource = "home" | "oa" | "none";
@@ -19,6 +22,8 @@ export function StudentImage({
   name,
   size = "md",
   showIdCardButton = false,
+  hasHomePhoto,
+  hasOaPhoto,
 }: StudentImageProps) {
   const [primarySource, setPrimarySource] = useState<ImageSource>("home");
   const [homeImageExists, setHomeImageExists] = useState<boolean | null>(null);
@@ -26,8 +31,9 @@ export function StudentImage({
   const [showingIdCard, setShowingIdCard] = useState(false);
   const [currentImageError, setCurrentImageError] = useState(false);
 
-  const homeUrl = username ? getHomeImageUrl(username) : "";
-  const oaUrl = getOAImageUrl(rollNo);
+  const homeUrl =
+    username && hasHomePhoto !== false ? getHomeImageUrl(username) : "";
+  const oaUrl = hasOaPhoto !== false ? getOAImageUrl(rollNo) : "";
 
   // Reset state when student changes
   useEffect(() => {
@@ -42,7 +48,7 @@ export function StudentImage({
   useEffect(() => {
     if (!homeUrl) {
       setHomeImageExists(false);
-      setPrimarySource("oa");
+      setPrimarySource(oaUrl ? "oa" : "none");
       return;
     }
 
@@ -51,11 +57,15 @@ export function StudentImage({
     homeImg.onload = () => setHomeImageExists(true);
     homeImg.onerror = () => {
       setHomeImageExists(false);
-      setPrimarySource("oa");
+      setPrimarySource(oaUrl ? "oa" : "none");
     };
     homeImg.src = homeUrl;
 
     // Check OA image in parallel
+    if (!oaUrl) {
+      setOaImageExists(false);
+      return;
+    }
     const oaImg = new Image();
     oaImg.onload = () => setOaImageExists(true);
     oaImg.onerror = () => setOaImageExists(false);
@@ -63,7 +73,8 @@ export function StudentImage({
   }, [homeUrl, oaUrl]);
 
   const handleImageError = () => {
-    if (primarySource === "home") {
+    // No OA fallback when its photo is known to be missing
+    if (primarySource === "home" && oaUrl) {
       setPrimarySource("oa");
       setCurrentImageError(false);
     } else {
@@ -78,6 +89,7 @@ export function StudentImage({
     if (primarySource === "oa") return oaUrl;
     return "";
   };
+  const currentImageUrl = getCurrentImageUrl();
 
   const sizeClasses = {
     sm: "w-10 h-10",
@@ -110,9 +122,9 @@ export function StudentImage({
       <div
         className={`${sizeClasses[size]} rounded-md overflow-hidden bg-muted border border-border flex-shrink-0`}
       >
-        {primarySource !== "none" && !currentImageError ? (
+        {currentImageUrl && !currentImageError ? (
           <img
-            src={getCurrentImageUrl()}
+            src={currentImageUrl}
             alt={name}
             onError={handleImageError}
             className="w-full h-full object-contain"
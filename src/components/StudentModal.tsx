@@ -149,6 +149,8 @@ const StudentModal = ({
               name={currentStudent.name || "Unknown"}
               size="3xl"
               showIdCardButton={true}
+              hasHomePhoto={currentStudent.photo_home}
+              hasOaPhoto={currentStudent.photo_oa}
             />
 
             {/* Name and roll number on one line */}
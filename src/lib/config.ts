@@ -18,5 +18,11 @@ export function getHomeImageUrl(username: string): string {
   return `http://home.iitk.ac.in/~${username}/dp`;
 }
 
+// Pre-built WebP thumbnail (students.json "thumb", relative to public/)
+export function getThumbnailUrl(thumb?: string): string {
+  if (!thumb) return "";
+  return getAssetPath(thumb);
+}
+
 // Alias for backward compatibility
 export const getImageUrl = getOAImageUrl;
@@ -15,6 +15,31 @@ interface StudentsCache {
   }> | null;
 }
 
+interface AssetManifest {
+  version: number;
+  assets: Record<string, { path: string; hash: string }>;
+}
+
+let manifestPromise: Promise<AssetManifest | null> | null = null;
+
+// The manifest maps data files to content-hashed copies that can be cached
+// forever. It is revalidated on every load; without one (e.g. in dev) the
+// plain files are used.
+function loadManifest(): Promise<AssetManifest | null> {
+  if (!manifestPromise) {
+    manifestPromise = fetch(getAssetPath("data-manifest.json"), { cache: "no-cache" })
+      .then((res) => (res.ok ? (res.json() as Promise<AssetManifest>) : null))
+      .catch(() => null);
+  }
+  return manifestPromise;
+}
+
+async function resolveAssetPath(name: string): Promise<string> {
+  const manifest = await loadManifest();
+  const entry = manifest?.assets?.[name];
+  return getAssetPath(entry ? entry.path : name);
+}
+
 const cache: StudentsCache = {
   raw: null,
   familyTree: null,
@@ -38,10 +63,15 @@ export async function getStudentData(): Promise<{
   }
 
   cache.promise = (async () => {
+    const [studentsPath, treePath] = await Promise.all([
+      resolveAssetPath("students.json"),
+      resolveAssetPath("familytree.json"),
+    ]);
+
     // Fetch both files in parallel
     const [studentsRes, treeRes] = await Promise.all([
-      fetch(getAssetPath("students.json")),
-      fetch(getAssetPath("familytree.json")),
+      fetch(studentsPath),
+      fetch(treePath),
     ]);
 
     if (!studentsRes.ok) throw new Error("Failed to load students data");
@@ -85,4 +115,5 @@ export function resetCache(): void {
   cache.merged = null;
   cache.loaded = false;
   cache.promise = null;
+  manifestPromise = null;
 }
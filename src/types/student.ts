@@ -25,11 +25,17 @@ export interface Student {
   room?: string;
   hometown?: string;
   homestate?: string;
+  homestate_method?: string;
+  homestate_confidence?: number;
   state?: string;
 
   // Image
   imageUrl?: string;
   image_url?: string;
+  // Set by scripts/probePhotos.py; undefined when not probed
+  photo_oa?: boolean;
+  photo_home?: boolean;
+  thumb?: string;
 
   // Metadata
   hasFullData?: boolean;